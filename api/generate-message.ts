@@ -21,6 +21,12 @@ interface RequestBody {
   plant: PlantData;
   weatherData?: WeatherData;
   systemPrompt: string;
+  stream?: boolean; // Send the message as server-sent events while it is generated
+}
+
+// Batch form: one entry per plant, answered with one message per entry in the same order
+interface BatchRequestBody {
+  plants: RequestBody[];
 }
 
 interface GeminiRequest {
@@ -31,6 +37,7 @@ interface GeminiRequest {
   }>;
   generationConfig?: {
     temperature: number;
+    responseMimeType?: string;
   };
 }
 
@@ -42,16 +49,294 @@ interface GeminiResponse {
       }>;
     };
   }>;
+  usageMetadata?: {
+    promptTokenCount?: number;
+    candidatesTokenCount?: number;
+    totalTokenCount?: number;
+  };
   error?: {
     message: string;
     code: number;
   };
 }
 
+// Token counts reported back to clients so they can track cost per request
+interface TokenUsage {
+  promptTokens: number;
+  outputTokens: number;
+  totalTokens: number;
+}
+
+// Upper bound on plants per batch, keeps the combined prompt and response a reasonable size
+const MAX_BATCH_SIZE = 25;
+
+const FALLBACK_MESSAGE = "I'm doing great! 🌿";
+
+const GEMINI_MODEL = 'gemini-2.5-flash-lite';
+
+// Module scope runs once per function instance, so an instance's first invocation is its cold start
+const INSTANCE_ID = Math.random().toString(36).slice(2, 10);
+let coldInvocation = true;
+
+// Reported in the Server-Timing header so clients can split latency between cold start, handler and Gemini
+interface InvocationTiming {
+  start: number; // performance.now() when the handler was entered
+  coldStartMs?: number; // process uptime when a cold instance reached the handler
+  geminiMs?: number; // time spent waiting on Gemini
+}
+
+function startInvocation(): InvocationTiming {
+  const timing: InvocationTiming = { start: performance.now() };
+  if (coldInvocation) {
+    coldInvocation = false;
+    timing.coldStartMs = process.uptime() * 1000;
+  }
+  return timing;
+}
+
+function setServerTiming(res: VercelResponse, timing: InvocationTiming) {
+  const metrics = [`handler;dur=${(performance.now() - timing.start).toFixed(1)}`];
+  if (timing.geminiMs !== undefined) {
+    metrics.push(`gemini;dur=${timing.geminiMs.toFixed(1)}`);
+  }
+  if (timing.coldStartMs !== undefined) {
+    metrics.push(`cold;dur=${timing.coldStartMs.toFixed(1)}`);
+  }
+  metrics.push(`instance;desc="${INSTANCE_ID}"`);
+  res.setHeader('Server-Timing', metrics.join(', '));
+}
+
+function buildUserPrompt(plant: PlantData, weatherData?: WeatherData): string {
+  let userPrompt = `Generate a message from ${plant.nickname}, a ${plant.species} with a ${plant.vibe} vibe.`;
+  
+  if (weatherData) {
+    userPrompt += ` Current weather: ${weatherData.current.temperature}°C, ${weatherData.current.humidity}% humidity, ${weatherData.current.precipitation}mm precipitation.`;
+  }
+  
+  userPrompt += ` Plant status: ${plant.status}. Health streak: ${plant.healthStreak} days.`;
+  
+  if (plant.lastWatered) {
+    const lastWateredDate = new Date(plant.lastWatered);
+    const now = new Date();
+    const daysSince = Math.floor((now.getTime() - lastWateredDate.getTime()) / (1000 * 60 * 60 * 24));
+    userPrompt += ` Last watered: ${daysSince} days ago.`;
+  }
+
+  return userPrompt;
+}
+
+// Pack several plants into one prompt that asks for a JSON array of {id, message}
+function buildBatchPrompt(entries: RequestBody[]): string {
+  const sections = entries.map((entry, index) =>
+    `PLANT ${index + 1}:\n${entry.systemPrompt}\n\n${buildUserPrompt(entry.plant, entry.weatherData)}`
+  );
+
+  return 'You are writing daily messages for several houseplants. Each plant below has its own personality instructions. ' +
+    "Write one message per plant, in that plant's voice, following its instructions.\n\n" +
+    'Respond with a JSON array containing one object per plant, in the same order, each with an "id" field (the plant number) and a "message" field.\n\n' +
+    sections.join('\n\n');
+}
+
+// Map the model's JSON array back onto the batch entries, falling back per plant if anything is missing
+function splitBatchMessages(text: string | undefined, count: number): string[] {
+  const messages: string[] = new Array(count).fill(FALLBACK_MESSAGE);
+  if (!text) {
+    return messages;
+  }
+
+  try {
+    const parsed = JSON.parse(text);
+    if (Array.isArray(parsed)) {
+      parsed.forEach((item: any, index: number) => {
+        const id = typeof item?.id === 'number' ? item.id - 1 : index;
+        if (id >= 0 && id < count && typeof item?.message === 'string' && item.message) {
+          messages[id] = item.message;
+        }
+      });
+    }
+  } catch (error) {
+    console.error('Could not parse batch response:', error);
+  }
+
+  return messages;
+}
+
+function toTokenUsage(metadata: GeminiResponse['usageMetadata']): TokenUsage | undefined {
+  if (!metadata) {
+    return undefined;
+  }
+  const promptTokens = metadata.promptTokenCount ?? 0;
+  const outputTokens = metadata.candidatesTokenCount ?? 0;
+  return {
+    promptTokens,
+    outputTokens,
+    totalTokens: metadata.totalTokenCount ?? promptTokens + outputTokens
+  };
+}
+
+async function callGemini(apiKey: string, geminiRequest: GeminiRequest): Promise<{ status: number; ok: boolean; data: GeminiResponse; durationMs: number }> {
+  const geminiUrl = `https://generativelanguage.googleapis.com/v1beta/models/${GEMINI_MODEL}:generateContent?key=${encodeURIComponent(apiKey)}`;
+  const start = performance.now();
+  
+  const geminiResponse = await fetch(geminiUrl, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(geminiRequest),
+  });
+
+  const geminiData: GeminiResponse = await geminiResponse.json();
+  return { status: geminiResponse.status, ok: geminiResponse.ok, data: geminiData, durationMs: performance.now() - start };
+}
+
+// Relay Gemini's streamed output as server-sent events: {"text": chunk} per chunk, {"usage": ...}, then [DONE]
+async function handleStream(apiKey: string, geminiRequest: GeminiRequest, res: VercelResponse, timing: InvocationTiming) {
+  const geminiUrl = `https://generativelanguage.googleapis.com/v1beta/models/${GEMINI_MODEL}:streamGenerateContent?alt=sse&key=${encodeURIComponent(apiKey)}`;
+  const geminiStart = performance.now();
+
+  const geminiResponse = await fetch(geminiUrl, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(geminiRequest),
+  });
+  // Headers go out before the stream ends, so this only covers the wait for Gemini's response headers
+  timing.geminiMs = performance.now() - geminiStart;
+  setServerTiming(res, timing);
+
+  if (!geminiResponse.ok || !geminiResponse.body) {
+    const errorData = (await geminiResponse.json().catch(() => ({}))) as Partial<GeminiResponse>;
+    const errorMessage = errorData.error?.message || `API request failed with status ${geminiResponse.status}`;
+    console.error('Gemini API Error:', errorMessage);
+
+    return res.status(geminiResponse.status || 500).json({
+      error: errorMessage
+    });
+  }
+
+  res.status(200);
+  res.setHeader('Content-Type', 'text/event-stream');
+  res.setHeader('Cache-Control', 'no-cache');
+  res.flushHeaders();
+
+  const reader = geminiResponse.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let sentText = false;
+  let usage: TokenUsage | undefined;
+
+  const relayEvent = (event: string) => {
+    const data = event
+      .split('\n')
+      .filter((line) => line.startsWith('data:'))
+      .map((line) => line.slice(5).trim())
+      .join('\n');
+    if (!data) {
+      return;
+    }
+    try {
+      const chunk: GeminiResponse = JSON.parse(data);
+      const text = chunk.candidates?.[0]?.content?.parts?.[0]?.text;
+      if (text) {
+        res.write(`data: ${JSON.stringify({ text })}\n\n`);
+        sentText = true;
+      }
+      // Counts are cumulative, so the last chunk that has them wins
+      usage = toTokenUsage(chunk.usageMetadata) ?? usage;
+    } catch (error) {
+      console.error('Could not parse stream chunk:', error);
+    }
+  };
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer = (buffer + decoder.decode(value, { stream: true })).replace(/\r\n/g, '\n');
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        relayEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+    relayEvent(buffer);
+  } catch (error) {
+    // Headers are already sent, so report the failure in-band and close the stream
+    console.error('Error streaming message:', error);
+    res.write(`data: ${JSON.stringify({ error: error instanceof Error ? error.message : 'Stream interrupted' })}\n\n`);
+    return res.end();
+  }
+
+  if (!sentText) {
+    res.write(`data: ${JSON.stringify({ text: FALLBACK_MESSAGE })}\n\n`);
+  }
+  if (usage) {
+    res.write(`data: ${JSON.stringify({ usage })}\n\n`);
+  }
+  res.write('data: [DONE]\n\n');
+  return res.end();
+}
+
+async function handleBatch(apiKey: string, body: BatchRequestBody, res: VercelResponse, timing: InvocationTiming) {
+  const entries = body.plants;
+  if (entries.length === 0 || entries.length > MAX_BATCH_SIZE) {
+    return res.status(400).json({
+      error: `plants must contain between 1 and ${MAX_BATCH_SIZE} entries`
+    });
+  }
+  if (entries.some((entry) => !entry || !entry.plant || !entry.systemPrompt)) {
+    return res.status(400).json({
+      error: 'Missing required fields: every entry in plants needs plant and systemPrompt'
+    });
+  }
+
+  const geminiRequest: GeminiRequest = {
+    contents: [
+      {
+        parts: [
+          {
+            text: buildBatchPrompt(entries)
+          }
+        ]
+      }
+    ],
+    generationConfig: {
+      temperature: 0.8,
+      responseMimeType: 'application/json'
+    }
+  };
+
+  const gemini = await callGemini(apiKey, geminiRequest);
+  timing.geminiMs = gemini.durationMs;
+  setServerTiming(res, timing);
+
+  if (!gemini.ok || gemini.data.error) {
+    const errorMessage = gemini.data.error?.message || `API request failed with status ${gemini.status}`;
+    console.error('Gemini API Error:', errorMessage);
+    
+    return res.status(gemini.status || 500).json({
+      error: errorMessage
+    });
+  }
+
+  const text = gemini.data.candidates?.[0]?.content?.parts?.[0]?.text;
+  return res.status(200).json({
+    messages: splitBatchMessages(text, entries.length),
+    usage: toTokenUsage(gemini.data.usageMetadata)
+  });
+}
+
 export default async function handler(
   req: VercelRequest,
   res: VercelResponse
 ) {
+  const timing = startInvocation();
+
   // Handle CORS
   res.setHeader('Access-Control-Allow-Origin', '*');
   res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
@@ -75,6 +360,10 @@ export default async function handler(
       });
     }
 
+    if (req.body && Array.isArray(req.body.plants)) {
+      return await handleBatch(apiKey, req.body as BatchRequestBody, res, timing);
+    }
+
     // Validate request body
     const body: RequestBody = req.body;
     if (!body || !body.plant || !body.systemPrompt) {
@@ -86,20 +375,7 @@ export default async function handler(
     const { plant, weatherData, systemPrompt } = body;
 
     // Build user prompt
-    let userPrompt = `Generate a message from ${plant.nickname}, a ${plant.species} with a ${plant.vibe} vibe.`;
-    
-    if (weatherData) {
-      userPrompt += ` Current weather: ${weatherData.current.temperature}°C, ${weatherData.current.humidity}% humidity, ${weatherData.current.precipitation}mm precipitation.`;
-    }
-    
-    userPrompt += ` Plant status: ${plant.status}. Health streak: ${plant.healthStreak} days.`;
-    
-    if (plant.lastWatered) {
-      const lastWateredDate = new Date(plant.lastWatered);
-      const now = new Date();
-      const daysSince = Math.floor((now.getTime() - lastWateredDate.getTime()) / (1000 * 60 * 60 * 24));
-      userPrompt += ` Last watered: ${daysSince} days ago.`;
-    }
+    const userPrompt = buildUserPrompt(plant, weatherData);
 
     // Combine system prompt with user prompt
     const fullPrompt = `${systemPrompt}\n\n${userPrompt}`;
@@ -120,40 +396,39 @@ export default async function handler(
       }
     };
 
-    // Make request to Gemini API
-    const model = 'gemini-2.5-flash-lite';
-    const geminiUrl = `https://generativelanguage.googleapis.com/v1beta/models/${model}:generateContent?key=${encodeURIComponent(apiKey)}`;
-    
-    const geminiResponse = await fetch(geminiUrl, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify(geminiRequest),
-    });
+    if (body.stream) {
+      return await handleStream(apiKey, geminiRequest, res, timing);
+    }
 
-    const geminiData: GeminiResponse = await geminiResponse.json();
+    // Make request to Gemini API
+    const gemini = await callGemini(apiKey, geminiRequest);
+    timing.geminiMs = gemini.durationMs;
+    setServerTiming(res, timing);
 
     // Handle Gemini API errors
-    if (!geminiResponse.ok || geminiData.error) {
-      const errorMessage = geminiData.error?.message || `API request failed with status ${geminiResponse.status}`;
+    if (!gemini.ok || gemini.data.error) {
+      const errorMessage = gemini.data.error?.message || `API request failed with status ${gemini.status}`;
       console.error('Gemini API Error:', errorMessage);
       
-      return res.status(geminiResponse.status || 500).json({
+      return res.status(gemini.status || 500).json({
         error: errorMessage
       });
     }
 
     // Extract message from response
-    const message = geminiData.candidates?.[0]?.content?.parts?.[0]?.text || "I'm doing great! 🌿";
+    const message = gemini.data.candidates?.[0]?.content?.parts?.[0]?.text || FALLBACK_MESSAGE;
 
     // Return success response
     return res.status(200).json({
-      message: message
+      message: message,
+      usage: toTokenUsage(gemini.data.usageMetadata)
     });
 
   } catch (error) {
     console.error('Error generating message:', error);
+    if (!res.headersSent) {
+      setServerTiming(res, timing);
+    }
     return res.status(500).json({
       error: error instanceof Error ? error.message : 'Internal server error'
     });
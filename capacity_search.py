@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Automatic search for the endpoint's maximum sustainable load.
+
+The harness holds one load level (a request rate or a concurrency) at a time
+and records every request into a CapacityStep. Each step is checked against
+an SLO such as "p99 < 3s and fewer than 1% errors". CapacitySearch chooses
+the next level:
+
+    step      start, start + step, start + 2*step, ... until the SLO breaks
+    binary    double from start until the SLO breaks, then bisect between the
+              last passing and first failing level until they are within
+              the resolution (10% by default)
+
+find_knee() locates the knee of the throughput/latency curve: the step
+where latency stops growing slowly and starts climbing steeply. A curve
+whose latency rises less than MIN_KNEE_RISE times overall has no knee.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from harness_metrics import LatencyHistogram
+from soak_monitor import parse_duration
+
+DEFAULT_SLO = "p99<3s,errors<1%"
+DEFAULT_STRATEGY = "binary"
+STRATEGIES = ["step", "binary"]
+DEFAULT_HOLD = 30.0  # seconds per level
+DEFAULT_FACTOR = 2.0
+DEFAULT_RESOLUTION = 0.1
+MAX_STEPS = 20
+# A rate level only counts as sustained if this share of the target rate was achieved
+MIN_RATE_ACHIEVED = 0.9
+# Latency must grow at least this many times across the levels for a knee to mean anything
+MIN_KNEE_RISE = 1.5
+
+class SLO:
+    """Latency percentile and error-rate limits, e.g. parsed from 'p99<3s,errors<1%'"""
+    def __init__(self, latency: Optional[Dict[float, float]] = None, max_error_rate: Optional[float] = None):
+        # Percentile -> maximum latency in seconds
+        self.latency = latency or {}
+        self.max_error_rate = max_error_rate
+
+    @classmethod
+    def parse(cls, spec: str) -> "SLO":
+        slo = cls()
+        for part in spec.replace(" ", "").lower().split(","):
+            if not part:
+                continue
+            name, _, limit = part.partition("<")
+            try:
+                if name == "errors":
+                    slo.max_error_rate = float(limit[:-1]) / 100 if limit.endswith("%") else float(limit)
+                elif name.startswith("p"):
+                    percentile = float(name[1:])
+                    if not 0 < percentile < 100:
+                        raise ValueError(part)
+                    slo.latency[percentile] = float(limit[:-2]) / 1000 if limit.endswith("ms") else parse_duration(limit)
+                else:
+                    raise ValueError(part)
+            except ValueError:
+                raise ValueError(f"Invalid SLO term '{part}' (expected e.g. p99<3s, p50<800ms or errors<1%)")
+        if not slo.latency and slo.max_error_rate is None:
+            raise ValueError(f"Invalid SLO '{spec}'")
+        return slo
+
+    def violations(self, step: "CapacityStep") -> List[str]:
+        """Why `step` breaks this SLO (empty if it meets it)"""
+        problems = []
+        for percentile, limit in sorted(self.latency.items()):
+            value = step.histogram.percentile(percentile)
+            if value > limit:
+                problems.append(f"p{percentile:g} {value:.2f}s > {limit:g}s")
+        if self.max_error_rate is not None and step.error_rate > self.max_error_rate:
+            problems.append(f"errors {step.error_rate:.1%} > {self.max_error_rate:.1%}")
+        return problems
+
+    def __str__(self) -> str:
+        terms = [f"p{percentile:g} < {limit:g}s" for percentile, limit in sorted(self.latency.items())]
+        if self.max_error_rate is not None:
+            terms.append(f"errors < {self.max_error_rate:.1%}")
+        return ", ".join(terms)
+
+class CapacityStep:
+    """Requests sent while one load level was held"""
+    def __init__(self, level: float, target_rate: Optional[float] = None):
+        self.level = level
+        self.target_rate = target_rate
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.failures = 0
+        # Set by the caller: how long the level was held, and how long its requests took to finish
+        self.hold = 0.0
+        self.elapsed = 0.0
+        self.violations: List[str] = []
+
+    def record(self, latency: float, success: bool):
+        self.requests += 1
+        if success:
+            # Latency percentiles are of successful requests; failures count against the error rate
+            self.histogram.record(latency)
+        else:
+            self.failures += 1
+
+    @property
+    def error_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def send_rate(self) -> float:
+        """Requests started per second while the level was held"""
+        return self.requests / self.hold if self.hold > 0 else self.throughput
+
+    @property
+    def goodput(self) -> float:
+        """Successful requests per second"""
+        return (self.requests - self.failures) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def check(self, slo: SLO) -> bool:
+        """Check the step against `slo` (and, for rate levels, that the rate was achieved); True if it passed"""
+        self.violations = slo.violations(self)
+        if not self.requests:
+            self.violations.append("no requests completed")
+        elif self.target_rate and self.send_rate < MIN_RATE_ACHIEVED * self.target_rate:
+            self.violations.append(f"only {self.send_rate:.2f} of {self.target_rate:g} req/s sent")
+        return not self.violations
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+class CapacitySearch:
+    """Chooses the load level to hold next, from the results of the levels held so far"""
+    def __init__(self, strategy: str = DEFAULT_STRATEGY, start: float = 1.0, step: Optional[float] = None,
+                 factor: float = DEFAULT_FACTOR, resolution: float = DEFAULT_RESOLUTION,
+                 integer: bool = False, max_level: Optional[float] = None, max_steps: int = MAX_STEPS):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy '{strategy}' (expected one of: {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.start = start
+        self.step = step or start
+        self.factor = factor
+        self.resolution = resolution
+        # Concurrency levels are whole numbers
+        self.integer = integer
+        self.max_level = max_level
+        self.max_steps = max_steps
+        self.highest_pass: Optional[float] = None
+        self.lowest_fail: Optional[float] = None
+        self.steps_held = 0
+
+    def _level(self, value: float) -> float:
+        return float(max(1, round(value))) if self.integer else round(value, 3)
+
+    def next_level(self) -> Optional[float]:
+        """The next level to hold, or None when the search is done"""
+        if self.steps_held >= self.max_steps:
+            return None
+        if self.lowest_fail is None:
+            # Still ramping up
+            if self.highest_pass is None:
+                level = self.start
+            elif self.strategy == "step":
+                level = self.highest_pass + self.step
+            else:
+                level = self.highest_pass * self.factor
+            level = self._level(level)
+            if self.max_level is not None and level > self.max_level:
+                level = self._level(self.max_level)
+                if self.highest_pass is not None and level <= self.highest_pass:
+                    return None
+            return level
+        if self.strategy == "step" or self.highest_pass is None:
+            return None
+        # Bisect until the bracket is narrower than the resolution
+        if self.lowest_fail - self.highest_pass <= max(self.resolution * self.highest_pass, 1 if self.integer else 0):
+            return None
+        level = self._level((self.highest_pass + self.lowest_fail) / 2)
+        if level <= self.highest_pass or level >= self.lowest_fail:
+            return None
+        return level
+
+    def record(self, level: float, passed: bool):
+        self.steps_held += 1
+        if passed:
+            self.highest_pass = level if self.highest_pass is None else max(self.highest_pass, level)
+        else:
+            self.lowest_fail = level if self.lowest_fail is None else min(self.lowest_fail, level)
+
+def find_knee(steps: List[CapacityStep], percentile: float = 99.0, min_rise: float = MIN_KNEE_RISE) -> Optional[CapacityStep]:
+    """The step at the knee of the throughput/latency curve.
+
+    Steps with successful requests are sorted by throughput and both axes are
+    normalized to 0-1; the knee is the step furthest below the straight line
+    from the first to the last step (where latency starts to bend upward).
+    Needs at least three steps, and the highest latency to be at least
+    `min_rise` times the lowest; normalizing would otherwise turn jitter on
+    a flat curve into a knee.
+    """
+    points = sorted((step for step in steps if step.histogram.count), key=lambda step: step.goodput)
+    if len(points) < 3:
+        return None
+    xs = [step.goodput for step in points]
+    ys = [step.histogram.percentile(percentile) for step in points]
+    x_range, y_range = xs[-1] - xs[0], max(ys) - min(ys)
+    if x_range <= 0 or y_range <= 0 or max(ys) < min_rise * min(ys):
+        return None
+    normalized: List[Tuple[float, float]] = [((x - xs[0]) / x_range, (y - min(ys)) / y_range) for x, y in zip(xs, ys)]
+    (x0, y0), (x1, y1) = normalized[0], normalized[-1]
+    # Signed distance below the chord; the largest marks the bend
+    length = math.hypot(x1 - x0, y1 - y0)
+    distances = [((x1 - x0) * (y0 - y) - (x0 - x) * (y1 - y0)) / length for x, y in normalized]
+    best = max(range(1, len(points) - 1), key=lambda i: distances[i])
+    return points[best] if distances[best] > 0 else None
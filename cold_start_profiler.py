@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Cold-start analysis for the serverless message endpoint.
+
+The harness feeds ColdStartProfile two kinds of measurements:
+
+    idle gaps   a probe request sent after the endpoint sat idle for a
+                chosen time, immediately followed by a warm request that
+                lands on the instance the probe just woke up
+    rates       a run of requests at a fixed rate, to see how often cold
+                starts happen at that traffic level (including instances
+                added when requests overlap)
+
+A request counts as cold when the backend's Server-Timing header has a
+`cold` metric. Backends that don't send Server-Timing are judged by server
+time (TTFB) instead: cold if it is several times the median warm request.
+The cold-start penalty is the probe's server time minus its warm follow-up.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from harness_metrics import LatencyHistogram, median
+
+# Without Server-Timing, a request this many times the warm median counts as cold
+DEFAULT_COLD_FACTOR = 2.0
+
+def server_time(result) -> float:
+    """Time to first byte, which leaves out connection setup on the client side"""
+    return result.timings.get("ttfb", result.duration)
+
+class ColdStartProfile:
+    """Cold and warm invocations collected by the harness's --cold-start mode.
+
+    Results are TestResults (anything with duration, success, timings,
+    server_timing and instance attributes).
+    """
+    def __init__(self, cold_factor: float = DEFAULT_COLD_FACTOR):
+        self.cold_factor = cold_factor
+        # Idle gap in seconds -> (probe, warm follow-up) pairs
+        self.gap_pairs: Dict[float, List[Tuple[object, object]]] = {}
+        # Request rate -> results of the run at that rate
+        self.rate_results: Dict[float, List] = {}
+
+    def add_gap_pair(self, gap: float, probe, warm):
+        if probe.success and warm.success:
+            self.gap_pairs.setdefault(gap, []).append((probe, warm))
+
+    def add_rate_results(self, rate: float, results: List):
+        self.rate_results[rate] = [result for result in results if result.success]
+
+    @property
+    def has_server_timing(self) -> bool:
+        """True if the backend reports Server-Timing (so cold starts are known, not guessed)"""
+        return any(probe.server_timing for pairs in self.gap_pairs.values() for probe, _ in pairs) or \
+            any(result.server_timing for results in self.rate_results.values() for result in results)
+
+    def warm_reference(self) -> float:
+        """Median server time of the warm follow-up requests"""
+        warm = [server_time(warm) for pairs in self.gap_pairs.values() for _, warm in pairs]
+        return median(warm) if warm else 0.0
+
+    def is_cold(self, result) -> bool:
+        if result.server_timing:
+            return "cold" in result.server_timing
+        reference = self.warm_reference()
+        return reference > 0 and server_time(result) >= self.cold_factor * reference
+
+    def gap_rows(self) -> List[Dict]:
+        """Per idle gap: probes sent, how many were cold, and the penalty they paid"""
+        rows = []
+        for gap in sorted(self.gap_pairs):
+            pairs = self.gap_pairs[gap]
+            penalties = LatencyHistogram()
+            cold = 0
+            for probe, warm in pairs:
+                if self.is_cold(probe):
+                    cold += 1
+                    penalties.record(max(0.0, server_time(probe) - server_time(warm)))
+            rows.append({"gap": gap, "probes": len(pairs), "cold": cold, "penalty": penalties})
+        return rows
+
+    def penalty_histogram(self) -> LatencyHistogram:
+        """Cold-start penalty of every cold probe, across all gaps"""
+        histogram = LatencyHistogram()
+        for row in self.gap_rows():
+            histogram.merge(row["penalty"])
+        return histogram
+
+    def reported_cold_starts(self) -> LatencyHistogram:
+        """Cold-start cost the backend itself reported (Server-Timing `cold`), across all requests"""
+        histogram = LatencyHistogram()
+        for result in self._all_results():
+            if "cold" in result.server_timing:
+                histogram.record(result.server_timing["cold"])
+        return histogram
+
+    def rate_rows(self) -> List[Dict]:
+        """Per request rate: requests, how many were cold, and the instances that served them"""
+        rows = []
+        for rate in sorted(self.rate_results):
+            results = self.rate_results[rate]
+            instances = {result.instance for result in results if result.instance}
+            rows.append({
+                "rate": rate,
+                "requests": len(results),
+                "cold": sum(1 for result in results if self.is_cold(result)),
+                "instances": len(instances) if instances else None
+            })
+        return rows
+
+    def time_split(self) -> Dict[str, Dict[str, float]]:
+        """Mean time outside the handler, in the handler, and waiting on Gemini, for cold and warm requests.
+
+        Only requests with Server-Timing handler and gemini metrics count.
+        "outside" is network, routing and (for cold requests) instance start-up.
+        """
+        split: Dict[str, Dict[str, float]] = {}
+        for result in self._all_results():
+            timing = result.server_timing
+            if "handler" not in timing or "gemini" not in timing:
+                continue
+            group = split.setdefault("cold" if self.is_cold(result) else "warm",
+                                     {"count": 0, "total": 0.0, "outside": 0.0, "handler": 0.0, "gemini": 0.0})
+            group["count"] += 1
+            group["total"] += result.duration
+            group["outside"] += max(0.0, result.duration - timing["handler"])
+            group["handler"] += max(0.0, timing["handler"] - timing["gemini"])
+            group["gemini"] += timing["gemini"]
+        for group in split.values():
+            for key in ("total", "outside", "handler", "gemini"):
+                group[key] /= group["count"]
+        return split
+
+    def keep_warm_interval(self) -> Optional[float]:
+        """Longest idle gap that never produced a cold start, if a longer one did"""
+        rows = self.gap_rows()
+        warm_gaps = [row["gap"] for row in rows if row["probes"] and not row["cold"]]
+        cold_gaps = [row["gap"] for row in rows if row["cold"]]
+        if not cold_gaps:
+            return None
+        safe = [gap for gap in warm_gaps if gap < min(cold_gaps)]
+        return max(safe) if safe else None
+
+    def _all_results(self) -> List:
+        results = [result for pairs in self.gap_pairs.values() for pair in pairs for result in pair]
+        results.extend(result for results in self.rate_results.values() for result in results)
+        return results
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Latency metrics for the RootMate test scripts.
+
+LatencyHistogram is an HDR-style log-linear histogram: values are bucketed
+with a bounded relative error, so percentiles stay accurate for any number
+of samples while memory only grows with the dynamic range of the data.
+
+mann_whitney_p and error_rate_p are the significance tests used to compare
+a run against a saved baseline.
+
+MemoryProfile measures how much heap each in-flight request costs, with
+tracemalloc.
+"""
+
+import math
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+# Percentiles reported for every histogram
+REPORT_PERCENTILES = [50.0, 90.0, 99.0, 99.9]
+
+class LatencyHistogram:
+    """Log-linear latency histogram with microsecond resolution.
+
+    Each power-of-two range of microsecond values is split into
+    2**(significant_bits - 1) linear sub-buckets, giving a relative error
+    below 2**-(significant_bits - 1) (under 1% for the default of 8).
+    """
+    def __init__(self, significant_bits: int = 8):
+        self.significant_bits = significant_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _bucket(self, micros: int) -> int:
+        """Lowest microsecond value of the bucket that holds `micros`"""
+        shift = micros.bit_length() - self.significant_bits
+        if shift <= 0:
+            return micros
+        return (micros >> shift) << shift
+
+    def _bucket_upper(self, bucket: int) -> int:
+        """Highest microsecond value that falls into `bucket`"""
+        shift = bucket.bit_length() - self.significant_bits
+        if shift <= 0:
+            return bucket
+        return bucket + (1 << shift) - 1
+
+    def record(self, seconds: float):
+        """Record one latency value in seconds"""
+        micros = max(0, int(round(seconds * 1_000_000)))
+        bucket = self._bucket(micros)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add all values recorded in another histogram"""
+        for bucket, count in other.counts.items():
+            # Re-bucket in case the other histogram uses a different precision
+            target = self._bucket(bucket)
+            self.counts[target] = self.counts.get(target, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> float:
+        """Value in seconds at or below which `percentile`% of values fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100.0 * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                # Report the bucket's upper edge, clamped to the observed range
+                value = self._bucket_upper(bucket) / 1_000_000
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, percentiles: List[float] = REPORT_PERCENTILES) -> Dict[str, float]:
+        """Count, mean, max and the requested percentiles as a flat dict"""
+        summary = {"count": self.count, "mean": self.mean, "max": self.max or 0.0}
+        for p in percentiles:
+            summary[f"p{p:g}"] = self.percentile(p)
+        return summary
+
+def median(values: List[float]) -> float:
+    """Middle value of a list (mean of the two middle values for an even count)"""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+def _normal_sf(z: float) -> float:
+    """P(Z > z) for a standard normal Z"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def mann_whitney_p(baseline: List[float], current: List[float]) -> float:
+    """One-sided p-value that `current` values tend to be larger than `baseline`.
+
+    Mann-Whitney U test with the normal approximation (tie- and
+    continuity-corrected). It compares ranks rather than means, so a few
+    extreme outliers can't manufacture a regression on their own.
+    """
+    n1, n2 = len(baseline), len(current)
+    if not n1 or not n2:
+        return 1.0
+    combined = sorted([(value, 0) for value in baseline] + [(value, 1) for value in current])
+    n = n1 + n2
+
+    rank_sum = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # Tied values share the average of the ranks they span (ranks are 1-based)
+        average_rank = (i + j) / 2 + 1
+        ties = j - i + 1
+        rank_sum += average_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 1)
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u = rank_sum - n2 * (n2 + 1) / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return _normal_sf(z)
+
+def error_rate_p(baseline_failures: int, baseline_total: int, current_failures: int, current_total: int) -> float:
+    """One-sided p-value that the current error rate is higher (two-proportion z-test)"""
+    if not baseline_total or not current_total:
+        return 1.0
+    pooled = (baseline_failures + current_failures) / (baseline_total + current_total)
+    if pooled <= 0 or pooled >= 1:
+        return 1.0
+    standard_error = math.sqrt(pooled * (1 - pooled) * (1 / baseline_total + 1 / current_total))
+    z = (current_failures / current_total - baseline_failures / baseline_total) / standard_error
+    return _normal_sf(z)
+
+class MemoryProfile:
+    """Peak heap growth while requests are in flight, per in-flight request.
+
+    Traces allocations with tracemalloc from start() on; the peak above the
+    level at start(), divided by the most requests that were in flight at
+    once, is what each concurrent request costs. Tracing slows allocation
+    down, so it is only enabled on request.
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.baseline = 0
+        self._lock = threading.Lock()
+        if enabled:
+            tracemalloc.start()
+            self.baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+    def enter(self):
+        """A request was sent"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def exit(self):
+        """A request finished (and its response was handled)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.in_flight -= 1
+
+    def summary(self) -> Dict[str, float]:
+        """Peak heap growth in bytes, the most requests in flight, and bytes per in-flight request"""
+        if not self.enabled:
+            return {}
+        current, peak = tracemalloc.get_traced_memory()
+        growth = max(0, peak - self.baseline)
+        return {
+            "peak": growth,
+            "current": max(0, current - self.baseline),
+            "in_flight": self.peak_in_flight,
+            "per_request": growth / self.peak_in_flight if self.peak_in_flight else 0.0
+        }
+
+_memory_profile = MemoryProfile()
+
+def get_memory_profile() -> MemoryProfile:
+    """Return the process's memory profile (disabled unless configured)"""
+    return _memory_profile
+
+def configure_memory_profile(enabled: bool = False) -> MemoryProfile:
+    """Replace the process's memory profile, starting tracemalloc if enabled"""
+    global _memory_profile
+    if _memory_profile.enabled:
+        tracemalloc.stop()
+    _memory_profile = MemoryProfile(enabled)
+    return _memory_profile
+
+def format_bytes(count: float) -> str:
+    """Short form of a byte count for reports, e.g. 512 B, 14.2 KiB or 3.1 MiB"""
+    if count < 1024:
+        return f"{count:.0f} B"
+    if count < 1024 * 1024:
+        return f"{count / 1024:.1f} KiB"
+    return f"{count / (1024 * 1024):.1f} MiB"
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Profiling hooks for measuring what the harness itself costs.
+
+Two profilers cover every thread of a run (load tests send from a thread
+pool, which cProfile alone would miss):
+
+    sample     a background thread that records every thread's stack
+               (sys._current_frames) every few milliseconds, written as
+               folded stacks ("thread;file:function;... count" lines), the
+               input of flamegraph.pl, speedscope and most flame graph tools
+    cprofile   cProfile in every thread started while it runs, merged into
+               one pstats file (snakeviz, gprof2dot, flameprof)
+
+Both report the functions that took the most time, leaving out time spent
+blocked on sockets, sleeps and locks, which is waiting rather than harness
+overhead, and the threads of an in-process mock server. OutputTimer counts
+the time spent printing to the terminal.
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+PROFILERS = ["sample", "cprofile"]
+DEFAULT_PROFILER = "sample"
+DEFAULT_PROFILE_FILES = {"sample": "harness_profile.folded", "cprofile": "harness_profile.pstats"}
+DEFAULT_SAMPLE_INTERVAL = 0.005  # seconds
+
+# Innermost frames of a thread that is blocked, not running harness code
+WAITING_FRAMES = {
+    "threading.py:wait", "threading.py:_wait_for_tstate_lock", "queue.py:get", "thread.py:_worker",
+    "socket.py:readinto", "ssl.py:read", "ssl.py:recv_into", "ssl.py:do_handshake", "socket.py:create_connection",
+    "selectors.py:select", "base_events.py:_run_once", "connection.py:poll", "connection.py:_poll",
+}
+# Frames (and files) of threads serving an in-process mock server rather than running the harness
+SERVER_FRAMES = {"socketserver.py:serve_forever", "socketserver.py:process_request_thread"}
+SERVER_FILES = ("mock_server.py", "socketserver.py", "server.py")
+# Built-ins cProfile times while they block
+WAITING_BUILTINS = ("acquire", "sleep", "recv", "select", "poll", "_ssl._SSLSocket", "_queue.SimpleQueue", "connect", "getaddrinfo", "sendall", "wait")
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def _thread_group(name: str) -> str:
+    """Pool threads share a name up to their index (ThreadPoolExecutor-0_3 -> ThreadPoolExecutor)"""
+    return name.split("-", 1)[0] if name.startswith(("ThreadPoolExecutor", "Thread")) else name
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval"""
+    kind = "sample"
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        # Root-first stack -> number of samples
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        # Time the sampler itself spent taking samples
+        self.sampling_time = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="harness-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._start
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if SERVER_FRAMES.intersection(stack):
+                    continue
+                stack.append(_thread_group(names.get(ident, "thread")))
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            self.sampling_time += time.perf_counter() - started
+
+    def write(self, path: str):
+        """Write folded stacks for a flame graph"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def busy_share(self) -> float:
+        """Share of thread samples that were running code rather than waiting"""
+        total = sum(self.stacks.values())
+        busy = sum(count for stack, count in self.stacks.items() if stack[-1] not in WAITING_FRAMES)
+        return busy / total if total else 0.0
+
+    def top_functions(self, count: int = 10) -> List[Tuple[str, float]]:
+        """Functions most often running (innermost frame, waits left out), with their seconds of thread time"""
+        own: Dict[str, int] = {}
+        for stack, samples in self.stacks.items():
+            if stack[-1] not in WAITING_FRAMES:
+                own[stack[-1]] = own.get(stack[-1], 0) + samples
+        ranked = sorted(own.items(), key=lambda item: -item[1])[:count]
+        return [(name, samples * self.interval) for name, samples in ranked]
+
+    def overhead_note(self) -> str:
+        cpu_share = self.sampling_time / self.elapsed if self.elapsed > 0 else 0.0
+        return (f"{self.samples:,} samples every {self.interval * 1000:g}ms; sampling took {cpu_share:.1%} of the run "
+                f"({self.busy_share():.0%} of thread samples were running code, the rest waiting)")
+
+class TracingProfiler:
+    """cProfile in the calling thread and in every thread started while it runs"""
+    kind = "cprofile"
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self.elapsed = 0.0
+        self._start = 0.0
+        # From 3.12 cProfile runs on sys.monitoring, which already sees every thread (and allows one profiler)
+        self._per_thread = sys.version_info < (3, 12)
+
+    def _start_thread(self, frame, event, arg):
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        self._start = time.perf_counter()
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        if self._per_thread:
+            threading.setprofile(self._start_thread)
+        profile.enable()
+
+    def stop(self):
+        self._profiles[0].disable()
+        if self._per_thread:
+            threading.setprofile(None)
+        self.elapsed = time.perf_counter() - self._start
+
+    def stats(self) -> pstats.Stats:
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def write(self, path: str):
+        """Write the merged pstats file"""
+        self.stats().dump_stats(path)
+
+    def top_functions(self, count: int = 10) -> List[Tuple[str, float]]:
+        """Functions with the most own time (blocking built-ins left out), in seconds"""
+        ranked = []
+        for (filename, _, function), (_, _, own_time, _, _) in self.stats().stats.items():
+            if filename == "~" and any(name in function for name in WAITING_BUILTINS):
+                continue
+            if os.path.basename(filename) in SERVER_FILES:
+                continue
+            label = function if filename == "~" else f"{os.path.basename(filename)}:{function}"
+            ranked.append((label, own_time))
+        return sorted(ranked, key=lambda item: -item[1])[:count]
+
+    def overhead_note(self) -> str:
+        return f"{len(self._profiles)} threads traced; tracing slows Python code down, so compare overhead, not latency"
+
+def create_profiler(kind: str = DEFAULT_PROFILER):
+    """A SamplingProfiler or TracingProfiler by name"""
+    if kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{kind}' (expected one of: {', '.join(PROFILERS)})")
+    return SamplingProfiler() if kind == "sample" else TracingProfiler()
+
+class OutputTimer:
+    """Time spent writing report lines to the terminal"""
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.total += seconds
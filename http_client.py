@@ -0,0 +1,799 @@
+#!/usr/bin/env python3
+"""
+HTTP client used by the RootMate test scripts.
+
+Requests go through http.client directly instead of urllib so that every
+phase of a request can be timed separately: DNS lookup, TCP connect, TLS
+handshake, time-to-first-byte and body read.
+
+Connections are kept alive and pooled per host by default, and all HTTPS
+connections share one SSL context, so measured latency matches what a warm
+client sees. Call configure_client(pooling=False) to open a fresh connection
+for every request instead.
+
+Requests can name the JSON paths they need (`extract`). Successful bodies
+are then read in chunks into a pooled buffer, which is only held while a
+body is being read and is reused by the next response, and parsed
+incrementally by JSONExtractor. A response never keeps more than the values
+it asked for plus an unfinished token, and TimedResponse.json() returns the
+pruned document.
+
+AsyncHTTPClient offers the same timed requests on asyncio streams, for
+callers that keep many requests in flight from a single event loop.
+"""
+
+import json
+import asyncio
+import select
+import socket
+import ssl
+import threading
+import time
+import http.client
+import urllib.parse
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from json_extract import JSONExtractor, JSONPath
+
+# Request phases recorded in TimedResponse.timings, in the order they happen
+TIMING_PHASES = ["dns", "connect", "tls", "ttfb", "body"]
+
+# Idle keep-alive connections kept per host
+DEFAULT_MAX_IDLE_PER_HOST = 16
+
+# Size of the pooled buffers response bodies are read into
+READ_BUFFER_SIZE = 16 * 1024
+
+# Errors that mean a reused keep-alive connection was closed by the server
+STALE_CONNECTION_ERRORS = (
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+class StaleConnectionError(Exception):
+    """A reused connection failed before the request reached the server"""
+
+class ConnectTimeoutError(ConnectionError):
+    """Timed out connecting, so the request was never sent (unlike a timeout waiting for the response)"""
+
+def create_ssl_context() -> ssl.SSLContext:
+    """Create SSL context that doesn't verify certificates (for testing)"""
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+_shared_ssl_context: Optional[ssl.SSLContext] = None
+_shared_ssl_context_lock = threading.Lock()
+_ssl_context_seconds: Optional[float] = None
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Return the SSL context shared by every HTTPS connection"""
+    global _shared_ssl_context, _ssl_context_seconds
+    with _shared_ssl_context_lock:
+        if _shared_ssl_context is None:
+            start = time.perf_counter()
+            _shared_ssl_context = create_ssl_context()
+            _ssl_context_seconds = time.perf_counter() - start
+        return _shared_ssl_context
+
+def ssl_context_time() -> Optional[float]:
+    """Seconds it took to create the shared SSL context (None until an HTTPS request needed it)"""
+    return _ssl_context_seconds
+
+def _open_socket(host: str, port: int, timeout, source_address, timings: Dict[str, float]) -> socket.socket:
+    """Resolve and connect to host:port, recording DNS and connect time"""
+    start = time.perf_counter()
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    resolved = time.perf_counter()
+    timings["dns"] = resolved - start
+
+    last_error: Optional[OSError] = None
+    for family, socktype, proto, _, address in addresses:
+        sock = socket.socket(family, socktype, proto)
+        try:
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            last_error = e
+            continue
+
+        timings["connect"] = time.perf_counter() - resolved
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    raise last_error or OSError(f"Could not resolve {host}:{port}")
+
+class TimedHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection that records DNS and TCP connect timings"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings: Dict[str, float] = {}
+
+    def connect(self):
+        self.sock = _open_socket(self.host, self.port, self.timeout, self.source_address, self.timings)
+
+class TimedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection that records DNS, TCP connect and TLS handshake timings"""
+    def __init__(self, *args, tls_session: Optional[ssl.SSLSession] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings: Dict[str, float] = {}
+        self.tls_session = tls_session
+
+    def connect(self):
+        sock = _open_socket(self.host, self.port, self.timeout, self.source_address, self.timings)
+        start = time.perf_counter()
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host, session=self.tls_session)
+        self.timings["tls"] = time.perf_counter() - start
+
+class BufferPool:
+    """Reusable read buffers, one per body being read at the moment.
+
+    Most in-flight requests are waiting for the server rather than reading,
+    so the pool stays far smaller than the number of requests in flight.
+    """
+    def __init__(self, size: int = READ_BUFFER_SIZE):
+        self.size = size
+        self.created = 0
+        self._free: List[memoryview] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> memoryview:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.created += 1
+        return memoryview(bytearray(self.size))
+
+    def release(self, buffer: memoryview):
+        with self._lock:
+            self._free.append(buffer)
+
+_read_buffers = BufferPool()
+
+def get_buffer_pool() -> BufferPool:
+    """Return the pool body chunks are read into"""
+    return _read_buffers
+
+class TimedResponse:
+    """Status, headers, body and phase timings of a completed request.
+
+    Requests sent on a reused keep-alive connection have no dns/connect/tls
+    timings and `reused` set to True. When the body was parsed incrementally
+    (see HTTPClient.request's `extract`) `body` is empty, `size` is still the
+    body's length and json() returns the pruned document. `memory` is the
+    most body bytes the response held at once.
+    """
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes,
+                 timings: Dict[str, float], total: float, reused: bool = False,
+                 size: Optional[int] = None, memory: Optional[int] = None):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.timings = timings
+        self.total = total
+        self.reused = reused
+        self.size = len(body) if size is None else size
+        self.memory = len(body) if memory is None else memory
+        self.extracted = False
+        self._document: Any = None
+        self._extract_error: Optional[ValueError] = None
+
+    def text(self) -> str:
+        """Decode the body as UTF-8"""
+        return self.body.decode('utf-8')
+
+    def json(self):
+        """Parse the body as JSON (or return the document extracted while it was read)"""
+        if self.extracted:
+            if self._extract_error is not None:
+                raise self._extract_error
+            return self._document
+        return json.loads(self.text())
+
+class _BodyExtraction:
+    """Feeds a body to a JSONExtractor, keeping a parse error for TimedResponse.json() to raise"""
+    def __init__(self, paths: Iterable[JSONPath]):
+        self.extractor = JSONExtractor(paths)
+        self.error: Optional[ValueError] = None
+
+    def feed(self, chunk):
+        # After a parse error the rest of the body is still drained, so the connection can be reused
+        if self.error is None:
+            try:
+                self.extractor.feed(chunk)
+            except ValueError as e:
+                self.error = e
+
+    def response(self, status: int, reason: str, headers: Dict[str, str], timings: Dict[str, float],
+                 total: float, reused: bool) -> TimedResponse:
+        response = TimedResponse(status, reason, headers, b"", timings, total, reused,
+                                 size=self.extractor.bytes_fed, memory=self.extractor.peak_buffered)
+        response.extracted = True
+        try:
+            response._document = self.extractor.close() if self.error is None else None
+        except ValueError as e:
+            self.error = e
+        response._extract_error = self.error
+        return response
+
+PoolKey = Tuple[str, str, Optional[int]]
+
+def _readable(sock: socket.socket) -> bool:
+    """True if a socket has data, EOF or an error waiting, without blocking.
+
+    poll() is used where available: select() can't take descriptors at or
+    above FD_SETSIZE (1024), which a high-concurrency run easily reaches.
+    """
+    if hasattr(select, "poll"):
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        return bool(poller.poll(0))
+    readable, _, _ = select.select([sock], [], [], 0)
+    return bool(readable)
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle connection was closed by the server or broke.
+
+    An idle keep-alive socket normally has nothing to read. When it does, a
+    non-blocking peek at the raw socket tells EOF (dropped) from bytes sent
+    unprompted. On a plain connection those would be read as the next
+    response, so it can't be reused; on TLS they are typically a session
+    ticket, and the connection is fine. (A reused connection that fails
+    anyway is retried on a new one, see StaleConnectionError.)
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        if not _readable(sock):
+            return False
+        # socket.socket.recv reads the raw bytes, also under an SSLSocket
+        data = socket.socket.recv(sock, 1, socket.MSG_PEEK | getattr(socket, "MSG_DONTWAIT", 0))
+    except BlockingIOError:
+        return False
+    except (OSError, ValueError):
+        # Closed (fileno -1) or a real socket error
+        return True
+    return not data or not isinstance(sock, ssl.SSLSocket)
+
+class ConnectionPool:
+    """Idle keep-alive connections grouped by (scheme, host, port).
+
+    Connections are handed out most-recently-used first so that the warmest
+    connection is reused. TLS sessions are remembered per host so that new
+    connections can resume them instead of doing a full handshake.
+    """
+    def __init__(self, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST):
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[PoolKey, List[http.client.HTTPConnection]] = {}
+        self._tls_sessions: Dict[PoolKey, ssl.SSLSession] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: PoolKey) -> Optional[http.client.HTTPConnection]:
+        """Take a live idle connection for `key`, or None if there isn't one"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            if conn is None or not _is_dropped(conn):
+                return conn
+            conn.close()
+
+    def tls_session(self, key: PoolKey) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            return self._tls_sessions.get(key)
+
+    def release(self, key: PoolKey, conn: http.client.HTTPConnection):
+        """Return a connection whose response has been fully read"""
+        session = getattr(conn.sock, "session", None)
+        with self._lock:
+            if session is not None:
+                self._tls_sessions[key] = session
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+            self._tls_sessions.clear()
+        for conn in connections:
+            conn.close()
+
+class StreamingResponse:
+    """Response whose body is read incrementally, e.g. server-sent events.
+
+    The connection goes back to the pool once the body has been read to the
+    end; close() (or leaving a `with` block) early drops it instead. The
+    `body` timing and `total` are filled in when the body is exhausted.
+    """
+    def __init__(self, client: "HTTPClient", key: PoolKey, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse, timings: Dict[str, float], start: float, reused: bool):
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = {name.lower(): value for name, value in response.getheaders()}
+        self.timings = timings
+        self.reused = reused
+        self.total: Optional[float] = None
+        self.bytes_read = 0
+        self._client = client
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._response = response
+        self._start = start
+        self._first_byte = time.perf_counter()
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """Yield the body line by line as it arrives (line endings included)"""
+        while True:
+            try:
+                line = self._response.readline()
+            except BaseException:
+                self.close()
+                raise
+            if not line:
+                break
+            self.bytes_read += len(line)
+            yield line
+        self._finish()
+
+    def iter_chunks(self) -> Iterator[memoryview]:
+        """Yield the body in chunks read into a pooled buffer.
+
+        Each chunk is only valid until the next one is read (the buffer goes
+        back to the pool at the end); copy what you need to keep.
+        """
+        buffer = _read_buffers.acquire()
+        try:
+            while True:
+                try:
+                    count = self._response.readinto(buffer)
+                except BaseException:
+                    self.close()
+                    raise
+                if not count:
+                    break
+                self.bytes_read += count
+                yield buffer[:count]
+        finally:
+            _read_buffers.release(buffer)
+        self._finish()
+
+    def read(self) -> bytes:
+        """Read the rest of the body"""
+        try:
+            data = self._response.read()
+        except BaseException:
+            self.close()
+            raise
+        self.bytes_read += len(data)
+        self._finish()
+        return data
+
+    def _finish(self):
+        if self._conn is None:
+            return
+        end = time.perf_counter()
+        self.timings["body"] = end - self._first_byte
+        self.total = end - self._start
+        self._client._finish(self._key, self._conn, self._response)
+        self._conn = None
+
+    def close(self):
+        """Drop the connection if the body wasn't read to the end"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "StreamingResponse":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class HTTPClient:
+    """Sends timed requests, reusing pooled keep-alive connections when enabled.
+
+    With `incremental_json` off, requests that name `extract` paths read and
+    parse the whole body instead (to compare memory use).
+    """
+    def __init__(self, pooling: bool = True, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+                 incremental_json: bool = True):
+        self.pooling = pooling
+        self.incremental_json = incremental_json
+        self.pool = ConnectionPool(max_idle_per_host)
+
+    def _new_connection(self, key: PoolKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            session = self.pool.tls_session(key) if self.pooling else None
+            return TimedHTTPSConnection(host, port, timeout=timeout, context=get_ssl_context(), tls_session=session)
+        return TimedHTTPConnection(host, port, timeout=timeout)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0,
+        extract: Optional[Iterable[JSONPath]] = None
+    ) -> TimedResponse:
+        """Send a request, read the whole response and time each phase.
+
+        Unlike urllib, non-2xx responses are returned rather than raised;
+        callers check `status` themselves. With `extract`, a 200 response's
+        JSON body is parsed as it is read, keeping only those paths.
+        """
+        stream = self.stream(method, url, body=body, headers=headers, timeout=timeout)
+        if extract is not None and self.incremental_json and stream.status == 200:
+            extraction = _BodyExtraction(extract)
+            for chunk in stream.iter_chunks():
+                extraction.feed(chunk)
+            return extraction.response(stream.status, stream.reason, stream.headers, stream.timings, stream.total, stream.reused)
+        data = stream.read()
+        return TimedResponse(stream.status, stream.reason, stream.headers, data, stream.timings, stream.total, stream.reused)
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0
+    ) -> StreamingResponse:
+        """Send a request and return as soon as the response headers arrive"""
+        parsed = urllib.parse.urlsplit(url)
+        key: PoolKey = (parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+
+        conn = self.pool.acquire(key) if self.pooling else None
+        if conn is not None:
+            try:
+                return self._send(key, conn, True, method, path, body, headers, timeout)
+            except StaleConnectionError:
+                # The server closed the idle connection before we could send; retry once on a fresh one
+                pass
+
+        return self._send(key, self._new_connection(key, timeout), False, method, path, body, headers, timeout)
+
+    def _send(
+        self,
+        key: PoolKey,
+        conn: http.client.HTTPConnection,
+        reused: bool,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        timeout: float
+    ) -> StreamingResponse:
+        conn.timings = {}
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+        start = time.perf_counter()
+        try:
+            if conn.sock is None:
+                try:
+                    conn.connect()
+                except socket.timeout as e:
+                    raise ConnectTimeoutError(f"Timed out connecting to {conn.host}") from e
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+            except STALE_CONNECTION_ERRORS as e:
+                if reused:
+                    raise StaleConnectionError(str(e)) from e
+                raise
+            sent = time.perf_counter()
+            response = conn.getresponse()
+            first_byte = time.perf_counter()
+        except BaseException:
+            conn.close()
+            raise
+
+        # Reused and plain HTTP connections skip some phases, so only copy what was measured
+        timings = dict(conn.timings)
+        timings["ttfb"] = first_byte - sent
+        return StreamingResponse(self, key, conn, response, timings, start, reused)
+
+    def _finish(self, key: PoolKey, conn: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        """Pool or close a connection whose response has been fully read"""
+        if self.pooling and not response.will_close:
+            self.pool.release(key, conn)
+        else:
+            conn.close()
+
+    def close(self):
+        self.pool.close()
+
+_default_client = HTTPClient()
+
+def get_client() -> HTTPClient:
+    """Return the client used by timed_request"""
+    return _default_client
+
+def configure_client(pooling: bool = True, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+                     incremental_json: bool = True) -> HTTPClient:
+    """Replace the shared client, closing any connections held by the old one"""
+    global _default_client
+    old_client = _default_client
+    _default_client = HTTPClient(pooling=pooling, max_idle_per_host=max_idle_per_host, incremental_json=incremental_json)
+    old_client.close()
+    return _default_client
+
+def timed_request(
+    method: str,
+    url: str,
+    body: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+    extract: Optional[Iterable[JSONPath]] = None
+) -> TimedResponse:
+    """Send a request through the shared client and time each phase"""
+    return _default_client.request(method, url, body=body, headers=headers, timeout=timeout, extract=extract)
+
+def stream_request(
+    method: str,
+    url: str,
+    body: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0
+) -> StreamingResponse:
+    """Send a request through the shared client and return once headers arrive"""
+    return _default_client.stream(method, url, body=body, headers=headers, timeout=timeout)
+
+def iter_sse_data(lines: Iterator[bytes]) -> Iterator[str]:
+    """Yield the data payload of each server-sent event in a stream of lines"""
+    data: List[str] = []
+    for raw_line in lines:
+        line = raw_line.decode('utf-8').rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+        elif line.startswith("data:"):
+            value = line[5:]
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+def parse_server_timing(value: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """Metrics in a Server-Timing header, e.g. {'gemini': {'dur': '612.4'}, 'instance': {'desc': 'k3f9'}}"""
+    metrics: Dict[str, Dict[str, str]] = {}
+    for entry in (value or "").split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if not name:
+            continue
+        metrics[name] = {}
+        for param in params:
+            key, _, param_value = param.partition("=")
+            metrics[name][key.strip().lower()] = param_value.strip().strip('"')
+    return metrics
+
+class AsyncHTTPClient:
+    """Minimal HTTP/1.1 client on asyncio streams with per-host keep-alive pooling.
+
+    Responses are TimedResponse objects with the same phase timings as the
+    blocking client. Each request is bounded by its own timeout; a request
+    that times out closes its connection rather than returning it to the pool.
+    """
+    def __init__(self, pooling: bool = True, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+                 incremental_json: bool = True):
+        self.pooling = pooling
+        self.max_idle_per_host = max_idle_per_host
+        self.incremental_json = incremental_json
+        self._idle: Dict[PoolKey, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0,
+        extract: Optional[Iterable[JSONPath]] = None
+    ) -> TimedResponse:
+        """Send a request and time each phase, raising asyncio.TimeoutError after `timeout` seconds.
+
+        `extract` works as for HTTPClient.request.
+        """
+        if not self.incremental_json:
+            extract = None
+        return await asyncio.wait_for(self._request(method, url, body, headers, extract), timeout)
+
+    async def _connect(self, key: PoolKey, timings: Dict[str, float]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        scheme, host, port = key
+        port = port or (443 if scheme == "https" else 80)
+        loop = asyncio.get_running_loop()
+
+        start = time.perf_counter()
+        addresses = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        timings["dns"] = resolved - start
+
+        family, _, _, _, address = addresses[0]
+        reader, writer = await asyncio.open_connection(address[0], address[1], family=family)
+        connected = time.perf_counter()
+        timings["connect"] = connected - resolved
+
+        if scheme == "https":
+            await writer.start_tls(get_ssl_context(), server_hostname=host)
+            timings["tls"] = time.perf_counter() - connected
+        return reader, writer
+
+    def _acquire(self, key: PoolKey) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            # A server-closed idle connection shows up as EOF (or buffered garbage)
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, key: PoolKey, connection: Tuple[asyncio.StreamReader, asyncio.StreamWriter]):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def _request(self, method: str, url: str, body: Optional[bytes], headers: Optional[Dict[str, str]],
+                       extract: Optional[Iterable[JSONPath]]) -> TimedResponse:
+        parsed = urllib.parse.urlsplit(url)
+        key: PoolKey = (parsed.scheme, parsed.hostname, parsed.port)
+
+        connection = self._acquire(key) if self.pooling else None
+        if connection is not None:
+            try:
+                return await self._send(key, parsed, connection, True, method, body, headers, extract)
+            except StaleConnectionError:
+                # The server closed the idle connection before we could send; retry once on a fresh one
+                pass
+
+        return await self._send(key, parsed, None, False, method, body, headers, extract)
+
+    async def _send(
+        self,
+        key: PoolKey,
+        parsed: urllib.parse.SplitResult,
+        connection: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]],
+        reused: bool,
+        method: str,
+        body: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        extract: Optional[Iterable[JSONPath]] = None
+    ) -> TimedResponse:
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        if connection is None:
+            connection = await self._connect(key, timings)
+        reader, writer = connection
+
+        host_header = parsed.hostname if parsed.port is None else f"{parsed.hostname}:{parsed.port}"
+        request_headers = {"Host": host_header, "Accept-Encoding": "identity"}
+        request_headers.update(headers or {})
+        if body is not None:
+            request_headers["Content-Length"] = str(len(body))
+        if not self.pooling:
+            request_headers["Connection"] = "close"
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in request_headers.items()) + "\r\n"
+
+        keep = False
+        try:
+            try:
+                writer.write(head.encode('latin-1') + (body or b""))
+                await writer.drain()
+            except STALE_CONNECTION_ERRORS as e:
+                if reused:
+                    raise StaleConnectionError(str(e)) from e
+                raise
+            sent = time.perf_counter()
+
+            status_line = await reader.readline()
+            if not status_line:
+                raise http.client.RemoteDisconnected("Remote end closed connection without response")
+            first_byte = time.perf_counter()
+            _, status, reason = (status_line.decode('latin-1').rstrip("\r\n").split(" ", 2) + [""])[:3]
+
+            response_headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+            extraction = None
+            if method == "HEAD" or int(status) in (204, 304):
+                data = b""
+            elif extract is not None and int(status) == 200:
+                extraction = _BodyExtraction(extract)
+                async for chunk in _iter_body(reader, response_headers):
+                    extraction.feed(chunk)
+            else:
+                data = await _read_body(reader, response_headers)
+            end = time.perf_counter()
+            keep = (
+                self.pooling
+                and response_headers.get("connection", "").lower() != "close"
+                and ("content-length" in response_headers or response_headers.get("transfer-encoding", "").lower() == "chunked")
+            )
+        finally:
+            if keep:
+                self._release(key, connection)
+            else:
+                writer.close()
+
+        timings["ttfb"] = first_byte - sent
+        timings["body"] = end - first_byte
+        if extraction is not None:
+            return extraction.response(int(status), reason, response_headers, timings, end - start, reused)
+        return TimedResponse(int(status), reason, response_headers, data, timings, end - start, reused)
+
+    async def close(self):
+        """Close every idle connection"""
+        connections = [connection for idle in self._idle.values() for connection in idle]
+        self._idle.clear()
+        for _, writer in connections:
+            writer.close()
+        for _, writer in connections:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+async def _read_exactly(reader: asyncio.StreamReader, size: int) -> AsyncIterator[bytes]:
+    """Yield `size` bytes of the stream, at most READ_BUFFER_SIZE at a time"""
+    while size:
+        data = await reader.read(min(size, READ_BUFFER_SIZE))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", size)
+        size -= len(data)
+        yield data
+
+async def _iter_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """Yield a response body framed by Content-Length, chunked encoding or EOF, a piece at a time"""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Skip trailers up to the terminating blank line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return
+            async for data in _read_exactly(reader, size):
+                yield data
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        async for data in _read_exactly(reader, int(headers["content-length"])):
+            yield data
+    else:
+        while True:
+            data = await reader.read(READ_BUFFER_SIZE)
+            if not data:
+                return
+            yield data
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    """Read a response body framed by Content-Length, chunked encoding or EOF"""
+    return b"".join([data async for data in _iter_body(reader, headers)])
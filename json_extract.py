@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Incremental extraction of a few fields from a JSON response body.
+
+The scripts only need a handful of values from each response: the backend's
+`message` and `usage`, or Gemini's `candidates[0].content.parts[0].text` and
+`usageMetadata`. JSONExtractor is fed the body chunk by chunk as it comes off
+the socket and builds a pruned document holding just those paths:
+
+    extractor = JSONExtractor([("candidates", 0, "content", "parts", 0, "text"), ("usageMetadata",)])
+    for chunk in chunks:
+        extractor.feed(chunk)
+    document = extractor.close()
+    # {"candidates": [{"content": {"parts": [{"text": "..."}]}}], "usageMetadata": {...}}
+
+Containers on the way to a path are kept (empty apart from the wanted
+paths), so code written against the full document reads the pruned one
+unchanged. Everything else is skipped with regular expressions rather than
+decoded, and only the unfinished tail of the input is buffered between
+chunks, so memory per response stays near the size of the wanted values
+instead of several copies of the whole body.
+"""
+
+import re
+import json
+from typing import Any, Iterable, List, Optional, Set, Tuple, Union
+
+JSONPath = Tuple[Union[str, int], ...]
+
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Numbers, true, false and null run up to the next delimiter
+_SCALAR = re.compile(rb'[^ \t\r\n,\]}]+')
+# Skipping a container only stops at brackets outside strings
+_SKIP = re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+_QUOTE, _COMMA, _COLON = ord('"'), ord(','), ord(':')
+_OPEN_OBJECT, _CLOSE_OBJECT = ord('{'), ord('}')
+_OPEN_ARRAY, _CLOSE_ARRAY = ord('['), ord(']')
+
+# What the parser expects next
+_VALUE, _FIRST_VALUE, _KEY, _FIRST_KEY, _COLON_NEXT, _AFTER, _DONE = range(7)
+
+class JSONExtractor:
+    """Streaming JSON parser that keeps only the values at the given paths.
+
+    Path elements are object keys (str) or array indexes (int). `bytes_fed`
+    counts the input; `peak_buffered` is the most bytes held at once (copied
+    input plus the wanted values), which is what one response costs beyond
+    the caller's read buffer.
+    """
+    def __init__(self, paths: Iterable[JSONPath]):
+        self.paths: Set[JSONPath] = {tuple(path) for path in paths}
+        # Every path leading to a wanted value, which the parser descends into
+        self._prefixes: Set[JSONPath] = {path[:i] for path in self.paths for i in range(len(path))}
+        self._buffer = bytearray()
+        # Where parsing resumes in the buffer (past the start of a value being captured)
+        self._resume = 0
+        # Bytes already consumed and dropped from the buffer (for error offsets)
+        self._offset = 0
+        # One [container, key or index] per container being descended
+        self._stack: List[list] = []
+        self._expect = _VALUE
+        self._root: Any = None
+        # While skipping (or capturing) a container: its nesting depth and, if captured, where it starts
+        self._skip_depth = 0
+        self._capture_start: Optional[int] = None
+        self.bytes_fed = 0
+        self.peak_buffered = 0
+        self._value_bytes = 0
+
+    def feed(self, data: Union[bytes, bytearray, memoryview]):
+        """Parse the next chunk of the body (`data` may be reused by the caller afterwards)"""
+        if not data:
+            return
+        self.bytes_fed += len(data)
+        if self._buffer:
+            self._buffer += data
+            data = self._buffer
+            self.peak_buffered = max(self.peak_buffered, len(data) + self._value_bytes)
+        pos = self._parse(data, self._resume, final=False)
+        # Keep a value being captured whole; otherwise only the unfinished token
+        keep = min(pos, self._capture_start) if self._capture_start is not None else pos
+        if self._capture_start is not None:
+            self._capture_start -= keep
+        self._resume = pos - keep
+        self._offset += keep
+        # Only that tail is copied out of the caller's buffer
+        self._buffer = bytearray(data[keep:])
+        self.peak_buffered = max(self.peak_buffered, len(self._buffer) + self._value_bytes)
+
+    def close(self) -> Any:
+        """Finish parsing and return the pruned document"""
+        if self._buffer:
+            self._parse(self._buffer, self._resume, final=True)
+        if self._expect != _DONE:
+            raise ValueError(f"Truncated JSON after {self.bytes_fed} bytes")
+        return self._root
+
+    def _path(self) -> JSONPath:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _error(self, pos: int) -> ValueError:
+        return ValueError(f"Invalid JSON at byte {self._offset + pos}")
+
+    def _store(self, value: Any):
+        """Put a finished value into the document and move on"""
+        if self._stack:
+            container, key = self._stack[-1]
+            if isinstance(container, list):
+                container.extend([None] * (key + 1 - len(container)))
+            container[key] = value
+            self._expect = _AFTER
+        else:
+            self._root = value
+            self._expect = _DONE
+
+    def _close_container(self):
+        container, _ = self._stack.pop()
+        self._expect = _AFTER if self._stack else _DONE
+
+    def _parse(self, data, pos: int, final: bool) -> int:
+        """Consume as much of `data` from `pos` as possible; returns where the unfinished input starts"""
+        end = len(data)
+        while True:
+            if self._skip_depth:
+                pos = _SKIP.match(data, pos).end()
+                if pos == end:
+                    break
+                char = data[pos]
+                if char == _QUOTE:
+                    # A string that goes on in the next chunk
+                    break
+                pos += 1
+                self._skip_depth += 1 if char in (_OPEN_OBJECT, _OPEN_ARRAY) else -1
+                if not self._skip_depth:
+                    if self._capture_start is not None:
+                        value = json.loads(bytes(data[self._capture_start:pos]))
+                        self._value_bytes += pos - self._capture_start
+                        self._capture_start = None
+                        self._store(value)
+                    else:
+                        self._expect = _AFTER if self._stack else _DONE
+                continue
+
+            pos = _WHITESPACE.match(data, pos).end()
+            if pos == end:
+                break
+            char = data[pos]
+            expect = self._expect
+
+            if expect == _DONE:
+                raise self._error(pos)
+            if expect == _COLON_NEXT:
+                if char != _COLON:
+                    raise self._error(pos)
+                pos += 1
+                self._expect = _VALUE
+                continue
+            if expect == _AFTER:
+                frame = self._stack[-1]
+                is_object = isinstance(frame[0], dict)
+                if char == _COMMA:
+                    pos += 1
+                    if is_object:
+                        self._expect = _KEY
+                    else:
+                        frame[1] += 1
+                        self._expect = _VALUE
+                elif char == (_CLOSE_OBJECT if is_object else _CLOSE_ARRAY):
+                    pos += 1
+                    self._close_container()
+                else:
+                    raise self._error(pos)
+                continue
+            if expect in (_KEY, _FIRST_KEY):
+                if char == _CLOSE_OBJECT and expect == _FIRST_KEY:
+                    pos += 1
+                    self._close_container()
+                    continue
+                if char != _QUOTE:
+                    raise self._error(pos)
+                string = _STRING.match(data, pos)
+                if string is None:
+                    break
+                self._stack[-1][1] = json.loads(bytes(data[pos:string.end()]))
+                pos = string.end()
+                self._expect = _COLON_NEXT
+                continue
+
+            # A value
+            if char == _CLOSE_ARRAY and expect == _FIRST_VALUE:
+                pos += 1
+                self._close_container()
+                continue
+            path = self._path()
+            wanted = path in self.paths
+            if char in (_OPEN_OBJECT, _OPEN_ARRAY):
+                if not wanted and path in self._prefixes:
+                    # On the way to a wanted value: keep the container, descend into it
+                    container = {} if char == _OPEN_OBJECT else []
+                    self._store(container)
+                    self._stack.append([container, None if char == _OPEN_OBJECT else 0])
+                    self._expect = _FIRST_KEY if char == _OPEN_OBJECT else _FIRST_VALUE
+                else:
+                    self._skip_depth = 1
+                    self._capture_start = pos if wanted else None
+                pos += 1
+                continue
+            if char == _QUOTE:
+                token = _STRING.match(data, pos)
+                if token is None:
+                    break
+            else:
+                token = _SCALAR.match(data, pos)
+                if token is None:
+                    raise self._error(pos)
+                if token.end() == end and not final:
+                    # The number may go on in the next chunk
+                    break
+            if wanted:
+                try:
+                    self._store(json.loads(bytes(data[pos:token.end()])))
+                except ValueError:
+                    raise self._error(pos)
+                self._value_bytes += token.end() - pos
+            else:
+                self._expect = _AFTER if self._stack else _DONE
+            pos = token.end()
+        return pos
+
+def extract_json(chunks: Iterable[Union[bytes, bytearray, memoryview]], paths: Iterable[JSONPath]) -> Any:
+    """Pruned document holding only `paths`, parsed from a body arriving in chunks"""
+    extractor = JSONExtractor(paths)
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.close()
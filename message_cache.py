@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for generated plant messages.
+
+Entries are keyed by a fingerprint of the normalized prompt together with
+the model and generation settings, so any change to what would be sent to
+the model is a cache miss. Entries live in SQLite so they survive across
+runs, expire after a TTL, and the least recently used ones are evicted once
+the cache grows past its entry limit.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(".rootmate_cache", "messages.sqlite3")
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_ENTRIES = 10_000
+
+def prompt_fingerprint(prompt: str, model: str, generation_config: Optional[Dict] = None) -> str:
+    """Stable hash of a prompt and the settings that affect the model's answer.
+
+    Whitespace is collapsed so that formatting-only differences between
+    prompt templates still share a cache entry.
+    """
+    normalized = " ".join(prompt.split())
+    key = json.dumps(
+        {"model": model, "prompt": normalized, "generationConfig": generation_config or {}},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+class MessageCache:
+    """Content-addressed message cache with TTL expiry and LRU eviction"""
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " message TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_last_used ON messages (last_used)")
+        self._db.execute("DELETE FROM messages WHERE created_at < ?", (time.time() - self.ttl,))
+        self._db.commit()
+
+    def get(self, fingerprint: str) -> Optional[str]:
+        """Return the cached message for `fingerprint`, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT message, created_at FROM messages WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None or row[1] < now - self.ttl:
+                if row is not None:
+                    self._db.execute("DELETE FROM messages WHERE fingerprint = ?", (fingerprint,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE messages SET last_used = ? WHERE fingerprint = ?", (now, fingerprint))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, fingerprint: str, message: str):
+        """Store a message, evicting the least recently used entries if over the limit"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO messages (fingerprint, message, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (fingerprint, message, now, now)
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM messages WHERE fingerprint IN"
+                    " (SELECT fingerprint FROM messages ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._db.execute("DELETE FROM messages")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the RootMate backend and the Gemini API.
+
+Serves the /api/generate-message contract from api/generate-message.ts and
+the Gemini generateContent / models shapes, with configurable latency,
+error rates and response sizes. Point test_harness.py or test_ai_messages.py
+at it to run offline, deterministic performance regressions.
+
+Usage:
+    python3 mock_server.py [--port PORT] [--latency SPEC] [--seed SEED]
+    python3 test_harness.py --url http://127.0.0.1:8787 --load
+
+Options:
+    --host HOST              Interface to bind (default: 127.0.0.1)
+    --port PORT              Port to listen on (default: 8787, 0 picks a free port)
+    --latency SPEC           Simulated model latency (default: lognormal:600:0.4)
+    --backend-overhead SPEC  Extra latency added by the backend hop (default: fixed:20)
+    --error-429 RATE         Fraction of requests answered with 429 (default: 0)
+    --error-500 RATE         Fraction of requests answered with 500 (default: 0)
+    --timeout-rate RATE      Fraction of requests that hang and then drop (default: 0)
+    --timeout-delay SECS     How long a timed-out request hangs (default: 35)
+    --message-length MIN:MAX Generated message length in characters (default: 80:200; at most 3 sentences)
+    --cold-start SPEC        Extra latency of an instance's first request (default: fixed:0)
+    --idle-timeout SECS      Recycle backend instances idle this long (default: never)
+    --seed SEED              Seed for latency, error and message sampling (default: 0)
+    --replay FILE            Answer backend requests with the responses and server times in a
+                             capture from test_harness.py --record (see traffic_capture.py)
+
+Latency specs (milliseconds):
+    fixed:MS  uniform:MIN:MAX  normal:MEAN:STDDEV  lognormal:MEDIAN:SIGMA  exponential:MEAN
+"""
+
+import re
+import json
+import math
+import time
+import random
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from prompt_templates import estimate_tokens
+from traffic_capture import ReplaySource, load_capture
+
+DEFAULT_PORT = 8787
+DEFAULT_LATENCY = "lognormal:600:0.4"
+DEFAULT_BACKEND_OVERHEAD = "fixed:20"
+DEFAULT_MESSAGE_LENGTH = "80:200"
+# The system prompt asks for "2-3 sentences max" (see quality_validator.MAX_SENTENCES)
+MAX_MESSAGE_SENTENCES = 3
+DEFAULT_COLD_START = "fixed:0"
+FALLBACK_MESSAGE = "I'm doing great! 🌿"
+
+API_ENDPOINT = "/api/generate-message"
+GEMINI_MODELS_PATH = "/v1beta/models"
+GEMINI_GENERATE_PATTERN = re.compile(r"^/v1beta/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+MOCK_MODELS = ["gemini-2.5-flash-lite", "gemini-2.5-flash"]
+
+# Batch requests, mirroring MAX_BATCH_SIZE in api/generate-message.ts
+MAX_BATCH_SIZE = 25
+# Each extra plant in a batch adds this fraction of one model call's latency (more output to generate)
+BATCH_ITEM_LATENCY = 0.25
+BATCH_SECTION_PATTERN = re.compile(r"^PLANT (\d+):$", re.MULTILINE)
+
+# Rough size of the user prompt the backend appends to each system prompt, in tokens
+BACKEND_USER_PROMPT_TOKENS = 40
+
+# Streaming: the first chunk arrives after this fraction of the sampled model latency,
+# the remaining chunks are spread evenly over the rest
+FIRST_TOKEN_FRACTION = 0.3
+STREAM_END_EVENT = "[DONE]"
+
+# Same CORS headers the Vercel handler sets on every response
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+# Sentences used to build messages, so responses look like the real thing
+VIBE_SENTENCES = {
+    "Drama Queen": [
+        "Bestie, I am literally wilting over here, no cap 💅",
+        "It's giving neglected houseplant energy and I did not sign up for this 😩",
+        "Periodt, I deserve a spa day and a big drink of water ✨",
+        "Fr fr, my leaves have never looked this iconic 🌿",
+    ],
+    "Chill Roomie": [
+        "Hey, just vibing on the windowsill today.",
+        "No rush on the water, but I wouldn't say no.",
+        "Thanks for keeping the place nice and cozy.",
+        "Catch you later, roomie.",
+    ],
+    "Grumpy Senior": [
+        "Back in my day we didn't need watering reminders.",
+        "The light in here is adequate, I suppose.",
+        "Don't overdo it with the watering can, youngster.",
+        "I've seen a lot of seasons and this one is fine.",
+    ],
+    "Sunshine Buddy": [
+        "Good morning, superstar, today is going to be amazing!",
+        "I soaked up so much light and I feel fantastic!",
+        "You're doing an awesome job taking care of me!",
+        "Let's grow together and make today bright!",
+    ],
+    "Zen Master": [
+        "The roots know patience, and so do I.",
+        "Water flows to those who wait with calm.",
+        "Each new leaf is a small meditation.",
+        "Breathe in, breathe out, and let the light in.",
+    ],
+}
+
+class LatencyProfile:
+    """Latency distribution parsed from a spec like 'lognormal:600:0.4' (milliseconds)"""
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec: str):
+        kind, *values = spec.split(":")
+        if kind not in self.KINDS or len(values) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        self.spec = spec
+        self.kind = kind
+        self.values = [float(value) for value in values]
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds"""
+        if self.kind == "fixed":
+            millis = self.values[0]
+        elif self.kind == "uniform":
+            millis = rng.uniform(*self.values)
+        elif self.kind == "normal":
+            millis = rng.gauss(*self.values)
+        elif self.kind == "lognormal":
+            median, sigma = self.values
+            millis = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            millis = rng.expovariate(1.0 / self.values[0]) if self.values[0] > 0 else 0.0
+        return max(0.0, millis) / 1000.0
+
+class MockConfig:
+    """Latency, fault injection and response size settings for the mock server"""
+    def __init__(
+        self,
+        latency: str = DEFAULT_LATENCY,
+        backend_overhead: str = DEFAULT_BACKEND_OVERHEAD,
+        error_429: float = 0.0,
+        error_500: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_delay: float = 35.0,
+        message_length: str = DEFAULT_MESSAGE_LENGTH,
+        cold_start: str = DEFAULT_COLD_START,
+        idle_timeout: Optional[float] = None,
+        seed: int = 0,
+        replay: Optional[str] = None
+    ):
+        self.latency = LatencyProfile(latency)
+        self.backend_overhead = LatencyProfile(backend_overhead)
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.message_length = parse_range(message_length)
+        self.cold_start = LatencyProfile(cold_start)
+        self.idle_timeout = idle_timeout
+        self.seed = seed
+        # Captured responses to answer backend requests with, instead of generated ones
+        self.replay = ReplaySource(load_capture(replay)) if replay else None
+
+class InstancePool:
+    """Backend function instances, like Vercel's: one request at a time each, recycled once idle too long"""
+    def __init__(self, idle_timeout: Optional[float] = None):
+        self.idle_timeout = idle_timeout
+        # (instance id, idle since), most recently used last
+        self._idle: List[Tuple[str, float]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[str, bool]:
+        """Take the most recently used warm instance, or start a new one; returns (instance id, cold)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.idle_timeout is not None:
+                self._idle = [(instance, since) for instance, since in self._idle if now - since < self.idle_timeout]
+            if self._idle:
+                return self._idle.pop()[0], False
+            return f"mock-{next(self._ids)}", True
+
+    def release(self, instance: str):
+        with self._lock:
+            self._idle.append((instance, time.monotonic()))
+
+def server_timing_header(handler: float, instance: str, gemini: Optional[float] = None, cold_start: Optional[float] = None) -> str:
+    """Server-Timing value the backend sends (durations in seconds, sent as milliseconds)"""
+    metrics = [f"handler;dur={handler * 1000:.1f}"]
+    if gemini is not None:
+        metrics.append(f"gemini;dur={gemini * 1000:.1f}")
+    if cold_start is not None:
+        metrics.append(f"cold;dur={cold_start * 1000:.1f}")
+    metrics.append(f'instance;desc="{instance}"')
+    return ", ".join(metrics)
+
+def parse_range(spec: str) -> Tuple[int, int]:
+    """Parse 'MIN:MAX' (or a single number) into an inclusive integer range"""
+    low, _, high = spec.partition(":")
+    low_value = int(low)
+    high_value = int(high) if high else low_value
+    if low_value < 0 or high_value < low_value:
+        raise ValueError(f"Invalid range '{spec}'")
+    return low_value, high_value
+
+def build_message(rng: random.Random, vibe: str, length_range: Tuple[int, int]) -> str:
+    """Build a vibe-flavoured message aiming for a length in `length_range`, in at most MAX_MESSAGE_SENTENCES sentences"""
+    target = rng.randint(*length_range)
+    if target == 0:
+        return ""
+    # Distinct whole sentences, so the length overshoots the target by at most one sentence
+    # and falls short of it when the sentence limit is reached first
+    sentences = rng.sample(VIBE_SENTENCES.get(vibe, VIBE_SENTENCES["Chill Roomie"]), MAX_MESSAGE_SENTENCES)
+    message = sentences[0]
+    for sentence in sentences[1:]:
+        if len(message) >= target:
+            break
+        message += " " + sentence
+    return message
+
+def split_batch_sections(prompt: str) -> List[str]:
+    """Split a batch prompt into its per-plant sections (empty if it isn't a batch prompt)"""
+    matches = list(BATCH_SECTION_PATTERN.finditer(prompt))
+    return [
+        prompt[match.end():matches[index + 1].start() if index + 1 < len(matches) else len(prompt)]
+        for index, match in enumerate(matches)
+    ]
+
+def split_stream_chunks(rng: random.Random, text: str) -> List[str]:
+    """Split text into chunks of a few words, like a model's streamed output"""
+    words = text.split(" ")
+    chunks = []
+    while words:
+        size = rng.randint(3, 6)
+        chunks.append(" ".join(words[:size]) + (" " if len(words) > size else ""))
+        words = words[size:]
+    return chunks or [""]
+
+def detect_vibe(text: str) -> str:
+    """First known vibe mentioned in a prompt, or an empty string"""
+    return next((vibe for vibe in VIBE_SENTENCES if vibe in text), "")
+
+def backend_usage(entries: List[Dict], messages: List[str]) -> Dict[str, int]:
+    """The `usage` block the backend builds from Gemini's usageMetadata"""
+    prompt_tokens = sum(estimate_tokens(entry.get("systemPrompt", "")) + BACKEND_USER_PROMPT_TOKENS for entry in entries)
+    output_tokens = sum(estimate_tokens(message) for message in messages)
+    return {"promptTokens": prompt_tokens, "outputTokens": output_tokens, "totalTokens": prompt_tokens + output_tokens}
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the backend or Gemini emulation"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        """Write one chunk of a chunked-encoding body (empty data ends the body)"""
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _stream_events(self, events: List[str], model_latency: float, headers: Optional[Dict[str, str]] = None):
+        """Send headers now, then each event as a server-sent event paced over `model_latency`"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        time.sleep(model_latency * FIRST_TOKEN_FRACTION)
+        interval = model_latency * (1 - FIRST_TOKEN_FRACTION) / max(1, len(events) - 1)
+        for index, event in enumerate(events):
+            if index:
+                time.sleep(interval)
+            self._write_chunk(f"data: {event}\r\n\r\n".encode('utf-8'))
+        self._write_chunk(b"")
+
+    def _read_json_body(self) -> Optional[Dict]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw.decode('utf-8')) if raw else None
+        except ValueError:
+            return None
+
+    def _inject_fault(self, rng: random.Random) -> Optional[int]:
+        """Pick an injected failure for this request: 429, 500, 0 for a timeout, or None"""
+        config = self.server.config
+        roll = rng.random()
+        if roll < config.timeout_rate:
+            return 0
+        roll -= config.timeout_rate
+        if roll < config.error_429:
+            return 429
+        roll -= config.error_429
+        if roll < config.error_500:
+            return 500
+        return None
+
+    def _hang_up(self):
+        """Simulate an upstream timeout: wait, then drop the connection without a response"""
+        time.sleep(self.server.config.timeout_delay)
+        self.close_connection = True
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == GEMINI_MODELS_PATH:
+            self._send_json(200, {"models": [
+                {
+                    "name": f"models/{model}",
+                    "displayName": model,
+                    "supportedGenerationMethods": ["generateContent", "countTokens"]
+                }
+                for model in MOCK_MODELS
+            ]})
+        elif path == "/":
+            body = b"RootMate mock server"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == API_ENDPOINT:
+            self._send_json(405, {"error": "Method not allowed"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        for name, value in CORS_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        body = self._read_json_body()
+        rng = self.server.next_rng()
+
+        if path == API_ENDPOINT:
+            self._handle_generate_message(body, rng)
+            return
+
+        match = GEMINI_GENERATE_PATTERN.match(path)
+        if match:
+            stream = match.group("method") == "streamGenerateContent"
+            self._handle_generate_content(match.group("model"), body, rng, stream)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def _handle_generate_message(self, body: Optional[Dict], rng: random.Random):
+        """Emulate api/generate-message.ts"""
+        if body and isinstance(body.get("plants"), list):
+            self._handle_generate_batch(body["plants"], rng)
+            return
+        if not body or not body.get("plant") or not body.get("systemPrompt"):
+            self._send_json(400, {"error": "Missing required fields: plant and systemPrompt are required"}, CORS_HEADERS)
+            return
+
+        config = self.server.config
+        if config.replay is not None and not body.get("stream"):
+            self._handle_replay(body, config.replay)
+            return
+        fault = self._inject_fault(rng)
+        overhead = config.backend_overhead.sample(rng)
+        model_latency = config.latency.sample(rng)
+
+        instance, cold = self.server.instances.acquire()
+        try:
+            cold_start = config.cold_start.sample(rng) if cold else None
+            time.sleep(cold_start or 0.0)
+
+            if body.get("stream") and fault is None:
+                # Streaming form: {"text": chunk} events, {"usage": ...}, then [DONE]
+                time.sleep(overhead)
+                message = build_message(rng, body["plant"].get("vibe", ""), config.message_length) or FALLBACK_MESSAGE
+                events = [json.dumps({"text": chunk}, ensure_ascii=False) for chunk in split_stream_chunks(rng, message)]
+                events.append(json.dumps({"usage": backend_usage([body], [message])}))
+                # Headers go out before the model answers, as in the real handler
+                headers = {**CORS_HEADERS, "Server-Timing": server_timing_header(overhead, instance, 0.0, cold_start)}
+                self._stream_events(events + [STREAM_END_EVENT], model_latency, headers)
+                return
+
+            time.sleep(overhead + model_latency)
+            timing = {"Server-Timing": server_timing_header(overhead + model_latency, instance, model_latency, cold_start)}
+
+            if fault == 0:
+                self._hang_up()
+            elif fault == 429:
+                self._send_json(429, {"error": "Resource has been exhausted (e.g. check quota)."}, {**CORS_HEADERS, **timing, "Retry-After": "1"})
+            elif fault == 500:
+                self._send_json(500, {"error": "Internal server error"}, {**CORS_HEADERS, **timing})
+            else:
+                vibe = body["plant"].get("vibe", "")
+                message = build_message(rng, vibe, config.message_length) or FALLBACK_MESSAGE
+                self._send_json(200, {"message": message, "usage": backend_usage([body], [message])}, {**CORS_HEADERS, **timing})
+        finally:
+            self.server.instances.release(instance)
+
+    def _handle_replay(self, body: Dict, source: ReplaySource):
+        """Answer with a captured response after the captured server time (faults and latency settings don't apply)"""
+        record = source.response_for(body)
+        handler = record.get("server", record["duration"])
+        time.sleep(handler)
+        timing = {"Server-Timing": server_timing_header(handler, "replay")}
+        status = record.get("status")
+        if status is None:
+            # The captured request failed without a response
+            self._hang_up()
+        elif status == 200 and record.get("message") is not None:
+            message = record["message"]
+            usage = backend_usage([body], [message])
+            if record.get("usage"):
+                prompt_tokens, output_tokens = record["usage"]
+                usage = {"promptTokens": prompt_tokens, "outputTokens": output_tokens, "totalTokens": prompt_tokens + output_tokens}
+            self._send_json(200, {"message": message, "usage": usage}, {**CORS_HEADERS, **timing})
+        else:
+            headers = {**CORS_HEADERS, **timing, **({"Retry-After": "1"} if status == 429 else {})}
+            self._send_json(status, {"error": record.get("error") or "Replayed error"}, headers)
+
+    def _handle_generate_batch(self, entries: List[Dict], rng: random.Random):
+        """Emulate the batch form of api/generate-message.ts"""
+        if not entries or len(entries) > MAX_BATCH_SIZE:
+            self._send_json(400, {"error": f"plants must contain between 1 and {MAX_BATCH_SIZE} entries"}, CORS_HEADERS)
+            return
+        if any(not entry or not entry.get("plant") or not entry.get("systemPrompt") for entry in entries):
+            self._send_json(400, {"error": "Missing required fields: every entry in plants needs plant and systemPrompt"}, CORS_HEADERS)
+            return
+
+        config = self.server.config
+        fault = self._inject_fault(rng)
+        model_latency = config.latency.sample(rng) * (1 + BATCH_ITEM_LATENCY * (len(entries) - 1))
+        overhead = config.backend_overhead.sample(rng)
+
+        instance, cold = self.server.instances.acquire()
+        try:
+            cold_start = config.cold_start.sample(rng) if cold else None
+            time.sleep((cold_start or 0.0) + overhead + model_latency)
+            timing = {"Server-Timing": server_timing_header(overhead + model_latency, instance, model_latency, cold_start)}
+
+            if fault == 0:
+                self._hang_up()
+            elif fault == 429:
+                self._send_json(429, {"error": "Resource has been exhausted (e.g. check quota)."}, {**CORS_HEADERS, **timing, "Retry-After": "1"})
+            elif fault == 500:
+                self._send_json(500, {"error": "Internal server error"}, {**CORS_HEADERS, **timing})
+            else:
+                messages = [
+                    build_message(rng, entry["plant"].get("vibe", ""), config.message_length) or FALLBACK_MESSAGE
+                    for entry in entries
+                ]
+                self._send_json(200, {"messages": messages, "usage": backend_usage(entries, messages)}, {**CORS_HEADERS, **timing})
+        finally:
+            self.server.instances.release(instance)
+
+    def _handle_generate_content(self, model: str, body: Optional[Dict], rng: random.Random, stream: bool = False):
+        """Emulate the Gemini generateContent and streamGenerateContent (alt=sse) endpoints"""
+        if not body or not body.get("contents"):
+            self._send_json(400, {"error": {"code": 400, "message": "contents is required", "status": "INVALID_ARGUMENT"}})
+            return
+        if model not in MOCK_MODELS:
+            self._send_json(404, {"error": {"code": 404, "message": f"models/{model} is not found", "status": "NOT_FOUND"}})
+            return
+
+        config = self.server.config
+        prompt = "".join(part.get("text", "") for content in body["contents"] for part in content.get("parts", []))
+        generation_config = body.get("generationConfig") or {}
+        sections = split_batch_sections(prompt) if generation_config.get("responseMimeType") == "application/json" else []
+
+        fault = self._inject_fault(rng)
+        model_latency = config.latency.sample(rng) * (1 + BATCH_ITEM_LATENCY * max(0, len(sections) - 1))
+
+        if stream and fault is None:
+            text = build_message(rng, detect_vibe(prompt), config.message_length)
+            chunks = split_stream_chunks(rng, text)
+            prompt_tokens = estimate_tokens(prompt)
+            events = []
+            for index, chunk in enumerate(chunks):
+                event = {"candidates": [{"content": {"parts": [{"text": chunk}], "role": "model"}, "index": 0}], "modelVersion": model}
+                if index == len(chunks) - 1:
+                    output_tokens = estimate_tokens(text)
+                    event["candidates"][0]["finishReason"] = "STOP"
+                    event["usageMetadata"] = {
+                        "promptTokenCount": prompt_tokens,
+                        "candidatesTokenCount": output_tokens,
+                        "totalTokenCount": prompt_tokens + output_tokens
+                    }
+                events.append(json.dumps(event, ensure_ascii=False))
+            self._stream_events(events, model_latency)
+            return
+
+        time.sleep(model_latency)
+
+        if fault == 0:
+            self._hang_up()
+        elif fault == 429:
+            self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).", "status": "RESOURCE_EXHAUSTED"}}, {"Retry-After": "1"})
+        elif fault == 500:
+            self._send_json(500, {"error": {"code": 500, "message": "An internal error has occurred.", "status": "INTERNAL"}})
+        else:
+            if sections:
+                # Batch prompt: answer with the JSON array of {id, message} it asks for
+                text = json.dumps([
+                    {"id": index + 1, "message": build_message(rng, detect_vibe(section), config.message_length)}
+                    for index, section in enumerate(sections)
+                ], ensure_ascii=False)
+            else:
+                text = build_message(rng, detect_vibe(prompt), config.message_length)
+            prompt_tokens = estimate_tokens(prompt)
+            output_tokens = estimate_tokens(text)
+            self._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": text}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": output_tokens,
+                    "totalTokenCount": prompt_tokens + output_tokens
+                },
+                "modelVersion": model
+            })
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded mock server; every request draws from its own seeded RNG"""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig, verbose: bool = False):
+        super().__init__(address, MockRequestHandler)
+        self.config = config
+        self.verbose = verbose
+        self.instances = InstancePool(config.idle_timeout)
+        self._sequence = itertools.count()
+        self._sequence_lock = threading.Lock()
+
+    def next_rng(self) -> random.Random:
+        """RNG for the next request, so a given seed always yields the same sequence of samples"""
+        with self._sequence_lock:
+            sequence = next(self._sequence)
+        return random.Random(f"{self.config.seed}:{sequence}")
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_mock_server(config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Start a mock server on a background thread and return it (call shutdown() to stop)"""
+    server = MockServer((host, port), config or MockConfig())
+    thread = threading.Thread(target=server.serve_forever, name="mock-server", daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the RootMate backend and Gemini API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--latency", default=DEFAULT_LATENCY, help=f"Simulated model latency spec in ms (default: {DEFAULT_LATENCY})")
+    parser.add_argument("--backend-overhead", default=DEFAULT_BACKEND_OVERHEAD, help=f"Extra backend latency spec in ms (default: {DEFAULT_BACKEND_OVERHEAD})")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang and then drop")
+    parser.add_argument("--timeout-delay", type=float, default=35.0, help="Seconds a timed-out request hangs (default: 35)")
+    parser.add_argument("--message-length", default=DEFAULT_MESSAGE_LENGTH, help=f"Message length range in characters (default: {DEFAULT_MESSAGE_LENGTH})")
+    parser.add_argument("--cold-start", default=DEFAULT_COLD_START, help=f"Latency spec in ms added to each instance's first request (default: {DEFAULT_COLD_START})")
+    parser.add_argument("--idle-timeout", type=float, help="Seconds an idle backend instance lives before being recycled (default: never)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency, error and message sampling (default: 0)")
+    parser.add_argument("--replay", metavar="FILE", help="Answer backend requests with the responses captured in FILE (test_harness.py --record)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        config = MockConfig(
+            latency=args.latency,
+            backend_overhead=args.backend_overhead,
+            error_429=args.error_429,
+            error_500=args.error_500,
+            timeout_rate=args.timeout_rate,
+            timeout_delay=args.timeout_delay,
+            message_length=args.message_length,
+            cold_start=args.cold_start,
+            idle_timeout=args.idle_timeout,
+            seed=args.seed,
+            replay=args.replay
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    server = MockServer((args.host, args.port), config, verbose=args.verbose)
+    print(f"🌱 RootMate mock server listening on {server.url}")
+    print(f"   Backend:  POST {server.url}{API_ENDPOINT}")
+    print(f"   Gemini:   POST {server.url}{GEMINI_MODELS_PATH}/{{model}}:generateContent")
+    print(f"   Latency:  {config.latency.spec} (+ {config.backend_overhead.spec} backend overhead)")
+    if config.replay is not None:
+        print(f"   Replaying {len(config.replay.records)} captured responses from {args.replay}")
+    if config.idle_timeout is not None:
+        print(f"   Instances recycled after {config.idle_timeout:g}s idle, cold start {config.cold_start.spec}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
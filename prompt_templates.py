@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+System prompt templates shared by test_harness.py and test_ai_messages.py.
+
+Each vibe's template is compiled once, at import, into the text before and
+after the species name, so rendering a prompt is a single concatenation.
+Rendered prompts are memoized per (species, vibe), and size statistics are
+kept for every distinct prompt so sweeps can report how much they send.
+"""
+
+import threading
+from functools import lru_cache
+from typing import Dict, List
+
+BASE_PROMPT = ("You are {species}, a houseplant with a {vibe} personality. "
+               "Write a short, engaging daily message (2-3 sentences max) from the plant's perspective.")
+
+VIBE_PROMPTS = {
+    "Drama Queen": """
+PERSONALITY: Dramatic, attention-seeking, uses Gen-Z slang (no cap, periodt, bestie, fr fr, it's giving, etc.)
+STYLE: Melodramatic, expressive, uses emojis liberally, makes everything about yourself""",
+
+    "Chill Roomie": """
+PERSONALITY: Laid-back, friendly, easy-going, supportive
+STYLE: Casual, warm, like a good friend, relaxed""",
+
+    "Grumpy Senior": """
+PERSONALITY: Wise but grumpy, old-timer who's seen it all, disciplined
+STYLE: Dry humor, occasional complaints, but caring deep down""",
+
+    "Sunshine Buddy": """
+PERSONALITY: Cheerful, optimistic, full of positive energy, enthusiastic
+STYLE: Upbeat, encouraging, happy vibes, lots of positivity""",
+
+    "Zen Master": """
+PERSONALITY: Calm, wise, philosophical, meditative
+STYLE: Thoughtful, mindful, peaceful, offers gentle wisdom"""
+}
+
+# Distinct (species, vibe) prompts kept rendered
+MAX_CACHED_PROMPTS = 4096
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+class PromptTemplate:
+    """A vibe's system prompt, split around the species name"""
+    def __init__(self, vibe: str):
+        self.vibe = vibe
+        # Only the species varies once the vibe is fixed
+        self.prefix, self.suffix = (BASE_PROMPT + VIBE_PROMPTS.get(vibe, "")).replace("{vibe}", vibe).split("{species}")
+
+    def render(self, species: str) -> str:
+        return self.prefix + species + self.suffix
+
+_TEMPLATES: Dict[str, PromptTemplate] = {vibe: PromptTemplate(vibe) for vibe in VIBE_PROMPTS}
+_stats_lock = threading.Lock()
+_prompt_chars: List[int] = []
+_prompt_tokens: List[int] = []
+
+def get_template(vibe: str) -> PromptTemplate:
+    """Compiled template for `vibe` (unknown vibes get the base prompt only)"""
+    template = _TEMPLATES.get(vibe)
+    if template is None:
+        template = _TEMPLATES.setdefault(vibe, PromptTemplate(vibe))
+    return template
+
+@lru_cache(maxsize=MAX_CACHED_PROMPTS)
+def get_system_prompt(species: str, vibe: str) -> str:
+    """Generate system prompt based on plant species and vibe"""
+    prompt = get_template(vibe).render(species)
+    with _stats_lock:
+        _prompt_chars.append(len(prompt))
+        _prompt_tokens.append(estimate_tokens(prompt))
+    return prompt
+
+def prompt_stats() -> Dict[str, float]:
+    """Render counts, cache hit rate, and size of the distinct system prompts rendered so far"""
+    info = get_system_prompt.cache_info()
+    with _stats_lock:
+        chars, tokens = list(_prompt_chars), list(_prompt_tokens)
+    return {
+        "renders": info.hits + info.misses,
+        "cache_hits": info.hits,
+        "unique_prompts": len(chars),
+        "mean_chars": sum(chars) / len(chars) if chars else 0.0,
+        "max_chars": max(chars, default=0),
+        "mean_tokens": sum(tokens) / len(tokens) if tokens else 0.0,
+        "max_tokens": max(tokens, default=0)
+    }
+
+def format_prompt_stats() -> str:
+    """One-line summary of prompt_stats() for the scripts' reports"""
+    stats = prompt_stats()
+    if not stats["renders"]:
+        return "no system prompts rendered"
+    return (f"{stats['renders']} system prompts ({stats['cache_hits']} from cache, {stats['unique_prompts']} distinct), "
+            f"avg {stats['mean_chars']:.0f} chars (~{stats['mean_tokens']:.0f} tokens), max {stats['max_chars']} chars")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Quality checks for generated plant messages, run off the request path.
+
+The system prompt asks for "2-3 sentences max" in the plant's voice, and the
+backend answers "I'm doing great! 🌿" whenever Gemini returns no text. The
+checks flag messages that break those expectations:
+
+    empty        nothing but whitespace
+    fallback     the handler's default message instead of a generated one
+    too_long     more than 3 sentences (or MAX_MESSAGE_CHARS characters)
+    no_emoji     a Drama Queen message without an emoji ("uses emojis liberally")
+    off_vibe     none of the vibe's typical words (a heuristic: some good
+                 messages are flagged, but a rising rate means drift)
+
+QualityValidator takes messages on a queue and checks them on background
+threads, so checks never add to measured request latency. Counts are kept
+per vibe and per time window; windows with more messages per second are the
+ones under more load, so the report can show whether problems (the fallback
+text in particular) get more common as throughput rises.
+"""
+
+import re
+import time
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from transports import FALLBACK_MESSAGE
+
+MAX_SENTENCES = 3
+MAX_MESSAGE_CHARS = 400
+DEFAULT_WORKERS = 2
+DEFAULT_WINDOW = 5.0  # seconds
+# Messages waiting beyond this are dropped (and counted) rather than slowing the run
+MAX_QUEUED = 10_000
+THROUGHPUT_BANDS = 4
+
+ISSUES = {
+    "empty": "empty message",
+    "fallback": "fallback text",
+    "too_long": f"over {MAX_SENTENCES} sentences",
+    "no_emoji": "Drama Queen without emoji",
+    "off_vibe": "no words typical of the vibe"
+}
+
+# Lowercase words and phrases (with ! as a stand-in for enthusiasm) that each vibe's prompt asks for
+VIBE_MARKERS = {
+    "Drama Queen": ["no cap", "periodt", "bestie", "fr fr", "it's giving", "slay", "literally", "iconic", "obsessed",
+                    "drama", "queen", "omg", "serving", "main character"],
+    "Chill Roomie": ["hey", "chill", "vibe", "vibing", "no rush", "cozy", "roomie", "relax", "easy", "no worries",
+                     "dude", "catch you", "all good", "hang"],
+    "Grumpy Senior": ["back in my day", "youngster", "i suppose", "hmph", "adequate", "kids these days", "in my day",
+                      "whippersnapper", "i've seen", "don't overdo", "complain", "bah", "fine", "humph"],
+    "Sunshine Buddy": ["!", "amazing", "awesome", "fantastic", "bright", "sunshine", "yay", "wonderful", "superstar",
+                       "happy", "great", "smile", "love"],
+    "Zen Master": ["breathe", "calm", "patience", "patient", "peace", "mindful", "flow", "present", "stillness",
+                   "balance", "harmony", "wisdom", "meditat", "root"]
+}
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+")
+_WORD = re.compile(r"\w")
+_EMOJI = re.compile("[\U0001F300-\U0001FAFF\u2600-\u27BF\u2B50\u2B55]")
+
+def count_sentences(text: str) -> int:
+    """Sentences in a message; fragments without letters or digits (e.g. a trailing emoji) don't count"""
+    return sum(1 for part in _SENTENCE_BREAK.split(text.strip()) if _WORD.search(part))
+
+def check_message(message: str, vibe: str) -> List[str]:
+    """Issue codes (see ISSUES) for one message"""
+    text = message.strip()
+    if not text:
+        return ["empty"]
+    if text == FALLBACK_MESSAGE:
+        # The handler's default says nothing about the model's output
+        return ["fallback"]
+    issues = []
+    if count_sentences(text) > MAX_SENTENCES or len(text) > MAX_MESSAGE_CHARS:
+        issues.append("too_long")
+    if vibe == "Drama Queen" and not _EMOJI.search(text):
+        issues.append("no_emoji")
+    markers = VIBE_MARKERS.get(vibe)
+    if markers:
+        lowered = text.lower().replace("’", "'")
+        if not any(marker in lowered for marker in markers):
+            issues.append("off_vibe")
+    return issues
+
+class QualityCounts:
+    """Messages checked and issues found in one group (a vibe, a time window or the whole run)"""
+    def __init__(self):
+        self.checked = 0
+        self.flagged = 0
+        self.issues: Dict[str, int] = {}
+
+    def add(self, issues: List[str]):
+        self.checked += 1
+        if issues:
+            self.flagged += 1
+        for issue in issues:
+            self.issues[issue] = self.issues.get(issue, 0) + 1
+
+    def merge(self, other: "QualityCounts"):
+        self.checked += other.checked
+        self.flagged += other.flagged
+        for issue, count in other.issues.items():
+            self.issues[issue] = self.issues.get(issue, 0) + count
+
+    def rate(self, issue: Optional[str] = None) -> float:
+        """Share of checked messages with `issue` (any issue if None)"""
+        count = self.flagged if issue is None else self.issues.get(issue, 0)
+        return count / self.checked if self.checked else 0.0
+
+class QualityValidator:
+    """Checks messages on background threads; submit() only enqueues"""
+    def __init__(self, workers: int = DEFAULT_WORKERS, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self.totals = QualityCounts()
+        self.by_vibe: Dict[str, QualityCounts] = {}
+        # Window index since the start -> counts
+        self.by_window: Dict[int, QualityCounts] = {}
+        self.dropped = 0
+        self._start = time.perf_counter()
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue(MAX_QUEUED)
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, name=f"quality-validator-{i}", daemon=True) for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, message: str, vibe: str, result=None):
+        """Queue a message for checking; its issues are also set on `result.quality` if given"""
+        try:
+            self._queue.put_nowait((message, vibe, time.perf_counter(), result))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                message, vibe, received, result = item
+                issues = check_message(message, vibe)
+                if result is not None:
+                    result.quality = issues
+                self.add(issues, vibe, received)
+            finally:
+                self._queue.task_done()
+
+    def add(self, issues: List[str], vibe: str, received: Optional[float] = None):
+        """Count a checked message; `received` (a perf_counter time) places it in a window"""
+        with self._lock:
+            self.totals.add(issues)
+            self.by_vibe.setdefault(vibe, QualityCounts()).add(issues)
+            if received is not None:
+                self.by_window.setdefault(int((received - self._start) // self.window), QualityCounts()).add(issues)
+
+    def drain(self):
+        """Wait until every submitted message has been checked"""
+        self._queue.join()
+
+    def close(self):
+        self.drain()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def throughput_bands(self, bands: int = THROUGHPUT_BANDS) -> List[Tuple[float, float, QualityCounts]]:
+        """Windows grouped by messages per second, lowest first: (min rate, max rate, counts) per band.
+
+        The last, partial window is left out since its rate is understated.
+        """
+        with self._lock:
+            windows = sorted(self.by_window.items())[:-1]
+        if not windows:
+            return []
+        ranked = sorted(windows, key=lambda item: item[1].checked)
+        size = max(1, -(-len(ranked) // bands))
+        grouped = []
+        for start in range(0, len(ranked), size):
+            band = ranked[start:start + size]
+            counts = QualityCounts()
+            for _, window_counts in band:
+                counts.merge(window_counts)
+            grouped.append((band[0][1].checked / self.window, band[-1][1].checked / self.window, counts))
+        return grouped
+
+_quality_validator: Optional[QualityValidator] = None
+
+def get_quality_validator() -> Optional[QualityValidator]:
+    """Return the process's validator (None unless configured)"""
+    return _quality_validator
+
+def configure_quality_validator(enabled: bool = True, workers: int = DEFAULT_WORKERS,
+                                window: float = DEFAULT_WINDOW) -> Optional[QualityValidator]:
+    """Replace the process's validator, stopping the old one's threads"""
+    global _quality_validator
+    if _quality_validator is not None:
+        _quality_validator.close()
+    _quality_validator = QualityValidator(workers, window) if enabled else None
+    return _quality_validator
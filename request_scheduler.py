@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Retry, backoff and rate limiting for requests to the backend and Gemini.
+
+RequestScheduler wraps a single request attempt and:
+  - waits for a token from an optional TokenBucket before every attempt, so
+    sweeps stay under a known request rate instead of tripping quotas,
+  - retries 429/5xx responses and connection errors with exponential backoff
+    and full jitter, honouring the server's Retry-After header when present
+    (a Retry-After beyond the longest backoff returns the error instead);
+    timeouts are only retried while connecting, since a request that timed
+    out waiting for its response may still be processed (and billed),
+  - fails fast through a CircuitBreaker once the upstream keeps failing (5xx
+    or connection errors), so a dead endpoint doesn't soak up every retry in
+    a long run.
+
+Time spent backing off and time spent waiting for the rate limiter are
+reported separately from request latency.
+"""
+
+import time
+import random
+import socket
+import asyncio
+import threading
+import http.client
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+# Responses worth retrying: throttled, or a transient server-side failure
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_ERRORS = (OSError, http.client.HTTPException, asyncio.TimeoutError)
+# ...except timeouts, which may come after the upstream got the request: retrying could pay for it twice.
+# (A connect timeout is a ConnectionError instead, see http_client.ConnectTimeoutError.)
+SENT_TIMEOUT_ERRORS = (socket.timeout, asyncio.TimeoutError)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BASE_DELAY = 0.5  # seconds
+DEFAULT_MAX_DELAY = 20.0  # seconds
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0  # seconds
+
+Response = TypeVar("Response")
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """How many times to retry and how long to back off between attempts"""
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, retry: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Delay before retry number `retry` (1-based), or None to give up.
+
+        Uses "full jitter" (uniform between 0 and the exponential cap) so
+        concurrent clients don't retry in lockstep. A Retry-After from the
+        server is a floor, not a suggestion: when it is longer than
+        `max_delay` the request isn't retried at all, rather than early.
+        """
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+        cap = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        delay = self._rng.uniform(0, cap)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts of up to `burst`"""
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it.
+
+        Tokens are reserved even when the bucket is empty, so waiting callers
+        are served in order and the long-run rate never exceeds `rate`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the time spent waiting"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class CircuitBreaker:
+    """Stops sending requests after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one trial request is let through (half-open);
+    its success closes the circuit again, its failure re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.times_opened = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            remaining = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(f"Circuit open after {self._failures} consecutive failures (retrying in {remaining:.0f}s)")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                # Failures that were already in flight when it opened don't push the reset back
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    self.state = self.OPEN
+                    self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+class RequestStats:
+    """What it took to get one response: attempts made and time spent waiting"""
+    def __init__(self):
+        self.attempts = 0
+        self.retry_wait = 0.0
+        self.throttle_wait = 0.0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+class RequestScheduler:
+    """Sends requests through a rate limiter, retry policy and circuit breaker"""
+    def __init__(self, policy: Optional[RetryPolicy] = None, rate_limiter: Optional[TokenBucket] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.policy = policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        # Totals across every request, for scripts that only want a summary line
+        self.requests = 0
+        self.retries = 0
+        self.retry_wait = 0.0
+        self.throttle_wait = 0.0
+        self._lock = threading.Lock()
+
+    def _retry_delay(self, retry: int, response, error: Optional[BaseException]) -> Optional[float]:
+        """Backoff before retry number `retry`, or None if the outcome isn't retryable (or not soon enough)"""
+        if error is not None:
+            if not isinstance(error, RETRYABLE_ERRORS) or isinstance(error, SENT_TIMEOUT_ERRORS):
+                return None
+            if retry > self.policy.max_retries:
+                return None
+            return self.policy.backoff(retry)
+        if response.status not in RETRYABLE_STATUSES or retry > self.policy.max_retries:
+            return None
+        headers: Dict[str, str] = getattr(response, "headers", {}) or {}
+        return self.policy.backoff(retry, parse_retry_after(headers.get("retry-after")))
+
+    def _record_outcome(self, response, error: Optional[BaseException]):
+        if self.breaker is None:
+            return
+        # 429 means "slow down", not "down": back off, but don't trip the breaker
+        if error is not None and isinstance(error, RETRYABLE_ERRORS):
+            self.breaker.record_failure()
+        elif error is None and response.status in RETRYABLE_STATUSES and response.status != 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _add_totals(self, stats: RequestStats):
+        with self._lock:
+            self.requests += 1
+            self.retries += stats.retries
+            self.retry_wait += stats.retry_wait
+            self.throttle_wait += stats.throttle_wait
+
+    def send(self, attempt: Callable[[], Response], stats: Optional[RequestStats] = None) -> Response:
+        """Call `attempt` until it returns a non-retryable response or retries run out.
+
+        `attempt` sends one request and returns an object with `status` (and
+        optionally `headers`). The last response is returned even if it is
+        still an error; the last exception is re-raised if every attempt
+        raised. Discarded responses are closed if they have a close() method.
+        Attempts and waits are added to `stats` if given, also on failure.
+        """
+        stats = stats if stats is not None else RequestStats()
+        try:
+            while True:
+                if self.breaker is not None:
+                    self.breaker.before_request()
+                if self.rate_limiter is not None:
+                    stats.throttle_wait += self.rate_limiter.acquire()
+
+                stats.attempts += 1
+                response, error = None, None
+                try:
+                    response = attempt()
+                except Exception as e:
+                    error = e
+                self._record_outcome(response, error)
+
+                delay = self._retry_delay(stats.attempts, response, error)
+                if delay is None:
+                    if error is not None:
+                        raise error
+                    return response
+
+                if response is not None and hasattr(response, "close"):
+                    response.close()
+                time.sleep(delay)
+                stats.retry_wait += delay
+        finally:
+            self._add_totals(stats)
+
+    async def async_send(self, attempt: Callable[[], Awaitable[Response]], stats: Optional[RequestStats] = None) -> Response:
+        """Async version of send; `attempt` is a coroutine function"""
+        stats = stats if stats is not None else RequestStats()
+        try:
+            while True:
+                if self.breaker is not None:
+                    self.breaker.before_request()
+                if self.rate_limiter is not None:
+                    wait = self.rate_limiter.reserve()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    stats.throttle_wait += wait
+
+                stats.attempts += 1
+                response, error = None, None
+                try:
+                    response = await attempt()
+                except Exception as e:
+                    error = e
+                self._record_outcome(response, error)
+
+                delay = self._retry_delay(stats.attempts, response, error)
+                if delay is None:
+                    if error is not None:
+                        raise error
+                    return response
+
+                await asyncio.sleep(delay)
+                stats.retry_wait += delay
+        finally:
+            self._add_totals(stats)
+
+# Shared scheduler used by the test scripts (retries on, no rate limit)
+_default_scheduler = RequestScheduler(breaker=CircuitBreaker())
+
+def get_scheduler() -> RequestScheduler:
+    return _default_scheduler
+
+def configure_scheduler(
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    rate_limit: Optional[float] = None,
+    burst: Optional[float] = None,
+    failure_threshold: Optional[int] = DEFAULT_FAILURE_THRESHOLD,
+    reset_timeout: float = DEFAULT_RESET_TIMEOUT
+) -> RequestScheduler:
+    """Replace the shared scheduler.
+
+    `rate_limit` is in requests per second (None for unlimited);
+    `failure_threshold` of None disables the circuit breaker.
+    """
+    global _default_scheduler
+    _default_scheduler = RequestScheduler(
+        RetryPolicy(max_retries=max_retries),
+        TokenBucket(rate_limit, burst) if rate_limit else None,
+        CircuitBreaker(failure_threshold, reset_timeout) if failure_threshold else None
+    )
+    return _default_scheduler
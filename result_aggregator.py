@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Streaming aggregation of test results, so long runs don't grow in memory.
+
+A load run used to keep every TestResult (with its message text, timings
+and scenario) until the end, just to print a summary. ResultSummary folds
+each result in as it arrives instead:
+
+    counters     requests, failures (by reason), retries, throttling,
+                 connections opened and reused, shared (--dedup) requests
+    histograms   latency overall, per phase, per vibe and per status;
+                 response sizes; the harness overhead split (--profile)
+    slowest      the DEFAULT_SLOWEST slowest requests and their scenarios
+
+Its size depends on the number of vibes, statuses and distinct failure
+reasons (capped at MAX_REASONS), never on the number of requests.
+Summaries merge, like the simulator's SimulationStats.
+
+ResultLog optionally spills every full record to disk as compact JSON lines
+(gzip-compressed when the path ends in .gz), for runs that need them later.
+"""
+
+import json
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from harness_metrics import LatencyHistogram
+from http_client import TIMING_PHASES
+from traffic_capture import open_text
+
+DEFAULT_SLOWEST = 5
+# Distinct failure reasons counted by name; any others are counted together
+MAX_REASONS = 50
+OTHER_REASONS = "(other reasons)"
+REASON_LENGTH = 80
+
+def failure_reason(message: str) -> str:
+    """A failure message shortened to its first line, for counting alike failures together"""
+    return message.splitlines()[0][:REASON_LENGTH] if message else ""
+
+class ResultSummary:
+    """Counters, histograms and the slowest requests of a set of TestResults, folded in one at a time"""
+    def __init__(self, slowest: int = DEFAULT_SLOWEST):
+        self.requests = 0
+        self.passed = 0
+        # Never sent (e.g. the token budget ran out); not counted in `requests`
+        self.skipped = 0
+        self.attempts = 0
+        self.reasons: Dict[str, int] = {}
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.retried = 0
+        self.retried_then_succeeded = 0
+        self.retries = 0
+        self.retry_wait = 0.0
+        self.throttled = 0
+        self.throttle_wait = 0.0
+        self.max_throttle_wait = 0.0
+        # Failed fast on an open circuit breaker, without being sent
+        self.circuit_open = 0
+        self.coalesced = 0
+        self.coalesced_wait = LatencyHistogram()
+        # Latency of requests that were sent, or that shared (--dedup) a request that was
+        self.latency = LatencyHistogram()
+        self.phases = {phase: LatencyHistogram() for phase in TIMING_PHASES}
+        self.first_token = LatencyHistogram()
+        self.by_vibe: Dict[str, LatencyHistogram] = {}
+        self.by_status: Dict[str, LatencyHistogram] = {}
+        # Byte counts; the histogram's buckets work for any non-negative quantity
+        self.response_bytes = LatencyHistogram()
+        self.response_memory = LatencyHistogram()
+        # Where the time of requests sent in one attempt went (see print_overhead_report)
+        self.overhead = {"harness": LatencyHistogram(), "http client": LatencyHistogram(),
+                         "network+server": LatencyHistogram(), "server handler": LatencyHistogram()}
+        self.overhead_total = 0.0
+        self.wall_total = 0.0
+        # Min-heap of (duration, order, name, scenario), so the fastest of the kept ones is replaced first
+        self.slowest_limit = slowest
+        self._slowest: List[Tuple[float, int, str, Dict]] = []
+        self._order = 0
+
+    @classmethod
+    def from_results(cls, results: List, slowest: int = DEFAULT_SLOWEST) -> "ResultSummary":
+        """Summary of results that were kept in a list"""
+        summary = cls(slowest)
+        for result in results:
+            summary.record(result)
+        return summary
+
+    @property
+    def failures(self) -> int:
+        return self.requests - self.passed
+
+    def record(self, result):
+        """Fold in one TestResult from the harness"""
+        if result.skipped:
+            self.skipped += 1
+            return
+        self.requests += 1
+        self.attempts += result.attempts
+        if result.success:
+            self.passed += 1
+        else:
+            reason = failure_reason(result.message)
+            if reason not in self.reasons and len(self.reasons) >= MAX_REASONS:
+                reason = OTHER_REASONS
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        if "connect" in result.timings:
+            self.new_connections += 1
+        elif "ttfb" in result.timings:
+            self.reused_connections += 1
+        if result.retries:
+            self.retried += 1
+            self.retries += result.retries
+            self.retry_wait += result.retry_wait
+            if result.success:
+                self.retried_then_succeeded += 1
+        if result.throttle_wait > 0:
+            self.throttled += 1
+            self.throttle_wait += result.throttle_wait
+            self.max_throttle_wait = max(self.max_throttle_wait, result.throttle_wait)
+        if result.message.startswith("Circuit open"):
+            self.circuit_open += 1
+        if result.coalesced:
+            self.coalesced += 1
+            if result.success:
+                self.coalesced_wait.record(result.duration)
+        if result.response_memory is not None:
+            self.response_bytes.record(result.response_bytes or 0)
+            self.response_memory.record(result.response_memory)
+        if result.overhead is not None and "ttfb" in result.timings:
+            self._record_overhead(result)
+        if not result.attempts and not result.coalesced:
+            # Nothing was sent, so there is no latency to count
+            return
+        self.latency.record(result.duration)
+        for phase, value in result.timings.items():
+            if phase in self.phases:
+                self.phases[phase].record(value)
+        if "ttft" in result.timings:
+            self.first_token.record(result.timings["ttft"])
+        if "vibe" in result.scenario:
+            self.by_vibe.setdefault(result.scenario["vibe"], LatencyHistogram()).record(result.duration)
+        if "status" in result.scenario:
+            self.by_status.setdefault(result.scenario["status"], LatencyHistogram()).record(result.duration)
+        self._record_slow(result.duration, result.name, result.scenario)
+
+    def _record_overhead(self, result):
+        phases = sum(value for phase, value in result.timings.items() if phase in TIMING_PHASES)
+        # http.client work outside the timed phases: writing the request, parsing the status line and headers
+        client = max(0.0, result.duration - phases)
+        self.overhead["harness"].record(result.overhead)
+        self.overhead["http client"].record(client)
+        self.overhead["network+server"].record(phases)
+        if "handler" in result.server_timing:
+            self.overhead["server handler"].record(result.server_timing["handler"])
+        self.overhead_total += result.overhead + client
+        self.wall_total += result.overhead + result.duration
+
+    def _record_slow(self, duration: float, name: str, scenario: Dict):
+        if not self.slowest_limit:
+            return
+        self._order += 1
+        entry = (duration, self._order, name, dict(scenario))
+        if len(self._slowest) < self.slowest_limit:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Tuple[float, str, Dict]]:
+        """The slowest requests, slowest first: (duration, name, scenario)"""
+        return [(duration, name, scenario) for duration, _, name, scenario in sorted(self._slowest, reverse=True)]
+
+    def top_reasons(self, count: int = 5) -> List[Tuple[str, int]]:
+        """The most common failure reasons, most common first"""
+        return sorted(self.reasons.items(), key=lambda item: -item[1])[:count]
+
+    def merge(self, other: "ResultSummary"):
+        self.requests += other.requests
+        self.passed += other.passed
+        self.skipped += other.skipped
+        self.attempts += other.attempts
+        for reason, count in other.reasons.items():
+            if reason not in self.reasons and len(self.reasons) >= MAX_REASONS:
+                reason = OTHER_REASONS
+            self.reasons[reason] = self.reasons.get(reason, 0) + count
+        self.new_connections += other.new_connections
+        self.reused_connections += other.reused_connections
+        self.retried += other.retried
+        self.retried_then_succeeded += other.retried_then_succeeded
+        self.retries += other.retries
+        self.retry_wait += other.retry_wait
+        self.throttled += other.throttled
+        self.throttle_wait += other.throttle_wait
+        self.max_throttle_wait = max(self.max_throttle_wait, other.max_throttle_wait)
+        self.circuit_open += other.circuit_open
+        self.coalesced += other.coalesced
+        self.coalesced_wait.merge(other.coalesced_wait)
+        self.latency.merge(other.latency)
+        for phase, histogram in other.phases.items():
+            self.phases.setdefault(phase, LatencyHistogram()).merge(histogram)
+        self.first_token.merge(other.first_token)
+        for vibe, histogram in other.by_vibe.items():
+            self.by_vibe.setdefault(vibe, LatencyHistogram()).merge(histogram)
+        for status, histogram in other.by_status.items():
+            self.by_status.setdefault(status, LatencyHistogram()).merge(histogram)
+        self.response_bytes.merge(other.response_bytes)
+        self.response_memory.merge(other.response_memory)
+        for part, histogram in other.overhead.items():
+            self.overhead[part].merge(histogram)
+        self.overhead_total += other.overhead_total
+        self.wall_total += other.wall_total
+        for duration, name, scenario in other.slowest():
+            self._record_slow(duration, name, scenario)
+
+class ResultLog:
+    """Appends full result records as compact JSON lines"""
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open_text(path, "a")
+
+    def write(self, record: Dict):
+        """Append one record (a TestResult.to_dict()); empty fields are left out to keep lines short"""
+        compact = {key: value for key, value in record.items() if value is not None and value != {}}
+        line = json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+_result_log: Optional[ResultLog] = None
+
+def get_result_log() -> Optional[ResultLog]:
+    """Return the process's result log (None unless spilling results)"""
+    return _result_log
+
+def configure_result_log(path: Optional[str] = None) -> Optional[ResultLog]:
+    """Start spilling results to `path` (or stop, if None), closing any previous log"""
+    global _result_log
+    if _result_log is not None:
+        _result_log.close()
+    _result_log = ResultLog(path) if path else None
+    return _result_log
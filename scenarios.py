@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Scenario matrix for sweeping the message endpoint across its input space.
+
+A matrix is described by its axes (name -> list of values). Scenarios can be
+drawn from it with one of three strategies:
+
+    full        every combination (the cross-product of all axes)
+    pairwise    a small set covering every pair of values of any two axes
+    random-N    N distinct combinations sampled uniformly (seeded)
+
+and split into shards with shard(), so a large sweep can be spread across
+processes or machines (--shard 1/4 ... --shard 4/4) without overlap.
+"""
+
+import random
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+# Ranges swept on top of the vibe and status axes
+HEALTH_STREAKS = [0, 1, 7, 30, 120]
+LAST_WATERED_DAYS = [0, 1, 3, 7, 14]
+
+# weatherData payloads, as sent by the iOS app
+WEATHER_PRESETS: Dict[str, Optional[Dict]] = {
+    "none": None,
+    "mild": {"current": {"temperature": 18.0, "humidity": 55.0, "precipitation": 0.0}},
+    "rainy": {"current": {"temperature": 12.5, "humidity": 90.0, "precipitation": 8.0}},
+    "heatwave": {"current": {"temperature": 36.0, "humidity": 20.0, "precipitation": 0.0}},
+    "frost": {"current": {"temperature": -4.0, "humidity": 70.0, "precipitation": 0.5}}
+}
+
+STRATEGIES = ["full", "pairwise", "random-N"]
+
+# Candidate rows tried per pairwise row; more gives slightly smaller sets
+PAIRWISE_CANDIDATES = 30
+
+def matrix_size(axes: Dict[str, List]) -> int:
+    size = 1
+    for values in axes.values():
+        size *= len(values)
+    return size
+
+def full_matrix(axes: Dict[str, List]) -> List[Dict]:
+    """Every combination of axis values, varying the last axis fastest"""
+    names = list(axes)
+    return [dict(zip(names, combination)) for combination in itertools.product(*(axes[name] for name in names))]
+
+def random_matrix(axes: Dict[str, List], count: int, seed: int = 0) -> List[Dict]:
+    """`count` distinct combinations sampled without replacement (all of them if count >= the matrix size)"""
+    names = list(axes)
+    total = matrix_size(axes)
+    scenarios = []
+    for index in sorted(random.Random(seed).sample(range(total), min(count, total))):
+        # Decode the combination index as a mixed-radix number (last axis fastest)
+        scenario = {}
+        for name in reversed(names):
+            index, position = divmod(index, len(axes[name]))
+            scenario[name] = axes[name][position]
+        scenarios.append({name: scenario[name] for name in names})
+    return scenarios
+
+def pairwise_matrix(axes: Dict[str, List], seed: int = 0) -> List[Dict]:
+    """A small set of combinations in which every pair of values of any two axes appears.
+
+    Greedy AETG-style construction: each row starts from an uncovered pair and
+    fills the remaining axes (in random order) with the value covering the most
+    still-uncovered pairs; the best of several candidate rows is kept.
+    """
+    names = list(axes)
+    if len(names) < 2:
+        return full_matrix(axes)
+    rng = random.Random(seed)
+    uncovered = {
+        (a, i, b, j)
+        for a, b in itertools.combinations(range(len(names)), 2)
+        for i in range(len(axes[names[a]]))
+        for j in range(len(axes[names[b]]))
+    }
+
+    def pairs_in(row: Dict[int, int]) -> set:
+        return {(a, row[a], b, row[b]) for a, b in itertools.combinations(sorted(row), 2)}
+
+    rows = []
+    while uncovered:
+        best_row, best_pairs = None, set()
+        for _ in range(PAIRWISE_CANDIDATES):
+            a, i, b, j = rng.choice(sorted(uncovered))
+            row = {a: i, b: j}
+            remaining = [axis for axis in range(len(names)) if axis not in row]
+            rng.shuffle(remaining)
+            for axis in remaining:
+                options = list(range(len(axes[names[axis]])))
+                rng.shuffle(options)
+                row[axis] = max(options, key=lambda value: len(pairs_in({**row, axis: value}) & uncovered))
+            covered = pairs_in(row) & uncovered
+            if len(covered) > len(best_pairs):
+                best_row, best_pairs = row, covered
+        uncovered -= best_pairs
+        rows.append({names[axis]: axes[names[axis]][best_row[axis]] for axis in range(len(names))})
+    return rows
+
+def sample_scenarios(axes: Dict[str, List], strategy: str, seed: int = 0) -> List[Dict]:
+    """Draw scenarios with 'full', 'pairwise' or 'random-N' (e.g. 'random-200')"""
+    if strategy == "full":
+        return full_matrix(axes)
+    if strategy == "pairwise":
+        return pairwise_matrix(axes, seed)
+    if strategy.startswith("random-"):
+        try:
+            count = int(strategy[len("random-"):])
+        except ValueError:
+            count = 0
+        if count < 1:
+            raise ValueError(f"Invalid sample size in '{strategy}' (expected e.g. random-100)")
+        return random_matrix(axes, count, seed)
+    raise ValueError(f"Unknown sampling strategy '{strategy}' (expected one of: {', '.join(STRATEGIES)})")
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse 'i/n' (1-based shard index i of n shards)"""
+    index, _, count = spec.partition("/")
+    try:
+        index_value, count_value = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}' (expected i/n, e.g. 1/4)")
+    if count_value < 1 or not 1 <= index_value <= count_value:
+        raise ValueError(f"Invalid shard '{spec}' (need 1 <= i <= n)")
+    return index_value, count_value
+
+def shard(scenarios: List[Dict], index: int, count: int) -> List[Dict]:
+    """Scenarios belonging to shard `index` of `count` (round-robin, so each shard spans every axis)"""
+    return scenarios[index - 1::count]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical concurrent calls.
+
+Under load many scenarios send byte-identical requests (the same plant,
+vibe, status and weather). SingleFlight lets only the first of a set of
+identical calls that are in flight at the same time go upstream; the others
+wait for it and share its result (or its exception):
+
+    flight = SingleFlight()
+    response, shared = flight.do(payload_key(request_data), lambda: send(request_data))
+
+Calls are only shared while one is in flight; nothing is cached once it
+returns. This is a model of the server-side deduplication the backend could
+do, and shows how much upstream load it would save.
+"""
+
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+def payload_key(payload: Any, *scope: str) -> str:
+    """Hash of a JSON payload's canonical serialization, plus anything else that must match (e.g. the transport)"""
+    serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256()
+    for part in scope:
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(serialized.encode("utf-8"))
+    return digest.hexdigest()
+
+class _Call:
+    """A call in flight that identical calls wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving while it runs get its outcome"""
+    def __init__(self):
+        self._in_flight: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        # Calls actually made, and callers that shared one instead
+        self.calls = 0
+        self.coalesced = 0
+        # Most callers (the first included) that shared a single call
+        self.max_shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """`fn()`'s result, or that of the identical call already in flight; True if shared"""
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_shared = max(self.max_shared, call.waiters + 1)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        with self._lock:
+            del self._in_flight[key]
+        call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result, False
+
+_single_flight: Optional[SingleFlight] = None
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Return the process's request deduplication (None unless configured)"""
+    return _single_flight
+
+def configure_single_flight(enabled: bool = False) -> Optional[SingleFlight]:
+    """Turn deduplication of identical in-flight requests on (with fresh counters) or off"""
+    global _single_flight
+    _single_flight = SingleFlight() if enabled else None
+    return _single_flight
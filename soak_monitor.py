@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Windowed time-series metrics and drift detection for long soak runs.
+
+SoakMonitor buckets request outcomes into fixed windows (a minute by
+default). Every finished window is appended as one JSON line to a rolling
+file (PATH, PATH.1, ... PATH.N) and checked for:
+
+    drift        median latency of the last few windows well above the
+                 baseline set by the first windows of the run
+    cold starts  requests whose server time (TTFB) is several times the
+                 recent median, as when a serverless instance is recycled
+    errors       an error rate above the limit (5% by default), including
+                 windows where every request failed
+    degradation  latency or error rate creeping up over the whole run (a
+                 Theil-Sen slope plus a rank test of early against late
+                 windows), the signature of a leak
+
+Only per-window summaries are kept, so memory stays flat however long the
+run lasts.
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+from harness_metrics import LatencyHistogram, error_rate_p, mann_whitney_p, median
+
+DEFAULT_WINDOW = 60.0  # seconds
+DEFAULT_SOAK_FILE = "soak_metrics.jsonl"
+DEFAULT_MAX_FILE_BYTES = 5 * 1024 * 1024
+DEFAULT_FILE_BACKUPS = 5
+
+# Windows (after the first, warm-up window) whose median p50 is the baseline
+BASELINE_WINDOWS = 5
+# Drift: the median p50 of the last DRIFT_WINDOWS windows is this far above baseline
+DRIFT_WINDOWS = 3
+DEFAULT_DRIFT_THRESHOLD = 0.25
+# Errors: a window's error rate above this (with at least MIN_WINDOW_FAILURES failures);
+# the whole run fails if its overall error rate is above it too
+DEFAULT_ERROR_LIMIT = 0.05
+MIN_WINDOW_FAILURES = 3
+# Cold start: server time at least this many times the recent median
+DEFAULT_COLD_START_FACTOR = 3.0
+# Degradation needs this many windows and this significance
+MIN_TREND_WINDOWS = 9
+TREND_ALPHA = 0.01
+
+def parse_duration(spec: str) -> float:
+    """Parse a duration like '90', '90s', '30m', '2h' or '1h30m' into seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    total = 0.0
+    number = ""
+    for char in spec.strip().lower():
+        if char.isdigit() or char == ".":
+            number += char
+        elif char in units and number:
+            total += float(number) * units[char]
+            number = ""
+        else:
+            raise ValueError(f"Invalid duration '{spec}' (expected e.g. 90s, 30m, 2h or 1h30m)")
+    if number:
+        total += float(number)
+    if total <= 0:
+        raise ValueError(f"Invalid duration '{spec}' (must be positive)")
+    return total
+
+def format_duration(seconds: float) -> str:
+    """Short form of a duration for reports, e.g. 500ms, 45s, 5m or 1h30m"""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 60:
+        return f"{seconds:.3g}s"
+    minutes, secs = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (f"{hours}h" if hours else "") + (f"{minutes}m" if minutes else "") + (f"{secs}s" if secs else "")
+
+def theil_sen_slope(times: List[float], values: List[float]) -> float:
+    """Median slope over all pairs of points (robust to outliers)"""
+    slopes = [
+        (values[j] - values[i]) / (times[j] - times[i])
+        for i in range(len(values))
+        for j in range(i + 1, len(values))
+        if times[j] != times[i]
+    ]
+    return median(slopes) if slopes else 0.0
+
+class SoakWindow:
+    """Outcomes of the requests that finished in one window"""
+    def __init__(self, index: int, started_at: datetime):
+        self.index = index
+        self.started_at = started_at
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.failures = 0
+        # Kept per request for cold-start detection; bounded by the window's request count
+        self.server_times: List[float] = []
+
+class SoakMonitor:
+    """Thread-safe windowed metrics for a soak run, written to a rolling JSON-lines file"""
+    def __init__(self, window: float = DEFAULT_WINDOW, path: str = DEFAULT_SOAK_FILE,
+                 max_bytes: int = DEFAULT_MAX_FILE_BYTES, backups: int = DEFAULT_FILE_BACKUPS,
+                 drift_threshold: float = DEFAULT_DRIFT_THRESHOLD, cold_start_factor: float = DEFAULT_COLD_START_FACTOR,
+                 error_limit: float = DEFAULT_ERROR_LIMIT, run_info: Optional[Dict] = None):
+        self.window = window
+        self.path = path
+        self.drift_threshold = drift_threshold
+        self.error_limit = error_limit
+        self.cold_start_factor = cold_start_factor
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.failures = 0
+        self.cold_starts = 0
+        self.baseline: Optional[float] = None
+        # One summary dict per finished window, as written to the file
+        self.windows: List[Dict] = []
+        # Every flag raised so far, as (kind, message)
+        self.flags: List[Tuple[str, str]] = []
+        self._drifting = False
+        self._erroring = False
+        self._trend_flagged = set()
+        self._start = time.monotonic()
+        self._started_at = datetime.now()
+        self._current = SoakWindow(0, self._started_at)
+        self._lock = threading.Lock()
+
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # A private logger, so the harness's own logging setup doesn't see these lines
+        self._log = logging.Logger("soak_metrics")
+        self._log.addHandler(handler)
+        self._write({"type": "start", "started_at": self._started_at.isoformat(), "window": window, **(run_info or {})})
+
+    def _write(self, entry: Dict):
+        self._log.info(json.dumps(entry))
+
+    def record(self, latency: float, success: bool, server_time: Optional[float] = None) -> List[Dict]:
+        """Record one finished request; returns the summaries of any windows this closed"""
+        with self._lock:
+            closed = []
+            index = int((time.monotonic() - self._start) // self.window)
+            while self._current.index < index:
+                closed.append(self._close_window())
+            window = self._current
+            window.requests += 1
+            self.requests += 1
+            if success:
+                window.histogram.record(latency)
+                window.server_times.append(server_time if server_time is not None else latency)
+            else:
+                window.failures += 1
+                self.failures += 1
+            return closed
+
+    def finish(self) -> Optional[Dict]:
+        """Close the last (partial) window and write the run summary; returns the window if it had requests"""
+        with self._lock:
+            window = self._close_window() if self._current.requests else None
+            self._write({"type": "summary", **self.summary()})
+            for handler in self._log.handlers:
+                handler.close()
+            return window
+
+    def _close_window(self) -> Dict:
+        window = self._current
+        now = time.monotonic()
+        window_end = min(now - self._start, (window.index + 1) * self.window)
+        seconds = window_end - window.index * self.window
+        stats = window.histogram.summary()
+        summary = {
+            "type": "window",
+            "window": window.index,
+            "started_at": window.started_at.isoformat(),
+            "elapsed": round(window_end, 3),
+            "requests": window.requests,
+            "failures": window.failures,
+            "throughput": window.requests / seconds if seconds > 0 else 0.0,
+            "error_rate": window.failures / window.requests if window.requests else 0.0,
+            "p50": stats["p50"],
+            "p90": stats["p90"],
+            "p99": stats["p99"],
+            "max": stats["max"],
+            "server_p50": median(window.server_times) if window.server_times else None,
+            "cold_starts": 0,
+            "flags": []
+        }
+        self.histogram.merge(window.histogram)
+        self._check_cold_starts(window, summary)
+        self.windows.append(summary)
+        self._update_baseline()
+        self._check_drift(summary)
+        self._check_errors(summary)
+        self._check_trends(summary)
+        self._write(summary)
+
+        next_index = window.index + 1
+        self._current = SoakWindow(next_index, self._started_at + timedelta(seconds=next_index * self.window))
+        return summary
+
+    def _flag(self, summary: Dict, kind: str, message: str):
+        summary["flags"].append(f"{kind}: {message}")
+        self.flags.append((kind, message))
+
+    def _recent(self, key: str) -> Optional[float]:
+        """Median of `key` over the last few windows that had successful requests"""
+        recent = [w[key] for w in self.windows if w["requests"] > w["failures"]][-DRIFT_WINDOWS:]
+        return median(recent) if recent else None
+
+    def _check_cold_starts(self, window: SoakWindow, summary: Dict):
+        if not window.server_times:
+            return
+        # Compare against the windows before this one, or this window's own median at the start
+        reference = self._recent("server_p50") or median(window.server_times)
+        spikes = [t for t in window.server_times if t >= self.cold_start_factor * reference]
+        if spikes:
+            summary["cold_starts"] = len(spikes)
+            self.cold_starts += len(spikes)
+            self._flag(summary, "cold start", f"{len(spikes)} requests over {self.cold_start_factor:g}x the {reference:.3f}s median (max {max(spikes):.3f}s)")
+
+    def _update_baseline(self):
+        if self.baseline is not None:
+            return
+        # Skip the first window: it pays for connection setup and any cold start
+        candidates = [w["p50"] for w in self.windows[1:] if w["requests"] > w["failures"]]
+        if len(candidates) >= BASELINE_WINDOWS:
+            self.baseline = median(candidates[:BASELINE_WINDOWS])
+
+    def _check_drift(self, summary: Dict):
+        if self.baseline is None or summary["requests"] == summary["failures"]:
+            return
+        recent = self._recent("p50")
+        drifting = recent is not None and recent > self.baseline * (1 + self.drift_threshold)
+        if drifting and not self._drifting:
+            self._flag(summary, "drift", f"p50 of the last {DRIFT_WINDOWS} windows is {recent:.3f}s, "
+                                         f"{(recent / self.baseline - 1) * 100:.0f}% above the {self.baseline:.3f}s baseline")
+        # Flag each drift episode once; re-arm when latency comes back down
+        self._drifting = drifting
+
+    def _check_errors(self, summary: Dict):
+        # Unlike drift, this needs no baseline: a run failing from the start must be flagged too
+        erroring = summary["error_rate"] > self.error_limit and summary["failures"] >= MIN_WINDOW_FAILURES
+        if erroring and not self._erroring:
+            self._flag(summary, "errors", f"{summary['failures']} of {summary['requests']} requests failed "
+                                          f"({summary['error_rate'] * 100:.1f}%, limit {self.error_limit * 100:g}%)")
+        # Flag each episode once; re-arm when the error rate comes back down
+        self._erroring = erroring
+
+    def _check_trends(self, summary: Dict):
+        windows = [w for w in self.windows if w["requests"]]
+        if len(windows) < MIN_TREND_WINDOWS:
+            return
+        third = len(windows) // 3
+        early, late = windows[:third], windows[-third:]
+
+        if "latency" not in self._trend_flagged and self.baseline is not None:
+            timed = [w for w in windows if w["requests"] > w["failures"]]
+            slope = theil_sen_slope([w["elapsed"] for w in timed], [w["p50"] for w in timed])
+            rise = slope * (timed[-1]["elapsed"] - timed[0]["elapsed"])
+            p_value = mann_whitney_p([w["p50"] for w in early if w["requests"] > w["failures"]],
+                                     [w["p50"] for w in late if w["requests"] > w["failures"]])
+            if rise >= self.drift_threshold * self.baseline and p_value < TREND_ALPHA:
+                self._trend_flagged.add("latency")
+                self._flag(summary, "degradation", f"p50 rising {slope * 3600:.3f}s per hour, {rise:.3f}s over the run (p={p_value:.2g})")
+
+        if "errors" not in self._trend_flagged:
+            early_failures, early_total = sum(w["failures"] for w in early), sum(w["requests"] for w in early)
+            late_failures, late_total = sum(w["failures"] for w in late), sum(w["requests"] for w in late)
+            p_value = error_rate_p(early_failures, early_total, late_failures, late_total)
+            if p_value < TREND_ALPHA:
+                self._trend_flagged.add("errors")
+                self._flag(summary, "degradation", f"error rate up from {early_failures / early_total * 100:.1f}% "
+                                                   f"to {late_failures / late_total * 100:.1f}% (p={p_value:.2g})")
+
+    def summary(self) -> Dict:
+        """Totals for the whole run"""
+        stats = self.histogram.summary()
+        return {
+            "elapsed": round(time.monotonic() - self._start, 3),
+            "windows": len(self.windows),
+            "requests": self.requests,
+            "failures": self.failures,
+            "p50": stats["p50"],
+            "p99": stats["p99"],
+            "max": stats["max"],
+            "baseline_p50": self.baseline,
+            "cold_starts": self.cold_starts,
+            "flags": [f"{kind}: {message}" for kind, message in self.flags]
+        }
+
+    @property
+    def too_many_failures(self) -> bool:
+        """True if the run's overall error rate is above the limit"""
+        return self.requests > 0 and self.failures > self.error_limit * self.requests
+
+    @property
+    def regressed(self) -> bool:
+        """True if drift, degradation or errors were flagged (cold starts alone are expected on serverless)"""
+        return any(kind != "cold start" for kind, _ in self.flags)
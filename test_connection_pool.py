@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Checks for keep-alive connection pooling in http_client.py.
+
+Run with: python3 -m unittest test_connection_pool
+"""
+
+import socket
+import resource
+import unittest
+import http.client
+
+from http_client import HTTPClient, _is_dropped
+from mock_server import MockConfig, start_mock_server
+
+# Enough open descriptors that new sockets land above select()'s FD_SETSIZE (1024)
+HIGH_FD_FILLERS = 1100
+
+class HighDescriptorTest(unittest.TestCase):
+    """Pooling keeps working once the process holds more than 1024 descriptors"""
+    def setUp(self):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = HIGH_FD_FILLERS + 256
+        if soft < needed:
+            if hard != resource.RLIM_INFINITY and hard < needed:
+                self.skipTest(f"needs {needed} open files, the limit is {hard}")
+            resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+        self.fillers = [socket.socket() for _ in range(HIGH_FD_FILLERS)]
+
+    def tearDown(self):
+        for filler in self.fillers:
+            filler.close()
+
+    def _connection(self) -> "tuple[http.client.HTTPConnection, socket.socket]":
+        ours, theirs = socket.socketpair()
+        self.addCleanup(ours.close)
+        self.addCleanup(theirs.close)
+        self.assertGreaterEqual(ours.fileno(), 1024)
+        conn = http.client.HTTPConnection("localhost")
+        conn.sock = ours
+        return conn, theirs
+
+    def test_idle_connection_is_kept(self):
+        conn, _ = self._connection()
+        self.assertFalse(_is_dropped(conn))
+
+    def test_closed_connection_is_dropped(self):
+        conn, theirs = self._connection()
+        theirs.close()
+        self.assertTrue(_is_dropped(conn))
+
+    def test_unexpected_bytes_drop_a_plain_connection(self):
+        conn, theirs = self._connection()
+        theirs.sendall(b"HTTP/1.1 408 Request Timeout\r\n\r\n")
+        self.assertTrue(_is_dropped(conn))
+
+    def test_requests_reuse_connections(self):
+        server = start_mock_server(MockConfig(latency="fixed:1"))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = HTTPClient()
+        self.addCleanup(client.close)
+        responses = [client.request("GET", f"{server.url}/") for _ in range(5)]
+        self.assertEqual([response.reused for response in responses], [False, True, True, True, True])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,27 +5,127 @@ Tests the /api/generate-message endpoint that the iOS app uses.
 
 Usage:
     python3 test_harness.py [--url URL] [--vibe VIBE] [--all]
+    python3 test_harness.py --load [--concurrency N] [--rps RPS] [--duration SECS | --requests N]
+    python3 test_harness.py --load --output json --output-file baseline.json
+    python3 test_harness.py --load --compare baseline.json
+    python3 test_harness.py --matrix pairwise|full|random-N [--shard I/N] [--workers N]
+    python3 test_harness.py --soak 4h [--rps RPS] [--soak-window SECS] [--soak-file PATH] [--soak-error-limit PCT]
+    python3 test_harness.py --cold-start [--idle-gaps 5s,1m,5m,15m] [--cold-rates 0.05,0.2,1]
+    python3 test_harness.py --load --transport backend,gemini
+    python3 test_harness.py --find-capacity [rps|concurrency] [--slo p99<3s,errors<1%] [--capacity-search binary|step]
+    python3 test_harness.py --simulate 5000 [--sim-window 10m] [--arrivals burst:0.6:30s] [--plants-per-user 2.5]
+    python3 test_harness.py --load --record capture.jsonl
+    python3 test_harness.py --replay capture.jsonl [--replay-speed 2] [--mock --mock-replay capture.jsonl]
 
 Options:
     --url URL          Backend API URL (default: https://root-mate.vercel.app)
+    --transport LIST   Send messages through backend, gemini (direct) and/or mock, side by side (default: backend)
     --vibe VIBE        Test specific vibe (Drama Queen, Chill Roomie, etc.)
     --all              Run all test suites
     --quick            Run quick connectivity test only
+    --load             Drive the endpoint concurrently and report throughput
+    --concurrency N    Maximum requests in flight during --load (default: 10; --simulate: 100 sessions per worker)
+    --rps RPS          Target request rate for --load (default: as fast as concurrency allows)
+    --duration SECS    Stop --load after this many seconds
+    --requests N       Stop --load after this many requests (default: 100)
+    --soak DURATION    Hold a steady --rps (default: 1) for e.g. 90m or 4h, flagging drift and cold starts
+    --soak-window SECS Length of each time-series window for --soak (default: 60)
+    --soak-file PATH   Rolling JSON-lines file for the --soak windows (default: soak_metrics.jsonl)
+    --soak-error-limit PCT  Error rate above which a --soak window is flagged and the run fails (default: 5)
+    --cold-start       Profile cold against warm invocations using idle gaps and request rates
+    --idle-gaps LIST   Idle gaps before each --cold-start probe (default: 5s,1m,5m,15m)
+    --cold-samples N   Probes per idle gap (default: 3)
+    --cold-rates LIST  Request rates (req/s) whose cold-start frequency is measured (default: 0.05,0.2,1)
+    --find-capacity [DIM]  Ramp the request rate (rps, default) or concurrency until the --slo breaks
+    --slo SPEC         Limits for --find-capacity, e.g. p99<3s,p50<1s,errors<1% (default: p99<3s,errors<1%)
+    --capacity-search S  binary (double, then bisect) or step (add --capacity-step each level) (default: binary)
+    --capacity-start N Level to start from (default: 1); --capacity-step N and --capacity-max N bound the ramp
+    --hold DURATION    How long each --find-capacity level is held (default: 30s)
+    --simulate USERS   Simulate USERS app users, each asking for a message per plant, across a process pool
+    --sim-window DURATION  Time over which the --simulate users arrive (default: 10m)
+    --arrivals SPEC    When users arrive: uniform, or burst[:FRACTION[:DECAY]] after a notification (default: burst)
+    --plants-per-user MEAN  Mean plants per simulated user (default: 2.5)
+    --no-pool          Open a new connection (and TLS handshake) for every request
+    --full-json        Read and parse whole response bodies instead of extracting the message incrementally
+    --memory           Trace heap use (tracemalloc) and report peak memory per in-flight request
+    --profile [KIND]   Profile the harness (sample: flame graph stacks, default; cprofile: pstats) and report its own overhead
+    --profile-file PATH  Where --profile writes (default: harness_profile.folded or harness_profile.pstats)
+    --batch N          Generate messages for N plants through the batched endpoint
+    --matrix STRATEGY  Sweep vibes x statuses x streaks x last-watered x weather: full, pairwise or random-N
+    --no-validate      Skip the background checks of message quality (length, vibe, emoji, fallback text)
+    --record FILE      Append every message request and its response to a capture file (.jsonl, or .jsonl.gz)
+    --replay FILE      Re-send the requests in a capture at their original spacing (see --replay-speed)
+    --replay-speed X   Replay captured time X times faster, e.g. 2 or 0.5 (default: 1)
+    --results-log FILE Spill every --load, --replay and --soak result to a JSON-lines file (results are otherwise
+                       only summarized, so memory stays flat however long the run)
+    --dedup            Send identical requests that are in flight at the same time only once, and count the shared ones
+    --weather [MODE]   Use real forecasts for weather tests and the matrix's weather axis (a few cities instead of
+                       presets): live (Open-Meteo, default), fixtures (offline) or record (fetch and save as fixtures)
+    --weather-fixtures PATH  Forecasts used and written by --weather fixtures/record (default: weather_fixtures.json)
+    --shard I/N        Run only shard I of N of the matrix (for splitting a sweep across machines)
+    --workers N        Split the matrix (or shard) across N worker processes (--simulate: one per CPU)
+    --stream           Stream messages as they are generated and report time-to-first-token
+    --mock             Run against a local mock backend instead of --url (see mock_server.py)
+    --mock-latency SPEC  Model latency for --mock, e.g. lognormal:600:0.4 (milliseconds)
+    --mock-error-429 RATE  Fraction of --mock requests answered with 429 (likewise --mock-error-500)
+    --mock-idle-timeout SECS  Recycle idle --mock backend instances, which then start cold (see --mock-cold-start)
+    --mock-replay FILE Have --mock answer with the responses and server times in a capture instead of modeled ones
+    --output FORMAT    Also write every result as json or csv (see --output-file)
+    --compare FILE     Compare with a baseline written by --output json; exit 1 on a significant regression
+    --budget LIMIT     Stop before going over a token and/or cost limit (e.g. 250k, $0.50)
+    --max-retries N    Retry 429/5xx responses and connection errors with backoff (default: 3)
+    --rate-limit RPS   Never send more than RPS requests per second, retries included
+    --burst N          Requests allowed in a burst under --rate-limit
 """
 
 import os
 import sys
+import csv
 import json
-import urllib.request
-import urllib.parse
-import ssl
 import argparse
+import functools
+import threading
+import time
+import multiprocessing
+from queue import Empty
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Tuple
+from typing import Callable, Optional, Dict, List, Tuple
+
+from http_client import (
+    DEFAULT_MAX_IDLE_PER_HOST, READ_BUFFER_SIZE, TIMING_PHASES, configure_client, get_buffer_pool, get_client, iter_sse_data,
+    parse_server_timing, ssl_context_time, stream_request, timed_request
+)
+from harness_metrics import (
+    LatencyHistogram, REPORT_PERCENTILES, configure_memory_profile, error_rate_p, format_bytes, get_memory_profile, mann_whitney_p, median
+)
+from mock_server import DEFAULT_COLD_START, DEFAULT_LATENCY, GEMINI_MODELS_PATH, MockConfig, start_mock_server
+from request_scheduler import DEFAULT_MAX_RETRIES, CircuitOpenError, RequestStats, configure_scheduler, get_scheduler
+from prompt_templates import estimate_tokens, format_prompt_stats, get_system_prompt
+from token_accounting import BudgetExceeded, TokenUsage, configure_ledger, get_ledger, parse_budget
+from cold_start_profiler import ColdStartProfile, server_time
+from harness_profiler import DEFAULT_PROFILE_FILES, DEFAULT_PROFILER, PROFILERS, OutputTimer, create_profiler
+from soak_monitor import BASELINE_WINDOWS, DEFAULT_ERROR_LIMIT, DEFAULT_SOAK_FILE, DEFAULT_WINDOW, SoakMonitor, format_duration, parse_duration
+from transports import BACKEND_ENDPOINT, GEMINI_BASE_URL, TRANSPORTS, Transport, create_transport, parse_transports
+from user_simulator import (
+    DEFAULT_ARRIVALS, DEFAULT_PLANTS_PER_USER, ArrivalProfile, SimulationStats, VirtualUser, generate_users, plant_request
+)
+from capacity_search import (
+    DEFAULT_HOLD, DEFAULT_SLO, DEFAULT_STRATEGY, STRATEGIES as SEARCH_STRATEGIES, CapacitySearch, CapacityStep, SLO, find_knee
+)
+from weather_provider import (
+    DEFAULT_FIXTURES_PATH as DEFAULT_WEATHER_FIXTURES, DEFAULT_WEATHER_MODE, MODES as WEATHER_MODES, WEATHER_LOCATIONS,
+    WeatherUnavailable, configure_weather_provider, get_weather_provider
+)
+from quality_validator import ISSUES, MAX_SENTENCES, check_message, configure_quality_validator, get_quality_validator
+from single_flight import configure_single_flight, get_single_flight, payload_key
+from result_aggregator import ResultSummary, configure_result_log, get_result_log
+from traffic_capture import DEFAULT_REPLAY_SPEED, ReplaySchedule, configure_capture, get_capture, load_capture, rebase_request
+from scenarios import HEALTH_STREAKS, LAST_WATERED_DAYS, STRATEGIES, WEATHER_PRESETS, matrix_size, parse_shard, sample_scenarios, shard
 
 # Default configuration
 DEFAULT_BACKEND_URL = "https://root-mate.vercel.app"
-API_ENDPOINT = "/api/generate-message"
+API_ENDPOINT = BACKEND_ENDPOINT
 
 # Plant vibes
 PLANT_VIBES = [
@@ -39,6 +139,48 @@ PLANT_VIBES = [
 # Plant statuses
 PLANT_STATUSES = ["Hydrated", "Thirsty", "Critical"]
 
+# Where the weather test's plant lives when --weather looks up real forecasts
+WEATHER_TEST_LOCATION = "Edinburgh, Scotland"
+
+# Plants per batched request (matches MAX_BATCH_SIZE in api/generate-message.ts)
+MAX_BATCH_SIZE = 25
+
+# Load test defaults
+DEFAULT_LOAD_CONCURRENCY = 10
+DEFAULT_LOAD_REQUESTS = 100
+DEFAULT_SOAK_RPS = 1.0
+
+# Cold-start profiler defaults: idle gaps to probe, probes per gap, and rates to sample
+DEFAULT_IDLE_GAPS = "5s,1m,5m,15m"
+DEFAULT_COLD_SAMPLES = 3
+DEFAULT_COLD_RATES = "0.05,0.2,1"
+DEFAULT_COLD_RATE_REQUESTS = 20
+
+# Capacity search: requests allowed in flight while a request rate is held
+DEFAULT_CAPACITY_CONCURRENCY = 200
+
+# User simulation: sessions in flight per worker process, and how the workers report back
+DEFAULT_SIMULATION_WINDOW = "10m"
+DEFAULT_SIMULATION_CONCURRENCY = 100
+SIMULATION_STARTUP = 3.0  # seconds for the worker processes to start before the first arrival
+SIMULATION_REPORT_INTERVAL = 1.0  # seconds between stats messages from each worker
+SIMULATION_PRINT_INTERVAL = 5.0  # seconds between progress lines
+SIMULATION_LAG_WARNING = 1.0  # p99 session start lag (seconds) that means the simulator fell behind
+
+# Baseline comparison: a change must be both significant and large enough to matter
+DEFAULT_REGRESSION_ALPHA = 0.01
+DEFAULT_REGRESSION_THRESHOLD = 0.10  # fractional slowdown of the median
+MIN_COMPARE_SAMPLES = 5
+
+# Smallest rise in the fallback rate from the least to the most loaded windows that the quality report warns about
+QUALITY_FALLBACK_RISE = 0.02
+# Messages sampled by the --diagnose length check, and the share of them allowed over the sentence limit
+LENGTH_CHECK_SAMPLES = 10
+LENGTH_CHECK_LIMIT = 0.05
+
+# Time spent in the print_* helpers, reported by --profile
+OUTPUT_TIMER = OutputTimer()
+
 class Colors:
     """ANSI color codes for terminal output"""
     GREEN = '\033[92m'
@@ -51,66 +193,119 @@ class Colors:
 
 class TestResult:
     """Represents a test result"""
-    def __init__(self, name: str, success: bool, message: str, duration: float = 0.0):
+    # Load runs create these by the million; slots keep each one small
+    __slots__ = (
+        "name", "success", "message", "duration", "timings", "status_code", "response_bytes", "response_memory",
+        "overhead", "coalesced", "quality", "scenario", "attempts", "retries", "retry_wait", "throttle_wait", "usage",
+        "skipped", "server_timing", "instance", "timestamp"
+    )
+    
+    def __init__(self, name: str, success: bool, message: str, duration: float = 0.0,
+                 timings: Optional[Dict[str, float]] = None, status_code: Optional[int] = None,
+                 scenario: Optional[Dict] = None, stats: Optional[RequestStats] = None,
+                 response_bytes: Optional[int] = None, usage: Optional[TokenUsage] = None,
+                 skipped: bool = False, server_timing: Optional[Dict[str, float]] = None,
+                 instance: Optional[str] = None, response_memory: Optional[int] = None,
+                 overhead: Optional[float] = None, coalesced: bool = False):
         self.name = name
         self.success = success
         self.message = message
         self.duration = duration
-        self.timestamp = datetime.now()
+        self.timings = timings or {}
+        self.status_code = status_code
+        self.response_bytes = response_bytes
+        # Most body bytes held at once while the response was read (see http_client.TimedResponse)
+        self.response_memory = response_memory
+        # Time spent in the harness itself (building the request, handling the response), outside `duration`
+        self.overhead = overhead
+        # Shared the response of an identical request already in flight (--dedup) instead of sending its own
+        self.coalesced = coalesced
+        # Issue codes from the quality validator (see quality_validator.ISSUES), set once it has checked the message
+        self.quality: Optional[List[str]] = None
+        self.scenario = scenario or {}
+        # Retries and rate-limiter waits are kept out of `duration` (the final attempt)
+        self.attempts = stats.attempts if stats else 1
+        self.retries = stats.retries if stats else 0
+        self.retry_wait = stats.retry_wait if stats else 0.0
+        self.throttle_wait = stats.throttle_wait if stats else 0.0
+        self.usage = usage
+        # Not sent at all (e.g. the token budget ran out)
+        self.skipped = skipped
+        # Backend-reported durations in seconds (handler, gemini, cold) and the instance that answered
+        self.server_timing = server_timing or {}
+        self.instance = instance
+        self.timestamp = time.time()
+    
+    def to_dict(self) -> Dict:
+        """Plain-data form used by --output and --compare"""
+        return {
+            "name": self.name,
+            "success": self.success,
+            "message": self.message,
+            "duration": self.duration,
+            "status_code": self.status_code,
+            "response_bytes": self.response_bytes,
+            "response_memory": self.response_memory,
+            "overhead": self.overhead,
+            "coalesced": self.coalesced,
+            "quality": self.quality,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retry_wait": self.retry_wait,
+            "throttle_wait": self.throttle_wait,
+            "prompt_tokens": self.usage.prompt_tokens if self.usage else None,
+            "output_tokens": self.usage.output_tokens if self.usage else None,
+            "cost": self.usage.cost(get_ledger().model) if self.usage else None,
+            "usage_estimated": self.usage.estimated if self.usage else None,
+            "skipped": self.skipped,
+            "timings": self.timings,
+            "server_timing": self.server_timing,
+            "instance": self.instance,
+            "scenario": self.scenario,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+def timed_output(func: Callable) -> Callable:
+    """Count the time a print helper takes against OUTPUT_TIMER"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            OUTPUT_TIMER.record(time.perf_counter() - started)
+    return wrapper
 
+@timed_output
 def print_header(text: str):
     """Print a formatted header"""
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.CYAN}{text.center(70)}{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
 
+@timed_output
 def print_success(text: str):
     """Print success message"""
     print(f"{Colors.GREEN}✅ {text}{Colors.RESET}")
 
+@timed_output
 def print_error(text: str):
     """Print error message"""
     print(f"{Colors.RED}❌ {text}{Colors.RESET}")
 
+@timed_output
 def print_warning(text: str):
     """Print warning message"""
     print(f"{Colors.YELLOW}⚠️  {text}{Colors.RESET}")
 
+@timed_output
 def print_info(text: str):
     """Print info message"""
     print(f"{Colors.BLUE}ℹ️  {text}{Colors.RESET}")
 
-def get_system_prompt(species: str, vibe: str) -> str:
-    """Generate system prompt based on plant species and vibe"""
-    base_prompt = f"You are {species}, a houseplant with a {vibe} personality. Write a short, engaging daily message (2-3 sentences max) from the plant's perspective."
-    
-    vibe_prompts = {
-        "Drama Queen": """
-PERSONALITY: Dramatic, attention-seeking, uses Gen-Z slang (no cap, periodt, bestie, fr fr, it's giving, etc.)
-STYLE: Melodramatic, expressive, uses emojis liberally, makes everything about yourself""",
-        
-        "Chill Roomie": """
-PERSONALITY: Laid-back, friendly, easy-going, supportive
-STYLE: Casual, warm, like a good friend, relaxed""",
-        
-        "Grumpy Senior": """
-PERSONALITY: Wise but grumpy, old-timer who's seen it all, disciplined
-STYLE: Dry humor, occasional complaints, but caring deep down""",
-        
-        "Sunshine Buddy": """
-PERSONALITY: Cheerful, optimistic, full of positive energy, enthusiastic
-STYLE: Upbeat, encouraging, happy vibes, lots of positivity""",
-        
-        "Zen Master": """
-PERSONALITY: Calm, wise, philosophical, meditative
-STYLE: Thoughtful, mindful, peaceful, offers gentle wisdom"""
-    }
-    
-    return base_prompt + vibe_prompts.get(vibe, "")
-
 def test_api_connectivity(base_url: str) -> TestResult:
     """Test basic API connectivity"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     url = f"{base_url}{API_ENDPOINT}"
     
     try:
@@ -126,54 +321,58 @@ def test_api_connectivity(base_url: str) -> TestResult:
             "systemPrompt": "You are a test plant."
         }
         
-        req = urllib.request.Request(url, method="POST")
-        req.add_header("Content-Type", "application/json")
-        data = json.dumps(test_data).encode('utf-8')
-        req.data = data
-        
-        # Create SSL context that doesn't verify certificates (for testing)
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        response = timed_request(
+            "POST",
+            url,
+            body=json.dumps(test_data).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            timeout=10,
+            extract=[("message",)]
+        )
+        duration = response.total
+        server_timing, instance = read_server_timing(response.headers)
+        # A single request can't tell a slow endpoint from a cold one; say when it was cold
+        cold_note = f", cold start {server_timing['cold']:.2f}s" if "cold" in server_timing else ""
         
-        with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
-            if response.status == 200:
-                result_data = json.loads(response.read().decode('utf-8'))
-                duration = (datetime.now() - start_time).total_seconds()
-                
-                if "message" in result_data and result_data["message"]:
-                    return TestResult(
-                        "API Connectivity",
-                        True,
-                        f"Successfully connected to {base_url} (Status: {response.status}, Duration: {duration:.2f}s)",
-                        duration
-                    )
-                else:
-                    return TestResult(
-                        "API Connectivity",
-                        False,
-                        "Connected but received empty message",
-                        duration
-                    )
+        if response.status == 200:
+            result_data = response.json()
+            
+            if "message" in result_data and result_data["message"]:
+                return TestResult(
+                    "API Connectivity",
+                    True,
+                    f"Successfully connected to {base_url} (Status: {response.status}, Duration: {duration:.2f}s{cold_note})",
+                    duration,
+                    timings=response.timings,
+                    status_code=response.status,
+                    response_bytes=response.size,
+                    response_memory=response.memory,
+                    server_timing=server_timing,
+                    instance=instance
+                )
             else:
-                duration = (datetime.now() - start_time).total_seconds()
                 return TestResult(
                     "API Connectivity",
                     False,
-                    f"HTTP {response.status}: {response.read().decode('utf-8')}",
-                    duration
+                    "Connected but received empty message",
+                    duration,
+                    timings=response.timings,
+                    status_code=response.status,
+                    response_bytes=response.size
                 )
-    except urllib.error.HTTPError as e:
-        duration = (datetime.now() - start_time).total_seconds()
-        error_body = e.read().decode('utf-8') if e.fp else "No error details"
-        return TestResult(
-            "API Connectivity",
-            False,
-            f"HTTP {e.code}: {error_body}",
-            duration
-        )
+        else:
+            error_body = response.text() or "No error details"
+            return TestResult(
+                "API Connectivity",
+                False,
+                f"HTTP {response.status}: {error_body}",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
+            )
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         return TestResult(
             "API Connectivity",
             False,
@@ -181,8 +380,7 @@ def test_api_connectivity(base_url: str) -> TestResult:
             duration
         )
 
-def test_message_generation(
-    base_url: str,
+def build_request_data(
     nickname: str,
     species: str,
     vibe: str,
@@ -190,13 +388,11 @@ def test_message_generation(
     health_streak: int = 5,
     last_watered_days_ago: int = 3,
     weather_data: Optional[Dict] = None
-) -> TestResult:
-    """Test message generation for a specific plant configuration"""
-    start_time = datetime.now()
-    url = f"{base_url}{API_ENDPOINT}"
-    
-    # Calculate last watered date
-    last_watered = (datetime.now() - timedelta(days=last_watered_days_ago)).isoformat() + "Z"
+) -> Dict:
+    """Build the /api/generate-message request body for one plant"""
+    # Calculate last watered date, to the minute so that identical plants build identical payloads
+    now = datetime.now().replace(second=0, microsecond=0)
+    last_watered = (now - timedelta(days=last_watered_days_ago)).isoformat() + "Z"
     
     system_prompt = get_system_prompt(species, vibe)
     
@@ -215,70 +411,431 @@ def test_message_generation(
     if weather_data:
         request_data["weatherData"] = weather_data
     
+    return request_data
+
+def estimate_prompt_tokens(entries: List[Dict]) -> int:
+    """Rough size of the prompt the backend builds from these request entries"""
+    return sum(estimate_tokens(entry["systemPrompt"]) + estimate_tokens(json.dumps(entry["plant"])) for entry in entries)
+
+def settle_usage(reservation: TokenUsage, usage: Optional[TokenUsage], entries: List[Dict], messages: List[str]) -> TokenUsage:
+    """Book a response's token usage per plant (estimated if it wasn't reported)"""
+    if usage is None:
+        usage = TokenUsage(reservation.prompt_tokens, sum(estimate_tokens(message) for message in messages), estimated=True)
+    get_ledger().settle(
+        reservation,
+        usage.split([len(message) for message in messages]),
+        [{"vibe": entry["plant"]["vibe"], "species": entry["plant"]["species"]} for entry in entries]
+    )
+    return usage
+
+def read_server_timing(headers: Dict[str, str]) -> Tuple[Dict[str, float], Optional[str]]:
+    """Durations (in seconds) and instance id from the backend's Server-Timing header"""
+    metrics = parse_server_timing(headers.get("server-timing"))
+    durations = {}
+    for name, params in metrics.items():
+        try:
+            durations[name] = float(params["dur"]) / 1000
+        except (KeyError, ValueError):
+            pass
+    return durations, metrics.get("instance", {}).get("desc")
+
+def capture_response(transport: Transport, request_data: Dict, start_time: float, response, server_timing: Dict[str, float]):
+    """Append a request and the response it got to the running capture"""
+    usage = response.usage
+    get_capture().record(
+        transport.name,
+        request_data,
+        # When the request was built, on the wall clock
+        time.time() - (time.perf_counter() - start_time),
+        response.status,
+        response.total,
+        message=response.message,
+        error=response.error,
+        usage=(usage.prompt_tokens, usage.output_tokens) if usage is not None and not usage.estimated else None,
+        server=server_timing.get("handler"),
+        size=response.size
+    )
+
+def harness_overhead(start_time: float, response, stats: RequestStats) -> Optional[float]:
+    """Time since `start_time` spent outside the request itself and the rate limiter.
+    
+    None after retries, since only the last attempt is timed.
+    """
+    if stats.attempts != 1:
+        return None
+    return max(0.0, time.perf_counter() - start_time - response.total - stats.throttle_wait)
+
+def test_message_generation(
+    transport: Transport,
+    nickname: str,
+    species: str,
+    vibe: str,
+    status: str = "Hydrated",
+    health_streak: int = 5,
+    last_watered_days_ago: int = 3,
+    weather_data: Optional[Dict] = None
+) -> TestResult:
+    """Test message generation for a specific plant configuration, sent through `transport`"""
+    start_time = time.perf_counter()
+    request_data = build_request_data(
+        nickname, species, vibe, status, health_streak, last_watered_days_ago, weather_data
+    )
+    return send_message_request(transport, request_data, start_time)
+
+def send_message_request(transport: Transport, request_data: Dict, start_time: Optional[float] = None) -> TestResult:
+    """Send one /api/generate-message request body through `transport` and time it.
+    
+    `start_time` (a perf_counter time) is when building the request began, for
+    the harness overhead; the request is recorded when a capture is running.
+    """
+    if start_time is None:
+        start_time = time.perf_counter()
+    plant = request_data["plant"]
+    vibe = plant["vibe"]
+    name = f"Message Generation ({plant['nickname']})"
+    scenario = {"species": plant["species"], "vibe": vibe, "status": plant["status"]}
+    
+    try:
+        reservation = get_ledger().reserve(estimate_prompt_tokens([request_data]))
+    except BudgetExceeded as e:
+        return TestResult(name, False, f"Skipped: {e}", scenario=scenario, skipped=True)
+    
+    usage = None
+    stats = RequestStats()
+    send = lambda: get_scheduler().send(lambda: transport.send(request_data, timeout=30), stats)
+    get_memory_profile().enter()
     try:
-        req = urllib.request.Request(url, method="POST")
-        req.add_header("Content-Type", "application/json")
-        data = json.dumps(request_data).encode('utf-8')
-        req.data = data
+        shared = False
+        if get_single_flight() is not None:
+            joined = time.perf_counter()
+            response, shared = get_single_flight().do(payload_key(request_data, transport.name), send)
+        else:
+            response = send()
+        # A shared response took as long as this request waited for it
+        duration = time.perf_counter() - joined if shared else response.total
+        server_timing, instance = read_server_timing(response.headers)
+        if get_capture() is not None and not shared:
+            capture_response(transport, request_data, start_time, response, server_timing)
+        
+        if response.message is not None and shared:
+            # The request that went upstream books the tokens
+            message = response.message
+            result = TestResult(
+                name,
+                True,
+                f"Shared an identical in-flight request ({len(message)} chars, {duration:.2f}s):\n    {message[:100]}{'...' if len(message) > 100 else ''}",
+                duration,
+                status_code=response.status,
+                response_bytes=response.size,
+                scenario=scenario,
+                stats=stats,
+                server_timing=server_timing,
+                instance=instance,
+                coalesced=True
+            )
+            # Checked like any other message, so quality counts are per request with or without --dedup
+            if get_quality_validator() is not None:
+                get_quality_validator().submit(message, vibe, result)
+            return result
+        if response.message is not None:
+            message = response.message
+            usage = settle_usage(reservation, response.usage, [request_data], [message])
+            overhead = harness_overhead(start_time, response, stats)
+            result = TestResult(
+                name,
+                True,
+                f"Generated message ({len(message)} chars, {usage.output_tokens} tokens, {duration:.2f}s):\n    {message[:100]}{'...' if len(message) > 100 else ''}",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size,
+                response_memory=response.memory,
+                scenario=scenario,
+                stats=stats,
+                usage=usage,
+                server_timing=server_timing,
+                instance=instance,
+                overhead=overhead
+            )
+            # Checked on the validator's threads, after the request has been timed
+            if get_quality_validator() is not None:
+                get_quality_validator().submit(message, vibe, result)
+            return result
+        else:
+            return TestResult(
+                name,
+                False,
+                response.error,
+                duration,
+                timings={} if shared else response.timings,
+                status_code=response.status,
+                response_bytes=response.size,
+                scenario=scenario,
+                stats=stats,
+                server_timing=server_timing,
+                instance=instance,
+                overhead=None if shared else harness_overhead(start_time, response, stats),
+                coalesced=shared
+            )
+    except Exception as e:
+        duration = time.perf_counter() - start_time - stats.retry_wait - stats.throttle_wait
+        if get_capture() is not None and not isinstance(e, CircuitOpenError):
+            get_capture().record(transport.name, request_data, time.time() - (time.perf_counter() - start_time), None,
+                                 duration, error=f"Request failed: {str(e)}")
+        return TestResult(
+            name,
+            False,
+            str(e) if isinstance(e, CircuitOpenError) else f"Request failed: {str(e)}",
+            duration,
+            scenario=scenario,
+            stats=stats
+        )
+    finally:
+        get_memory_profile().exit()
+        if usage is None:
+            # Nothing billed: free the reserved budget
+            get_ledger().release(reservation)
+
+def test_streaming_generation(
+    base_url: str,
+    nickname: str,
+    species: str,
+    vibe: str,
+    status: str = "Hydrated",
+    health_streak: int = 5,
+    last_watered_days_ago: int = 3,
+    weather_data: Optional[Dict] = None
+) -> TestResult:
+    """Test streamed message generation, timing the first text chunk separately"""
+    start_time = time.perf_counter()
+    url = f"{base_url}{API_ENDPOINT}"
+    name = f"Streamed Generation ({nickname})"
+    scenario = {"species": species, "vibe": vibe, "status": status}
+    
+    request_data = build_request_data(
+        nickname, species, vibe, status, health_streak, last_watered_days_ago, weather_data
+    )
+    request_data["stream"] = True
+    
+    def send_attempt():
+        # Time to first token counts from the attempt that succeeded, not from the first retry
+        nonlocal start_time
+        start_time = time.perf_counter()
+        return stream_request(
+            "POST",
+            url,
+            body=json.dumps(request_data).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+    
+    try:
+        reservation = get_ledger().reserve(estimate_prompt_tokens([request_data]))
+    except BudgetExceeded as e:
+        return TestResult(name, False, f"Skipped: {e}", scenario=scenario, skipped=True)
+    
+    usage = None
+    stats = RequestStats()
+    try:
+        response = get_scheduler().send(send_attempt, stats)
+        
+        if response.status != 200:
+            error_body = response.read().decode('utf-8', errors='replace') or "No error details"
+            try:
+                error_msg = json.loads(error_body).get("error", error_body)
+            except:
+                error_msg = error_body
+            return TestResult(
+                name,
+                False,
+                f"HTTP {response.status}: {error_msg}",
+                response.total,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.bytes_read,
+                scenario=scenario,
+                stats=stats
+            )
         
-        # Create SSL context that doesn't verify certificates (for testing)
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        chunks = []
+        error_msg = None
+        usage_data = None
+        with response:
+            for data in iter_sse_data(response.iter_lines()):
+                if data == "[DONE]":
+                    continue
+                event = json.loads(data)
+                if "error" in event:
+                    error_msg = event["error"]
+                elif "usage" in event:
+                    usage_data = event["usage"]
+                elif event.get("text"):
+                    if not chunks:
+                        response.timings["ttft"] = time.perf_counter() - start_time
+                    chunks.append(event["text"])
+        duration = time.perf_counter() - start_time
+        message = "".join(chunks)
+        if message:
+            usage = settle_usage(reservation, TokenUsage.from_backend(usage_data), [request_data], [message])
+        
+        if error_msg or not message:
+            return TestResult(
+                name,
+                False,
+                f"Stream failed: {error_msg or 'no text received'}",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.bytes_read,
+                scenario=scenario,
+                stats=stats,
+                usage=usage
+            )
+        return TestResult(
+            name,
+            True,
+            f"Streamed message ({len(chunks)} chunks, first token {response.timings['ttft']:.2f}s, total {duration:.2f}s):\n    {message[:100]}{'...' if len(message) > 100 else ''}",
+            duration,
+            timings=response.timings,
+            status_code=response.status,
+            response_bytes=response.bytes_read,
+            scenario=scenario,
+            stats=stats,
+            usage=usage
+        )
+    except Exception as e:
+        duration = time.perf_counter() - start_time
+        return TestResult(
+            name,
+            False,
+            str(e) if isinstance(e, CircuitOpenError) else f"Request failed: {str(e)}",
+            duration,
+            scenario=scenario,
+            stats=stats
+        )
+    finally:
+        if usage is None:
+            get_ledger().release(reservation)
+
+def run_streaming_tests(base_url: str, vibe: Optional[str] = None) -> List[TestResult]:
+    """Stream one message per vibe (or just `vibe`) and report time-to-first-token"""
+    print_header("Streamed Generation")
+    results = []
+    for stream_vibe in ([vibe] if vibe else PLANT_VIBES):
+        print_info(f"Streaming {stream_vibe}...")
+        results.append(test_streaming_generation(
+            base_url=base_url,
+            nickname=f"Test{stream_vibe.replace(' ', '')}",
+            species="Fiddle Leaf Fig",
+            vibe=stream_vibe,
+            status="Hydrated",
+            health_streak=5,
+            last_watered_days_ago=2
+        ))
+    return results
+
+def test_batch_generation(base_url: str, plants: List[Dict]) -> TestResult:
+    """Test batched message generation: one request carrying several plants"""
+    start_time = time.perf_counter()
+    url = f"{base_url}{API_ENDPOINT}"
+    name = f"Batch Generation ({len(plants)} plants)"
+    scenario = {"batch_size": len(plants)}
+    
+    request_data = {"plants": [build_request_data(**plant) for plant in plants]}
+    
+    try:
+        reservation = get_ledger().reserve(estimate_prompt_tokens(request_data["plants"]), len(plants))
+    except BudgetExceeded as e:
+        return TestResult(name, False, f"Skipped: {e}", scenario=scenario, skipped=True)
+    
+    usage = None
+    stats = RequestStats()
+    try:
+        response = get_scheduler().send(lambda: timed_request(
+            "POST",
+            url,
+            body=json.dumps(request_data).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            timeout=60,
+            extract=[("messages",), ("usage",)]
+        ), stats)
+        duration = response.total
         
-        with urllib.request.urlopen(req, timeout=30, context=ssl_context) as response:
-            if response.status == 200:
-                result_data = json.loads(response.read().decode('utf-8'))
-                duration = (datetime.now() - start_time).total_seconds()
-                
-                if "message" in result_data:
-                    message = result_data["message"]
-                    return TestResult(
-                        f"Message Generation ({nickname})",
-                        True,
-                        f"Generated message ({len(message)} chars, {duration:.2f}s):\n    {message[:100]}{'...' if len(message) > 100 else ''}",
-                        duration
-                    )
-                else:
-                    return TestResult(
-                        f"Message Generation ({nickname})",
-                        False,
-                        "Response missing 'message' field",
-                        duration
-                    )
+        if response.status == 200:
+            result_data = response.json()
+            messages = result_data.get("messages")
+            if isinstance(messages, list) and len(messages) == len(plants):
+                average_length = sum(len(message) for message in messages) / len(messages)
+                usage = settle_usage(reservation, TokenUsage.from_backend(result_data.get("usage")), request_data["plants"], messages)
+                return TestResult(
+                    name,
+                    True,
+                    f"Generated {len(messages)} messages (avg {average_length:.0f} chars, {usage.total_tokens} tokens, {duration:.2f}s, {duration / len(messages):.2f}s per plant)",
+                    duration,
+                    timings=response.timings,
+                    status_code=response.status,
+                    response_bytes=response.size,
+                    response_memory=response.memory,
+                    scenario=scenario,
+                    stats=stats,
+                    usage=usage
+                )
             else:
-                duration = (datetime.now() - start_time).total_seconds()
-                error_body = response.read().decode('utf-8')
                 return TestResult(
-                    f"Message Generation ({nickname})",
+                    name,
                     False,
-                    f"HTTP {response.status}: {error_body}",
-                    duration
+                    f"Expected {len(plants)} messages, got {len(messages) if isinstance(messages, list) else 'none'}",
+                    duration,
+                    timings=response.timings,
+                    status_code=response.status,
+                    response_bytes=response.size,
+                    scenario=scenario,
+                    stats=stats
                 )
-    except urllib.error.HTTPError as e:
-        duration = (datetime.now() - start_time).total_seconds()
-        error_body = e.read().decode('utf-8') if e.fp else "No error details"
-        try:
-            error_json = json.loads(error_body)
-            error_msg = error_json.get("error", error_body)
-        except:
-            error_msg = error_body
-        return TestResult(
-            f"Message Generation ({nickname})",
-            False,
-            f"HTTP {e.code}: {error_msg}",
-            duration
-        )
+        else:
+            error_body = response.text() or "No error details"
+            try:
+                error_msg = json.loads(error_body).get("error", error_body)
+            except:
+                error_msg = error_body
+            return TestResult(
+                name,
+                False,
+                f"HTTP {response.status}: {error_msg}",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size,
+                scenario=scenario,
+                stats=stats
+            )
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time - stats.retry_wait - stats.throttle_wait
         return TestResult(
-            f"Message Generation ({nickname})",
+            name,
             False,
-            f"Request failed: {str(e)}",
-            duration
+            str(e) if isinstance(e, CircuitOpenError) else f"Request failed: {str(e)}",
+            duration,
+            scenario=scenario,
+            stats=stats
         )
+    finally:
+        if usage is None:
+            get_ledger().release(reservation)
+
+def run_batch_test(base_url: str, plant_count: int, vibe: Optional[str] = None) -> List[TestResult]:
+    """Generate messages for `plant_count` plants in as few batched requests as possible"""
+    print_header(f"Batched Generation ({plant_count} plants)")
+    plants = [get_load_scenario(i, vibe) for i in range(plant_count)]
+    
+    results = []
+    for start in range(0, plant_count, MAX_BATCH_SIZE):
+        chunk = plants[start:start + MAX_BATCH_SIZE]
+        print_info(f"Sending plants {start + 1}-{start + len(chunk)}...")
+        results.append(test_batch_generation(base_url, chunk))
+    return results
 
-def test_all_vibes(base_url: str) -> List[TestResult]:
+def test_all_vibes(transport: Transport) -> List[TestResult]:
     """Test message generation for all plant vibes"""
     results = []
     
@@ -292,7 +849,7 @@ def test_all_vibes(base_url: str) -> List[TestResult]:
     
     for vibe in PLANT_VIBES:
         result = test_message_generation(
-            base_url=base_url,
+            transport=transport,
             nickname=f"Test{vibe.replace(' ', '')}",
             species=test_plant["species"],
             vibe=vibe,
@@ -304,13 +861,13 @@ def test_all_vibes(base_url: str) -> List[TestResult]:
     
     return results
 
-def test_all_statuses(base_url: str) -> List[TestResult]:
+def test_all_statuses(transport: Transport) -> List[TestResult]:
     """Test message generation for all plant statuses"""
     results = []
     
     for status in PLANT_STATUSES:
         result = test_message_generation(
-            base_url=base_url,
+            transport=transport,
             nickname=f"Test{status}",
             species="Snake Plant",
             vibe="Chill Roomie",
@@ -322,8 +879,8 @@ def test_all_statuses(base_url: str) -> List[TestResult]:
     
     return results
 
-def test_with_weather(base_url: str) -> TestResult:
-    """Test message generation with weather data"""
+def test_with_weather(transport: Transport) -> TestResult:
+    """Test message generation with weather data (a real forecast with --weather)"""
     weather_data = {
         "current": {
             "temperature": 15.5,
@@ -331,9 +888,14 @@ def test_with_weather(base_url: str) -> TestResult:
             "precipitation": 2.5
         }
     }
+    if get_weather_provider() is not None:
+        try:
+            weather_data = get_weather_provider().weather_for(WEATHER_TEST_LOCATION)
+        except WeatherUnavailable as e:
+            return TestResult("Message Generation (WeatherTest)", False, str(e), scenario={"weather": WEATHER_TEST_LOCATION})
     
     return test_message_generation(
-        base_url=base_url,
+        transport=transport,
         nickname="WeatherTest",
         species="Pothos",
         vibe="Drama Queen",
@@ -345,23 +907,33 @@ def test_with_weather(base_url: str) -> TestResult:
 
 def test_base_url(base_url: str) -> TestResult:
     """Test if the base URL is accessible"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     try:
-        req = urllib.request.Request(base_url, method="GET")
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        response = timed_request("GET", base_url, timeout=10)
+        duration = response.total
         
-        with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
-            duration = (datetime.now() - start_time).total_seconds()
+        if response.status < 400:
             return TestResult(
                 "Base URL Accessibility",
                 True,
                 f"Base URL is accessible (Status: {response.status}, Duration: {duration:.2f}s)",
-                duration
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
+            )
+        else:
+            return TestResult(
+                "Base URL Accessibility",
+                False,
+                f"Base URL not accessible: HTTP {response.status} {response.reason}",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
             )
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         return TestResult(
             "Base URL Accessibility",
             False,
@@ -371,44 +943,47 @@ def test_base_url(base_url: str) -> TestResult:
 
 def test_api_endpoint_exists(base_url: str) -> TestResult:
     """Test if the API endpoint exists (even if it returns an error)"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     url = f"{base_url}{API_ENDPOINT}"
     
     try:
         # Try OPTIONS request first (should work even if POST doesn't)
-        req = urllib.request.Request(url, method="OPTIONS")
-        req.add_header("Content-Type", "application/json")
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        response = timed_request("OPTIONS", url, headers={"Content-Type": "application/json"}, timeout=10)
+        duration = response.total
         
-        with urllib.request.urlopen(req, timeout=10, context=ssl_context) as response:
-            duration = (datetime.now() - start_time).total_seconds()
-            return TestResult(
-                "API Endpoint Exists",
-                True,
-                f"API endpoint exists (Status: {response.status}, Duration: {duration:.2f}s)",
-                duration
-            )
-    except urllib.error.HTTPError as e:
-        duration = (datetime.now() - start_time).total_seconds()
         # 404 means endpoint doesn't exist, other errors mean it exists but has issues
-        if e.code == 404:
+        if response.status == 404:
             return TestResult(
                 "API Endpoint Exists",
                 False,
                 f"API endpoint NOT FOUND (404) - Function not deployed",
-                duration
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
+            )
+        elif response.status >= 400:
+            return TestResult(
+                "API Endpoint Exists",
+                True,
+                f"API endpoint exists but returned {response.status} (endpoint is deployed)",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
             )
         else:
             return TestResult(
                 "API Endpoint Exists",
                 True,
-                f"API endpoint exists but returned {e.code} (endpoint is deployed)",
-                duration
+                f"API endpoint exists (Status: {response.status}, Duration: {duration:.2f}s)",
+                duration,
+                timings=response.timings,
+                status_code=response.status,
+                response_bytes=response.size
             )
     except Exception as e:
-        duration = (datetime.now() - start_time).total_seconds()
+        duration = time.perf_counter() - start_time
         return TestResult(
             "API Endpoint Exists",
             False,
@@ -433,38 +1008,1084 @@ def run_diagnostics(base_url: str) -> List[TestResult]:
     print_info("Testing full API connectivity...")
     results.append(test_api_connectivity(base_url))
     
+    # Test 4: Messages keep to the prompt's length (the mock's too; otherwise the quality report is all noise)
+    print_info("Testing message length...")
+    results.append(test_message_length(base_url))
+    
     return results
 
+def test_message_length(base_url: str, samples: int = LENGTH_CHECK_SAMPLES) -> TestResult:
+    """Check that generated messages keep to the system prompt's sentence limit ("2-3 sentences max")"""
+    start_time = time.perf_counter()
+    transport = create_transport("backend", base_url)
+    checked = too_long = 0
+    try:
+        for index in range(samples):
+            scenario = get_load_scenario(index)
+            response = get_scheduler().send(lambda: transport.send(build_request_data(**scenario), timeout=30))
+            if response.message is None:
+                continue
+            checked += 1
+            if "too_long" in check_message(response.message, scenario["vibe"]):
+                too_long += 1
+    except Exception as e:
+        return TestResult("Message Length", False, f"Request failed: {str(e)}", time.perf_counter() - start_time)
+    
+    duration = time.perf_counter() - start_time
+    if not checked:
+        return TestResult("Message Length", False, f"No messages generated in {samples} requests", duration)
+    rate = too_long / checked
+    details = f"{too_long}/{checked} messages over {MAX_SENTENCES} sentences ({rate:.0%})"
+    if rate > LENGTH_CHECK_LIMIT:
+        return TestResult("Message Length", False, f"{details}; the quality report will flag most messages", duration)
+    return TestResult("Message Length", True, details, duration)
+
 def run_quick_test(base_url: str) -> List[TestResult]:
     """Run a quick connectivity test"""
     print_header("Quick Connectivity Test")
     results = [test_api_connectivity(base_url)]
     return results
 
-def run_all_tests(base_url: str) -> List[TestResult]:
+def run_all_tests(transport: Transport) -> List[TestResult]:
     """Run all test suites"""
     all_results = []
     
-    # Connectivity test
-    print_header("API Connectivity Test")
-    all_results.append(test_api_connectivity(base_url))
+    # Connectivity test (of the backend itself; other transports skip it)
+    if transport.has_backend:
+        print_header("API Connectivity Test")
+        all_results.append(test_api_connectivity(transport.base_url))
     
     # Test all vibes
     print_header("Testing All Plant Vibes")
-    vibe_results = test_all_vibes(base_url)
+    vibe_results = test_all_vibes(transport)
     all_results.extend(vibe_results)
     
     # Test all statuses
     print_header("Testing All Plant Statuses")
-    status_results = test_all_statuses(base_url)
+    status_results = test_all_statuses(transport)
     all_results.extend(status_results)
     
     # Test with weather
     print_header("Testing With Weather Data")
-    all_results.append(test_with_weather(base_url))
+    all_results.append(test_with_weather(transport))
     
     return all_results
 
+def get_load_scenario(index: int, vibe: Optional[str] = None) -> Dict:
+    """Build the plant configuration for the index-th load test request"""
+    vibes = [vibe] if vibe else PLANT_VIBES
+    vibe = vibes[index % len(vibes)]
+    status = PLANT_STATUSES[(index // len(vibes)) % len(PLANT_STATUSES)]
+    
+    return {
+        # Under --dedup, named after the scenario rather than the index so requests for the same plant are identical
+        "nickname": f"Load{vibe.split()[0]}{status}" if get_single_flight() is not None else f"Load{index}",
+        "species": "Fiddle Leaf Fig",
+        "vibe": vibe,
+        "status": status,
+        "health_streak": 5,
+        "last_watered_days_ago": 3 if status == "Thirsty" else (7 if status == "Critical" else 1)
+    }
+
+def get_matrix_axes(vibe: Optional[str] = None) -> Dict[str, List]:
+    """Input axes swept by --matrix (just one vibe if `vibe` is given)"""
+    return {
+        "vibe": [vibe] if vibe else PLANT_VIBES,
+        "status": PLANT_STATUSES,
+        "health_streak": HEALTH_STREAKS,
+        "last_watered_days_ago": LAST_WATERED_DAYS,
+        # With --weather, real forecasts for a few places stand in for the presets
+        "weather": ["none"] + WEATHER_LOCATIONS if get_weather_provider() is not None else list(WEATHER_PRESETS)
+    }
+
+def scenario_weather(name: str) -> Optional[Dict]:
+    """weatherData for a matrix weather value: a preset, or a location looked up by the weather provider"""
+    if name in WEATHER_PRESETS:
+        return WEATHER_PRESETS[name]
+    return get_weather_provider().weather_for(name)
+
+def run_matrix_scenarios(transport: Transport, scenarios: List[Dict], concurrency: int) -> List[TestResult]:
+    """Run matrix scenarios on up to `concurrency` threads, tagging each result with its scenario"""
+    def run(scenario: Dict) -> Optional[TestResult]:
+        if get_ledger().exhausted:
+            return None
+        try:
+            weather_data = scenario_weather(scenario["weather"])
+        except WeatherUnavailable as e:
+            result = TestResult(f"Message Generation (Matrix{scenario['index']})", False, str(e))
+            result.scenario.update(scenario)
+            return result
+        result = test_message_generation(
+            transport=transport,
+            nickname=f"Matrix{scenario['index']}",
+            species="Fiddle Leaf Fig",
+            vibe=scenario["vibe"],
+            status=scenario["status"],
+            health_streak=scenario["health_streak"],
+            last_watered_days_ago=scenario["last_watered_days_ago"],
+            weather_data=weather_data
+        )
+        result.scenario.update(scenario)
+        return result
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Scenarios skipped once the token budget ran out are left out
+        return [result for result in executor.map(run, scenarios) if result is not None and not result.skipped]
+
+def _matrix_worker(transport: Transport, scenarios: List[Dict], concurrency: int, client_config: Dict, scheduler_config: Dict,
+                   ledger_config: Dict, weather_config: Dict, validate: bool) -> List[TestResult]:
+    """Entry point for --workers processes: configure this process's client, then run its scenarios"""
+    configure_client(**client_config)
+    configure_scheduler(**scheduler_config)
+    configure_ledger(**ledger_config)
+    configure_weather_provider(**weather_config)
+    validator = configure_quality_validator(validate)
+    results = run_matrix_scenarios(transport, scenarios, concurrency)
+    if validator is not None:
+        # Results go back with their quality issues set
+        validator.close()
+    return results
+
+def run_matrix_test(
+    transport: Transport,
+    strategy: str,
+    shard_spec: Optional[str] = None,
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    workers: int = 1,
+    seed: int = 0,
+    vibe: Optional[str] = None,
+    client_config: Optional[Dict] = None,
+    scheduler_config: Optional[Dict] = None
+) -> Tuple[List[TestResult], float]:
+    """Sweep the scenario matrix (or this process's shard of it).
+    
+    With `workers` > 1 the shard is split round-robin across that many
+    processes, each running `concurrency` requests at a time. Returns the
+    results in scenario order and the elapsed wall-clock time.
+    """
+    axes = get_matrix_axes(vibe)
+    scenarios = sample_scenarios(axes, strategy, seed)
+    for index, scenario in enumerate(scenarios):
+        scenario["index"] = index
+    if shard_spec:
+        shard_index, shard_count = parse_shard(shard_spec)
+        scenarios = shard(scenarios, shard_index, shard_count)
+    
+    print_header("Scenario Matrix")
+    print_info(f"Strategy: {strategy}, {len(scenarios)} scenarios" + (f" (shard {shard_spec})" if shard_spec else "") + f" of a {matrix_size(axes)}-combination matrix")
+    print_info(f"Axes: " + ", ".join(f"{name} ({len(values)})" for name, values in axes.items()))
+    print_info(f"Workers: {workers} x concurrency {concurrency}")
+    
+    start_time = time.perf_counter()
+    if workers > 1 and len(scenarios) > 1:
+        chunks = [chunk for chunk in (shard(scenarios, i + 1, workers) for i in range(workers)) if chunk]
+        # spawn keeps workers independent of the parent's threads (e.g. an in-process mock server)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=context) as executor:
+            # Each worker gets an equal share of the token budget
+            ledger = get_ledger()
+            ledger_config = {"model": ledger.model, "budget": ledger.budget.divide(len(chunks)) if ledger.budget else None}
+            # Workers fetch (and cache) forecasts for themselves
+            weather = get_weather_provider()
+            weather_config = {"mode": weather.mode, "fixtures_path": weather.fixtures_path} if weather is not None else {}
+            futures = [
+                executor.submit(_matrix_worker, transport, chunk, concurrency, client_config or {}, scheduler_config or {}, ledger_config,
+                                weather_config, get_quality_validator() is not None)
+                for chunk in chunks
+            ]
+            results = [result for future in futures for result in future.result()]
+        results.sort(key=lambda result: result.scenario["index"])
+        # Workers kept their own ledgers and validators; book their usage and quality here for the report
+        for result in results:
+            if result.usage is not None:
+                ledger.record(result.usage, {"vibe": result.scenario["vibe"], "species": result.scenario["species"]})
+            if result.quality is not None and get_quality_validator() is not None:
+                get_quality_validator().add(result.quality, result.scenario["vibe"])
+        if len(results) < len(scenarios):
+            ledger.exhausted = True
+    else:
+        results = run_matrix_scenarios(transport, scenarios, concurrency)
+    
+    elapsed = time.perf_counter() - start_time
+    if len(results) < len(scenarios):
+        print_warning(f"Token budget reached: ran {len(results)} of {len(scenarios)} scenarios")
+    return results, elapsed
+
+def print_matrix_breakdown(results: List[TestResult]):
+    """Print the failure rate for every value of every matrix axis that saw failures"""
+    if all(r.success for r in results):
+        return
+    print(f"{Colors.BOLD}Failures by scenario axis:{Colors.RESET}")
+    for axis in ["vibe", "status", "health_streak", "last_watered_days_ago", "weather"]:
+        counts: Dict[str, List[int]] = {}
+        for r in results:
+            value = str(r.scenario.get(axis))
+            entry = counts.setdefault(value, [0, 0])
+            entry[0] += 0 if r.success else 1
+            entry[1] += 1
+        if not any(failed for failed, _ in counts.values()):
+            continue
+        cells = ", ".join(f"{value}: {failed}/{total}" for value, (failed, total) in counts.items() if failed)
+        print(f"  {axis}: {cells}")
+    print()
+
+def run_load_test(
+    transport: Transport,
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    rps: Optional[float] = None,
+    duration: Optional[float] = None,
+    total_requests: Optional[int] = None,
+    vibe: Optional[str] = None,
+    keep_results: bool = True
+) -> Tuple[ResultSummary, List[TestResult], float]:
+    """Drive the message endpoint with up to `concurrency` requests in flight.
+    
+    Requests are paced at `rps` when given (open loop), otherwise a new request
+    starts as soon as a slot frees up (closed loop). The run stops after
+    `duration` seconds or `total_requests` requests, whichever comes first.
+    Returns the summary, the results (none unless `keep_results`, so memory
+    stays flat however long the run) and the elapsed wall-clock time.
+    """
+    if duration is None and total_requests is None:
+        total_requests = DEFAULT_LOAD_REQUESTS
+    
+    pacing = f"{rps:g} req/s" if rps else "unthrottled"
+    limit = f"{duration:g}s" if duration is not None else f"{total_requests} requests"
+    if duration is not None and total_requests is not None:
+        limit = f"{duration:g}s or {total_requests} requests"
+    print_header("Load Test")
+    print_info(f"Concurrency: {concurrency}, rate: {pacing}, limit: {limit}")
+    
+    summary = ResultSummary()
+    results: List[TestResult] = []
+    elapsed = drive_requests(transport, result_collector(summary, results if keep_results else None),
+                             concurrency, rps, duration, total_requests, vibe)
+    return summary, results, elapsed
+
+def result_collector(summary: ResultSummary, results: Optional[List[TestResult]] = None) -> Callable[[TestResult], None]:
+    """An on_result callback that folds results into `summary`, appends them to `results` if given and spills them to the result log.
+    
+    Requests refused by the budget were never sent, so they are counted but
+    neither kept nor logged.
+    """
+    lock = threading.Lock()
+    
+    def collect(result: TestResult):
+        with lock:
+            summary.record(result)
+            if results is not None and not result.skipped:
+                results.append(result)
+        if get_result_log() is not None and not result.skipped:
+            get_result_log().write(result.to_dict())
+    
+    return collect
+
+def drive_requests(
+    transport: Transport,
+    on_result: Callable[[TestResult], None],
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    rps: Optional[float] = None,
+    duration: Optional[float] = None,
+    total_requests: Optional[int] = None,
+    vibe: Optional[str] = None
+) -> float:
+    """Send load scenarios with up to `concurrency` in flight, passing each result to `on_result`.
+    
+    Paced and bounded as described for run_load_test; `on_result` is called
+    from worker threads. Returns the elapsed wall-clock time.
+    """
+    in_flight = threading.BoundedSemaphore(concurrency)
+    
+    def worker(index: int):
+        try:
+            result = test_message_generation(transport=transport, **get_load_scenario(index, vibe))
+        finally:
+            in_flight.release()
+        on_result(result)
+    
+    start_time = time.perf_counter()
+    deadline = start_time + duration if duration is not None else None
+    sent = 0
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while total_requests is None or sent < total_requests:
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                break
+            if get_ledger().exhausted:
+                print_warning(f"Token budget reached after {sent} requests, stopping")
+                break
+            if rps:
+                # Sleep until this request's slot on the schedule, without overshooting the deadline
+                delay = start_time + sent / rps - now
+                if deadline is not None:
+                    delay = min(delay, deadline - now)
+                if delay > 0:
+                    time.sleep(delay)
+                    continue
+            in_flight.acquire()
+            executor.submit(worker, sent)
+            sent += 1
+    
+    return time.perf_counter() - start_time
+
+def run_replay(
+    transport: Transport,
+    schedule: ReplaySchedule,
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    keep_results: bool = True
+) -> Tuple[ResultSummary, List[TestResult], float]:
+    """Re-send captured requests through `transport` on the schedule's timeline.
+    
+    Each request goes out at its captured offset (scaled by the replay speed)
+    with lastWatered moved to today, so the backend sees the same prompts.
+    Returns the summary, the results (as for run_load_test) and the elapsed
+    wall-clock time.
+    """
+    print_header("Replay")
+    print_info(f"{len(schedule.entries)} captured requests over {timedelta(seconds=round(schedule.duration))} "
+               f"at {schedule.speed:g}x speed, concurrency {concurrency}")
+    
+    summary = ResultSummary()
+    results: List[TestResult] = []
+    collect = result_collector(summary, results if keep_results else None)
+    in_flight = threading.BoundedSemaphore(concurrency)
+    
+    def worker(record: Dict):
+        try:
+            result = send_message_request(transport, rebase_request(record, datetime.now()))
+        finally:
+            in_flight.release()
+        collect(result)
+    
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for sent, (offset, record) in enumerate(schedule.entries):
+            if get_ledger().exhausted:
+                print_warning(f"Token budget reached after {sent} requests, stopping")
+                break
+            delay = start_time + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # A request that can't start on time (all slots busy) goes out late rather than being dropped
+            in_flight.acquire()
+            executor.submit(worker, record)
+    
+    return summary, results, time.perf_counter() - start_time
+
+def print_replay_comparison(schedule: ReplaySchedule, summary: ResultSummary):
+    """Print captured against replayed latency and success rate"""
+    captured = [record for _, record in schedule.entries]
+    print(f"{Colors.BOLD}Captured vs replayed:{Colors.RESET}")
+    if not summary.requests:
+        print_warning("No requests were replayed")
+        return
+    captured_ok = [record["duration"] for record in captured if record.get("status") == 200 and record.get("message") is not None]
+    print(f"  Succeeded: {len(captured_ok)}/{len(captured)} captured, {summary.passed}/{summary.requests} replayed")
+    if captured_ok and summary.latency.count:
+        captured_p50 = median(captured_ok)
+        # All replayed requests, failures included; close enough when nearly all succeed
+        replayed_p50 = summary.latency.percentile(50)
+        change = (replayed_p50 - captured_p50) / captured_p50 * 100 if captured_p50 else 0.0
+        print(f"  p50: {captured_p50:.3f}s captured, {replayed_p50:.3f}s replayed ({change:+.1f}%)")
+    print()
+
+def run_soak_test(
+    transport: Transport,
+    duration: float,
+    rps: float = DEFAULT_SOAK_RPS,
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    window: float = DEFAULT_WINDOW,
+    path: str = DEFAULT_SOAK_FILE,
+    vibe: Optional[str] = None,
+    error_limit: float = DEFAULT_ERROR_LIMIT
+) -> Tuple[SoakMonitor, float]:
+    """Hold a steady request rate for `duration` seconds, reporting each window as it closes.
+    
+    Results are folded into a SoakMonitor (and its rolling file) instead of
+    being kept, so a run of many hours doesn't grow in memory.
+    """
+    print_header("Soak Test")
+    print_info(f"Rate: {rps:g} req/s for {timedelta(seconds=round(duration))}, concurrency {concurrency}")
+    print_info(f"Writing {window:g}s windows to {path}")
+    print(f"\n  {'elapsed':>9}{'req':>7}{'req/s':>8}{'errors':>8}{'p50':>9}{'p99':>9}{'cold':>6}")
+    
+    monitor = SoakMonitor(window, path, error_limit=error_limit, run_info={"transport": transport.name, "url": transport.base_url, "rps": rps, "concurrency": concurrency, "vibe": vibe})
+    print_lock = threading.Lock()
+    
+    def print_window(summary: Dict):
+        with print_lock:
+            print(f"  {str(timedelta(seconds=round(summary['elapsed']))):>9}{summary['requests']:>7}{summary['throughput']:>8.2f}"
+                  f"{summary['error_rate'] * 100:>7.1f}%{summary['p50']:>8.3f}s{summary['p99']:>8.3f}s{summary['cold_starts']:>6}")
+            for flag in summary["flags"]:
+                print_warning(flag)
+    
+    def record(result: TestResult):
+        if result.skipped:
+            return
+        if get_result_log() is not None:
+            get_result_log().write(result.to_dict())
+        # TTFB leaves out connection setup, so a slow handshake isn't mistaken for a cold start
+        for summary in monitor.record(result.duration, result.success, result.timings.get("ttfb")):
+            print_window(summary)
+    
+    elapsed = drive_requests(transport, record, concurrency, rps, duration, vibe=vibe)
+    last_window = monitor.finish()
+    if last_window is not None:
+        print_window(last_window)
+    return monitor, elapsed
+
+def print_soak_summary(monitor: SoakMonitor, elapsed: float):
+    """Print totals, the latency baseline and every flag raised during a soak run"""
+    print_header("Soak Test Summary")
+    summary = monitor.summary()
+    
+    print(f"{Colors.BOLD}Requests:{Colors.RESET}")
+    print(f"  Total: {summary['requests']} over {timedelta(seconds=round(elapsed))} ({summary['windows']} windows)")
+    print_success(f"Succeeded: {summary['requests'] - summary['failures']}")
+    if summary["failures"]:
+        print_error(f"Failed: {summary['failures']} ({summary['failures'] / summary['requests'] * 100:.1f}%)")
+    if monitor.too_many_failures:
+        print_error(f"Error rate is above the {monitor.error_limit * 100:g}% limit")
+    print(f"  Prompts: {format_prompt_stats()}")
+    
+    print(f"\n{Colors.BOLD}Latency:{Colors.RESET}")
+    print(f"  p50 {summary['p50']:.3f}s, p99 {summary['p99']:.3f}s, max {summary['max']:.3f}s")
+    if monitor.baseline is not None:
+        print(f"  Baseline p50 (windows 2-{BASELINE_WINDOWS + 1}): {monitor.baseline:.3f}s")
+    else:
+        print_warning(f"Run too short for a baseline (needs {BASELINE_WINDOWS + 1} windows); drift was not checked")
+    print(f"  Cold-start spikes: {summary['cold_starts']}")
+    print()
+    
+    print_token_report()
+    print_quality_report()
+    
+    if monitor.flags:
+        print(f"{Colors.BOLD}Flags:{Colors.RESET}")
+        for kind, message in monitor.flags:
+            if kind == "cold start":
+                print_info(f"{kind}: {message}")
+            else:
+                print_error(f"{kind}: {message}")
+    else:
+        print_success("No drift, degradation or errors detected")
+    print_info(f"Time series written to {monitor.path}")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def print_load_summary(summary: ResultSummary, elapsed: float, concurrency: int, rps: Optional[float] = None,
+                       title: str = "Load Test Summary"):
+    """Print throughput and error summary for a load test"""
+    print_header(title)
+    
+    passed = summary.passed
+    failed = summary.failures
+    throughput = summary.requests / elapsed if elapsed > 0 else 0.0
+    
+    print(f"{Colors.BOLD}Requests:{Colors.RESET}")
+    print(f"  Total: {summary.requests}")
+    print_success(f"Succeeded: {passed}")
+    if failed > 0:
+        print_error(f"Failed: {failed} ({failed / summary.requests * 100:.1f}%)")
+        # Show the most common failure reasons instead of every failed request
+        for reason, count in summary.top_reasons():
+            print(f"    {count}x {reason}")
+    
+    print(f"\n{Colors.BOLD}Throughput:{Colors.RESET}")
+    print_info(f"Elapsed: {elapsed:.2f}s")
+    print(f"  Connections: {summary.new_connections} opened, {summary.reused_connections} requests on reused connections")
+    print(f"  Prompts: {format_prompt_stats()}")
+    print(f"  Achieved: {throughput:.2f} req/s (concurrency {concurrency}" + (f", target {rps:g} req/s)" if rps else ")"))
+    if elapsed > 0:
+        # Goodput only counts requests that ended in a message, so retry storms don't inflate it
+        print(f"  Goodput: {passed / elapsed:.2f} successful req/s ({summary.attempts / elapsed:.2f} attempts/s sent)")
+    print()
+    
+    print_retry_summary(summary)
+    print_token_report()
+    print_quality_report()
+    print_memory_report(summary)
+    print_weather_report()
+    print_dedup_report(summary)
+    
+    print_latency_report(summary)
+    print_slowest_requests(summary)
+    
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def parse_float_list(spec: str, parse: Callable[[str], float] = float) -> List[float]:
+    """Parse a comma-separated list of positive numbers (each with `parse`)"""
+    values = [parse(part.strip()) for part in spec.split(",") if part.strip()]
+    if not values or any(value <= 0 for value in values):
+        raise ValueError(f"Invalid list '{spec}' (expected positive values separated by commas)")
+    return values
+
+def run_cold_start_profile(
+    transport: Transport,
+    gaps: List[float],
+    samples: int = DEFAULT_COLD_SAMPLES,
+    rates: Optional[List[float]] = None,
+    rate_requests: int = DEFAULT_COLD_RATE_REQUESTS,
+    concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    vibe: Optional[str] = None
+) -> Tuple[ColdStartProfile, List[TestResult]]:
+    """Separate cold invocations from warm ones.
+    
+    For each idle gap, waits that long, sends a probe and immediately a warm
+    follow-up, `samples` times. Then sends `rate_requests` requests at each
+    rate to see how often cold starts happen under that traffic. Returns the
+    profile and every result.
+    """
+    rates = rates or []
+    estimate = sum(gaps) * samples + sum(rate_requests / rate for rate in rates)
+    print_header("Cold Start Profile")
+    print_info(f"Idle gaps: {', '.join(format_duration(gap) for gap in sorted(gaps))} ({samples} probes each)")
+    if rates:
+        print_info(f"Request rates: {', '.join(f'{rate:g}' for rate in sorted(rates))} req/s ({rate_requests} requests each)")
+    print_info(f"Expected duration: about {timedelta(seconds=round(estimate))}")
+    
+    profile = ColdStartProfile()
+    results: List[TestResult] = []
+    # Make sure the first probe isn't answered by an instance cold from the last deploy
+    results.append(test_message_generation(transport=transport, **get_load_scenario(0, vibe)))
+    
+    index = 1
+    for gap in sorted(gaps):
+        for sample in range(samples):
+            time.sleep(gap)
+            probe = test_message_generation(transport=transport, **get_load_scenario(index, vibe))
+            warm = test_message_generation(transport=transport, **get_load_scenario(index + 1, vibe))
+            index += 2
+            results.extend([probe, warm])
+            profile.add_gap_pair(gap, probe, warm)
+            if probe.success and warm.success:
+                state = "cold" if profile.is_cold(probe) else "warm"
+                print(f"  idle {format_duration(gap):>8} #{sample + 1}: probe {server_time(probe):.3f}s ({state}), follow-up {server_time(warm):.3f}s")
+            else:
+                print_error(f"idle {format_duration(gap)} #{sample + 1}: {probe.message if not probe.success else warm.message}")
+    
+    for rate in sorted(rates):
+        rate_results: List[TestResult] = []
+        results_lock = threading.Lock()
+        
+        def collect(result: TestResult):
+            with results_lock:
+                rate_results.append(result)
+        
+        drive_requests(transport, collect, concurrency, rps=rate, total_requests=rate_requests, vibe=vibe)
+        rate_results = [result for result in rate_results if not result.skipped]
+        profile.add_rate_results(rate, rate_results)
+        results.extend(rate_results)
+        cold = sum(1 for result in rate_results if result.success and profile.is_cold(result))
+        print(f"  {rate:g} req/s: {cold} of {len(rate_results)} requests cold")
+    
+    return profile, [result for result in results if not result.skipped]
+
+def print_cold_start_report(profile: ColdStartProfile):
+    """Print the cold-start penalty, its frequency by rate, and where request time goes"""
+    print_header("Cold Start Report")
+    if not profile.has_server_timing:
+        print_warning(f"No Server-Timing from the backend: cold starts are inferred from TTFB ({profile.cold_factor:g}x the warm median) "
+                      "and the handler/Gemini split is unavailable")
+        print()
+    
+    rows = profile.gap_rows()
+    if rows:
+        print(f"{Colors.BOLD}Cold starts after idle gaps:{Colors.RESET}")
+        print(f"  {'idle':>9}{'probes':>8}{'cold':>6}{'penalty p50':>13}{'p90':>9}{'max':>9}")
+        for row in rows:
+            penalty = row["penalty"]
+            cells = f"{penalty.percentile(50):>12.3f}s{penalty.percentile(90):>8.3f}s{penalty.max:>8.3f}s" if penalty.count else f"{'-':>13}{'-':>9}{'-':>9}"
+            print(f"  {format_duration(row['gap']):>9}{row['probes']:>8}{row['cold']:>6}{cells}")
+        penalties = profile.penalty_histogram()
+        if penalties.count:
+            print(f"  Penalty over the warm follow-up: p50 {penalties.percentile(50):.3f}s, p90 {penalties.percentile(90):.3f}s, "
+                  f"max {penalties.max:.3f}s ({penalties.count} cold probes; warm median {profile.warm_reference():.3f}s)")
+        reported = profile.reported_cold_starts()
+        if reported.count:
+            print(f"  Backend-reported start-up (Server-Timing cold): p50 {reported.percentile(50):.3f}s, max {reported.max:.3f}s")
+        print()
+    
+    rate_rows = profile.rate_rows()
+    if rate_rows:
+        print(f"{Colors.BOLD}Cold starts by request rate:{Colors.RESET}")
+        print(f"  {'req/s':>9}{'requests':>10}{'cold':>6}{'freq':>8}{'instances':>11}")
+        for row in rate_rows:
+            frequency = row["cold"] / row["requests"] * 100 if row["requests"] else 0.0
+            instances = row["instances"] if row["instances"] is not None else "-"
+            print(f"  {row['rate']:>9g}{row['requests']:>10}{row['cold']:>6}{frequency:>7.1f}%{instances:>11}")
+        print()
+    
+    split = profile.time_split()
+    if split:
+        print(f"{Colors.BOLD}Where the time goes (mean per request):{Colors.RESET}")
+        print(f"  {'':<6}{'count':>7}{'total':>9}{'outside':>10}{'handler':>10}{'gemini':>9}")
+        for kind in ("warm", "cold"):
+            if kind in split:
+                group = split[kind]
+                print(f"  {kind:<6}{group['count']:>7}{group['total']:>8.3f}s{group['outside']:>9.3f}s{group['handler']:>9.3f}s{group['gemini']:>8.3f}s")
+        print("  (outside = network, routing and instance start-up; handler excludes the Gemini wait)")
+        print()
+    
+    interval = profile.keep_warm_interval()
+    penalties = profile.penalty_histogram()
+    if interval is not None:
+        print_info(f"No cold starts after idle gaps up to {format_duration(interval)}: a keep-warm ping at least that often "
+                   f"would avoid a p50 penalty of {penalties.percentile(50):.3f}s")
+    elif rows and all(row["cold"] for row in rows):
+        print_info("Even the shortest idle gap went cold: keep-warm pings would have to be more frequent than that")
+    elif rows and not any(row["cold"] for row in rows):
+        print_info("No cold starts after any idle gap tested")
+    if "warm" in split and split["warm"]["total"] > 0:
+        warm = split["warm"]
+        print_info(f"Warm requests spend {warm['outside'] / warm['total'] * 100:.0f}% outside the handler and "
+                   f"{warm['gemini'] / warm['total'] * 100:.0f}% waiting on Gemini; a closer region only helps the first part")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def _simulation_worker(
+    worker: int,
+    users: List[VirtualUser],
+    start_at: float,
+    transport: Transport,
+    concurrency: int,
+    client_config: Dict,
+    scheduler_config: Dict,
+    ledger_config: Dict,
+    queue
+):
+    """Entry point for --simulate processes: run this worker's users, sending SimulationStats deltas to `queue`"""
+    configure_client(**client_config)
+    configure_scheduler(**scheduler_config)
+    configure_ledger(**ledger_config)
+    
+    stats = SimulationStats()
+    stats_lock = threading.Lock()
+    finished = threading.Event()
+    
+    def take_stats() -> SimulationStats:
+        nonlocal stats
+        with stats_lock:
+            delta, stats = stats, SimulationStats()
+        return delta
+    
+    def report():
+        # Deltas keep every message small however long the run is
+        while not finished.wait(SIMULATION_REPORT_INTERVAL):
+            queue.put(("stats", worker, take_stats()))
+    
+    def session(user: VirtualUser):
+        arrival = start_at + user.arrival
+        with stats_lock:
+            stats.sessions_started += 1
+            stats.start_lag.record(max(0.0, time.time() - arrival))
+        # One plant after another, as the app does
+        for plant in user.plants:
+            result = test_message_generation(transport=transport, **plant_request(plant, user.weather))
+            with stats_lock:
+                stats.record_request(user.phase, result)
+        with stats_lock:
+            stats.sessions_finished += 1
+            stats.session_latency.record(time.time() - arrival)
+    
+    reporter = threading.Thread(target=report, name="simulation-report", daemon=True)
+    reporter.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for user in users:
+            delay = start_at + user.arrival - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(session, user)
+    finished.set()
+    reporter.join()
+    queue.put(("stats", worker, take_stats()))
+    queue.put(("done", worker, None))
+
+def run_user_simulation(
+    transport: Transport,
+    user_count: int,
+    window: float,
+    arrivals: ArrivalProfile,
+    plants_per_user: float = DEFAULT_PLANTS_PER_USER,
+    workers: int = 1,
+    concurrency: int = DEFAULT_SIMULATION_CONCURRENCY,
+    seed: int = 0,
+    client_config: Optional[Dict] = None,
+    scheduler_config: Optional[Dict] = None
+) -> Tuple[SimulationStats, float]:
+    """Simulate `user_count` app users arriving over `window` seconds, spread across `workers` processes.
+    
+    Each process runs up to `concurrency` user sessions at a time and sends
+    its counters and histograms back over a queue every second. Returns the
+    merged statistics and the elapsed wall-clock time.
+    """
+    users = generate_users(user_count, window, arrivals, plants_per_user, seed)
+    plants = sum(len(user.plants) for user in users)
+    burst_users = sum(1 for user in users if user.phase == "burst")
+    workers = max(1, min(workers, user_count))
+    
+    print_header("User Simulation")
+    print_info(f"Users: {user_count} over {format_duration(window)}, arrivals: {arrivals}")
+    print_info(f"Plants: {plants} ({plants / user_count:.1f} per user, up to {max(len(user.plants) for user in users)}), "
+               f"{burst_users} users in the burst")
+    print_info(f"Worker processes: {workers} x {concurrency} sessions")
+    print(f"\n  {'elapsed':>9}{'active':>8}{'req':>7}{'req/s':>8}{'errors':>8}{'p50':>9}{'p99':>9}")
+    
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    ledger = get_ledger()
+    ledger_config = {"model": ledger.model, "budget": ledger.budget.divide(workers) if ledger.budget else None}
+    # Leave time for the workers to start, so the first arrivals aren't late
+    start_at = time.time() + SIMULATION_STARTUP
+    processes = [
+        context.Process(
+            target=_simulation_worker,
+            args=(worker, users[worker::workers], start_at, transport, concurrency,
+                  client_config or {}, scheduler_config or {}, ledger_config, queue),
+            daemon=True
+        )
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    total = SimulationStats()
+    interval = SimulationStats()
+    interval_start = start_at
+    running = workers
+    while running:
+        try:
+            kind, worker, stats = queue.get(timeout=SIMULATION_PRINT_INTERVAL)
+        except Empty:
+            kind = None
+            if not any(process.is_alive() for process in processes):
+                print_error("Simulation workers exited without finishing")
+                break
+        if kind == "done":
+            running -= 1
+        elif kind == "stats":
+            total.merge(stats)
+            interval.merge(stats)
+        now = time.time()
+        if now - interval_start >= SIMULATION_PRINT_INTERVAL and now > start_at:
+            latency = interval.request_latency()
+            seconds = now - max(interval_start, start_at)
+            print(f"  {format_duration(now - start_at):>9}{total.sessions_started - total.sessions_finished:>8}{interval.requests:>7}"
+                  f"{interval.requests / seconds:>8.1f}{interval.failures:>8}{latency.percentile(50):>8.3f}s{latency.percentile(99):>8.3f}s")
+            interval, interval_start = SimulationStats(), now
+    for process in processes:
+        process.join()
+    return total, time.time() - start_at
+
+def print_simulation_report(stats: SimulationStats, elapsed: float):
+    """Print sessions, request and session latency, and whether the simulator kept up"""
+    print_header("User Simulation Summary")
+    
+    print(f"{Colors.BOLD}Users:{Colors.RESET}")
+    print(f"  Sessions: {stats.sessions_finished} of {stats.sessions_started} finished in {format_duration(elapsed)}")
+    print(f"  Requests: {stats.requests} ({stats.requests / elapsed:.1f} req/s overall)" if elapsed > 0 else f"  Requests: {stats.requests}")
+    print_success(f"Succeeded: {stats.requests - stats.failures}")
+    if stats.failures:
+        print_error(f"Failed: {stats.failures} ({stats.failures / stats.requests * 100:.1f}%)")
+        for reason, count in sorted(stats.errors.items(), key=lambda item: -item[1])[:5]:
+            print(f"    {count}x {reason}")
+    if stats.skipped:
+        print_warning(f"Token budget reached: {stats.skipped} requests not sent")
+    if stats.prompt_tokens or stats.output_tokens:
+        usage = TokenUsage(stats.prompt_tokens, stats.output_tokens)
+        print(f"  Tokens: {usage.prompt_tokens:,} prompt + {usage.output_tokens:,} output, ${usage.cost(get_ledger().model):.4f}")
+    print()
+    
+    print_latency_table("Request latency by arrival", {"all requests": stats.request_latency(), **stats.latency})
+    print_latency_table("Until every plant has a message", {"per user": stats.session_latency})
+    print_latency_table("Session start lag", {"per user": stats.start_lag})
+    if stats.start_lag.count and stats.start_lag.percentile(99) > SIMULATION_LAG_WARNING:
+        print_warning("Sessions started late: the simulator couldn't keep up with the arrivals; "
+                      "raise --concurrency or --workers (until then, the per-user times include client-side queueing)")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def run_capacity_search(
+    transport: Transport,
+    dimension: str,
+    search: CapacitySearch,
+    slo: SLO,
+    hold: float = DEFAULT_HOLD,
+    concurrency: int = DEFAULT_CAPACITY_CONCURRENCY,
+    vibe: Optional[str] = None
+) -> List[CapacityStep]:
+    """Hold one load level after another, as chosen by `search`, until the highest level meeting `slo` is found.
+    
+    `dimension` is "rps" (open-loop request rate, with up to `concurrency` in
+    flight) or "concurrency" (closed loop at that many requests in flight).
+    Returns every step held, in the order they ran.
+    """
+    unit = "req/s" if dimension == "rps" else "in flight"
+    print_header("Capacity Search")
+    print_info(f"SLO: {slo}")
+    print_info(f"Ramping {'request rate' if dimension == 'rps' else 'concurrency'} from {search.start:g} {unit} ({search.strategy} search), "
+               f"holding each level for {format_duration(hold)}")
+    print(f"\n  {'level':>10}{'req':>7}{'req/s':>8}{'goodput':>9}{'p50':>9}{'p99':>9}{'errors':>8}  verdict")
+    
+    steps: List[CapacityStep] = []
+    while True:
+        level = search.next_level()
+        if level is None:
+            break
+        step = CapacityStep(level, target_rate=level if dimension == "rps" else None)
+        step_lock = threading.Lock()
+        
+        def record(result: TestResult):
+            if result.skipped:
+                return
+            with step_lock:
+                step.record(result.duration, result.success)
+        
+        step.hold = hold
+        step.elapsed = drive_requests(
+            transport,
+            record,
+            concurrency=int(level) if dimension == "concurrency" else concurrency,
+            rps=level if dimension == "rps" else None,
+            duration=hold,
+            vibe=vibe
+        )
+        passed = step.check(slo)
+        search.record(level, passed)
+        steps.append(step)
+        
+        verdict = f"{Colors.GREEN}ok{Colors.RESET}" if passed else f"{Colors.RED}{'; '.join(step.violations)}{Colors.RESET}"
+        print(f"  {level:>10g}{step.requests:>7}{step.throughput:>8.2f}{step.goodput:>9.2f}{step.histogram.percentile(50):>8.3f}s"
+              f"{step.histogram.percentile(99):>8.3f}s{step.error_rate * 100:>7.1f}%  {verdict}")
+        if get_ledger().exhausted:
+            print_warning("Token budget reached, stopping the search")
+            break
+    return steps
+
+def print_capacity_report(steps: List[CapacityStep], search: CapacitySearch, slo: SLO, dimension: str):
+    """Print the highest level that met the SLO, the first that didn't, and the knee of the latency curve"""
+    print_header("Capacity Report")
+    unit = "req/s" if dimension == "rps" else "in flight"
+    passing = [step for step in steps if step.passed]
+    
+    if passing:
+        best = max(passing, key=lambda step: step.level)
+        print_success(f"Maximum sustainable load: {best.level:g} {unit} "
+                      f"({best.goodput:.2f} successful req/s, p50 {best.histogram.percentile(50):.3f}s, p99 {best.histogram.percentile(99):.3f}s)")
+    else:
+        print_error(f"No level met the SLO ({slo}); try a lower --capacity-start")
+    if search.lowest_fail is not None:
+        failed = min((step for step in steps if not step.passed), key=lambda step: step.level)
+        print_info(f"SLO first broken at {failed.level:g} {unit}: {'; '.join(failed.violations)}")
+    elif passing:
+        limit = "--capacity-max" if search.max_level is not None and best.level >= search.max_level else f"the {search.max_steps}-level limit"
+        print_warning(f"The SLO was never broken before {limit}; the endpoint may sustain more than {best.level:g} {unit}")
+    
+    # The knee is judged on the tightest latency percentile in the SLO
+    percentile = max(slo.latency) if slo.latency else 99.0
+    knee = find_knee(steps, percentile)
+    if knee is not None:
+        print_info(f"Knee of the throughput/latency curve: {knee.level:g} {unit} "
+                   f"({knee.goodput:.2f} successful req/s, p{percentile:g} {knee.histogram.percentile(percentile):.3f}s); "
+                   "latency climbs steeply beyond it")
+    elif len(steps) >= 3:
+        print_info("No clear knee: latency grew evenly, or barely at all, across the levels held")
+    print()
+    
+    print(f"{Colors.BOLD}Throughput/latency curve (by level):{Colors.RESET}")
+    print(f"  {'level':>10}{'goodput':>9}{'p50':>9}{'p99':>9}{'errors':>8}")
+    for step in sorted(steps, key=lambda step: step.level):
+        marker = "  <- knee" if step is knee else ""
+        print(f"  {step.level:>10g}{step.goodput:>9.2f}{step.histogram.percentile(50):>8.3f}s"
+              f"{step.histogram.percentile(99):>8.3f}s{step.error_rate * 100:>7.1f}%{marker}")
+    print()
+    print_token_report()
+    print_quality_report()
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def print_retry_summary(summary: ResultSummary):
+    """Print retries, backoff time and rate-limiter waits, if there were any"""
+    breaker = get_scheduler().breaker
+    if not summary.retried and not summary.throttled and not (breaker and breaker.times_opened):
+        return
+    
+    print(f"{Colors.BOLD}Retries and throttling:{Colors.RESET}")
+    if summary.retried:
+        print(f"  Retries: {summary.retries} on {summary.retried} requests ({summary.retried_then_succeeded} then succeeded), {summary.retry_wait:.2f}s backing off")
+    if summary.throttled:
+        print(f"  Rate limiter: {summary.throttled} requests waited {summary.throttle_wait:.2f}s in total (max {summary.max_throttle_wait:.2f}s)")
+    if breaker and breaker.times_opened:
+        print_warning(f"Circuit breaker opened {breaker.times_opened} time(s); {summary.circuit_open} requests failed fast")
+    print()
+
+def print_overhead_report(summary: ResultSummary, profiler, profile_file: str):
+    """Print the harness's own time per request next to network and server time, and the profiler's findings"""
+    print_header("Harness Overhead")
+    measured = summary.overhead["harness"].count
+    if measured:
+        print_latency_table("Time per request", summary.overhead, milliseconds=True)
+        print_info(f"Client-side overhead: {summary.overhead_total / summary.wall_total:.2%} of request time "
+                   f"({summary.overhead_total / measured * 1000:.2f}ms per request on average)")
+    else:
+        print_warning("No per-request results to measure overhead on (only requests sent in one attempt count)")
+    if OUTPUT_TIMER.calls:
+        print(f"  Printing: {OUTPUT_TIMER.calls:,} lines in {OUTPUT_TIMER.total * 1000:.1f}ms "
+              f"({OUTPUT_TIMER.total / OUTPUT_TIMER.calls * 1_000_000:.0f}µs per line)")
+    if ssl_context_time() is not None:
+        print(f"  SSL context: created once, in {ssl_context_time() * 1000:.1f}ms")
+    print(f"  Profiler: {profiler.overhead_note()}")
+    print()
+    
+    top = profiler.top_functions()
+    if top:
+        print(f"{Colors.BOLD}Busiest functions (own time, waiting left out):{Colors.RESET}")
+        for name, seconds in top:
+            print(f"  {seconds * 1000:>9.1f}ms  {name}")
+        print()
+    profiler.write(profile_file)
+    print_info(f"Wrote the {'folded stacks (flamegraph.pl, speedscope)' if profiler.kind == 'sample' else 'pstats profile (snakeviz, gprof2dot)'} to {profile_file}")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
+def print_memory_report(summary: ResultSummary):
+    """Print the memory response bodies took per request, and per in-flight request when traced"""
+    sizes, held = summary.response_bytes, summary.response_memory
+    profile = get_memory_profile().summary()
+    if not held.count and not profile:
+        return
+    print(f"{Colors.BOLD}Response memory:{Colors.RESET}")
+    if held.count:
+        handling = "incremental JSON" if get_client().incremental_json else "whole bodies"
+        print(f"  Bodies: {format_bytes(sizes.percentile(50))} median, {format_bytes(sizes.max)} max")
+        print(f"  Held per response ({handling}): {format_bytes(held.percentile(50))} median, {format_bytes(held.max)} max")
+        if get_buffer_pool().created:
+            print(f"  Read buffers: {get_buffer_pool().created} x {format_bytes(READ_BUFFER_SIZE)}, shared by all requests")
+    if profile:
+        print(f"  Heap (tracemalloc): peak {format_bytes(profile['peak'])} above the start with {profile['in_flight']} requests in flight, "
+              f"about {format_bytes(profile['per_request'])} per in-flight request")
+    print()
+
+def print_quality_report():
+    """Print the quality issues found in generated messages, by vibe and by how loaded the endpoint was"""
+    validator = get_quality_validator()
+    if validator is None:
+        return
+    validator.drain()
+    totals = validator.totals
+    if not totals.checked:
+        return
+    print(f"{Colors.BOLD}Message quality (checked off the request path):{Colors.RESET}")
+    found = ", ".join(f"{count} {ISSUES[issue]}" for issue, count in sorted(totals.issues.items(), key=lambda item: -item[1]))
+    print(f"  {totals.checked} messages checked, {totals.flagged} ({totals.rate():.1%}) flagged" + (f": {found}" if found else ""))
+    if validator.dropped:
+        print_warning(f"{validator.dropped} messages not checked (the validator fell behind)")
+    for vibe, counts in sorted(validator.by_vibe.items()):
+        if counts.flagged:
+            issues = ", ".join(f"{issue} {count}" for issue, count in sorted(counts.issues.items()))
+            print(f"  {vibe:<16} {counts.flagged}/{counts.checked} flagged ({issues})")
+    
+    bands = validator.throughput_bands()
+    if len(bands) > 1:
+        print(f"  Under load ({validator.window:g}s windows by successful messages/s):")
+        print(f"  {'msg/s':>14}{'checked':>9}{'flagged':>9}{'fallback':>10}")
+        for low, high, counts in bands:
+            rates = f"{low:.1f}-{high:.1f}" if high > low else f"{low:.1f}"
+            print(f"  {rates:>14}{counts.checked:>9}{counts.rate():>8.1%}{counts.rate('fallback'):>10.1%}")
+        lowest, highest = bands[0][2], bands[-1][2]
+        if highest.rate("fallback") - lowest.rate("fallback") >= QUALITY_FALLBACK_RISE:
+            print_warning(f"Fallback text rises with throughput: {highest.rate('fallback'):.1%} in the busiest windows "
+                          f"vs {lowest.rate('fallback'):.1%} in the quietest")
+    print()
+
+def print_dedup_report(summary: ResultSummary):
+    """Print how many requests shared an identical in-flight request instead of going upstream"""
+    flight = get_single_flight()
+    if flight is None or not flight.calls:
+        return
+    print(f"{Colors.BOLD}Deduplication:{Colors.RESET}")
+    print(f"  {flight.calls} upstream calls for {flight.calls + flight.coalesced} requests: {flight.coalesced} shared an identical "
+          f"in-flight request ({flight.coalesced / (flight.calls + flight.coalesced):.0%} fewer calls, up to {flight.max_shared} on one call)")
+    if summary.coalesced_wait.count:
+        print(f"  Shared requests waited {summary.coalesced_wait.percentile(50):.2f}s median for the call they joined")
+    print()
+
+def print_weather_report():
+    """Print how many weather lookups the cache and coalescing answered without a forecast fetch"""
+    provider = get_weather_provider()
+    if provider is None or not provider.lookups:
+        return
+    print(f"{Colors.BOLD}Weather ({provider.mode}):{Colors.RESET}")
+    print(f"  {provider.summary()}")
+    print()
+
+def print_token_report():
+    """Print token usage and cost per vibe and species, and the budget if one is set"""
+    ledger = get_ledger()
+    totals = ledger.totals
+    if not totals.messages:
+        return
+    
+    print(f"{Colors.BOLD}Token usage ({ledger.model}):{Colors.RESET}")
+    print(f"  Total: {totals.prompt_tokens:,} prompt + {totals.output_tokens:,} output tokens over {totals.messages} messages, ${totals.cost:.4f}")
+    if ledger.estimated_messages:
+        print_warning(f"{ledger.estimated_messages} messages had no usage from the backend; their tokens are estimated")
+    if ledger.budget:
+        status = "reached" if ledger.exhausted else "not reached"
+        print(f"  Budget: {ledger.budget} ({status})")
+    print()
+    
+    for axis, title in [("vibe", "Tokens by vibe"), ("species", "Tokens by species")]:
+        rows = ledger.group_rows(axis)
+        if len(rows) < 2:
+            continue
+        print(f"{Colors.BOLD}{title} (longest outputs first):{Colors.RESET}")
+        print(f"  {'':<18}{'msgs':>6}{'avg in':>9}{'avg out':>9}{'max out':>9}{'cost':>11}")
+        for label, group in rows:
+            print(f"  {label:<18}{group.messages:>6}{group.prompt_tokens / group.messages:>9.0f}"
+                  f"{group.output_tokens / group.messages:>9.0f}{group.max_output_tokens:>9}{'$' + format(group.cost, '.5f'):>11}")
+        print()
+
+def print_latency_table(title: str, histograms: Dict[str, LatencyHistogram], milliseconds: bool = False):
+    """Print count, percentiles and max for each histogram as one table row"""
+    columns = [f"p{p:g}" for p in REPORT_PERCENTILES] + ["max"]
+    if not any(histogram.count for histogram in histograms.values()):
+        return
+    print(f"{Colors.BOLD}{title}:{Colors.RESET}")
+    print(f"  {'':<16}{'count':>7}" + "".join(f"{column:>9}" for column in columns))
+    for label, histogram in histograms.items():
+        if not histogram.count:
+            continue
+        summary = histogram.summary()
+        if milliseconds:
+            values = "".join(f"{summary[column] * 1000:>7.2f}ms" for column in columns)
+        else:
+            values = "".join(f"{summary[column]:>8.3f}s" for column in columns)
+        print(f"  {label:<16}{histogram.count:>7}{values}")
+    print()
+
+def print_latency_report(summary: ResultSummary):
+    """Print latency percentiles overall, per request phase, to first token, per vibe and per status"""
+    if not summary.latency.count:
+        return
+    by_vibe, by_status = summary.by_vibe, summary.by_status
+    
+    print_latency_table("Latency (total)", {"all requests": summary.latency})
+    print_latency_table("Latency by phase", summary.phases)
+    print_latency_table("Time to first token", {"streamed": summary.first_token})
+    if by_vibe:
+        # Known vibes in their usual order, then anything unexpected
+        ordered = [vibe for vibe in PLANT_VIBES if vibe in by_vibe] + [vibe for vibe in by_vibe if vibe not in PLANT_VIBES]
+        print_latency_table("Latency by vibe", {vibe: by_vibe[vibe] for vibe in ordered})
+    if by_status:
+        print_latency_table("Latency by status", {status: by_status[status] for status in PLANT_STATUSES if status in by_status})
+
+def print_slowest_requests(summary: ResultSummary):
+    """Print the slowest requests and their scenarios"""
+    slowest = summary.slowest()
+    if not slowest:
+        return
+    print(f"{Colors.BOLD}Slowest requests:{Colors.RESET}")
+    for duration, name, scenario in slowest:
+        print(f"  {duration:>8.3f}s  {name}" + (f" ({', '.join(f'{key}={value}' for key, value in scenario.items())})" if scenario else ""))
+    print()
+
 def print_results(results: List[TestResult]):
     """Print test results summary"""
     print_header("Test Results Summary")
@@ -473,10 +2094,14 @@ def print_results(results: List[TestResult]):
     failed = len(results) - passed
     total_duration = sum(r.duration for r in results)
     
+    if get_quality_validator() is not None:
+        get_quality_validator().drain()
     for result in results:
         if result.success:
             print_success(f"{result.name}")
             print(f"   {result.message}")
+            if result.quality:
+                print_warning(f"Quality: {', '.join(ISSUES[issue] for issue in result.quality)}")
         else:
             print_error(f"{result.name}")
             print(f"   {result.message}")
@@ -489,54 +2114,671 @@ def print_results(results: List[TestResult]):
         print_error(f"Failed: {failed}")
     print_info(f"Total Duration: {total_duration:.2f}s")
     print(f"  Average: {total_duration/len(results):.2f}s per test")
+    print()
+    
+    summary = ResultSummary.from_results(results)
+    print_retry_summary(summary)
+    print_token_report()
+    print_quality_report()
+    print_memory_report(summary)
+    print_weather_report()
+    print_dedup_report(summary)
+    
+    print_latency_report(summary)
     
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
 
+def write_results(results: List[TestResult], output_format: str, path: str, run_info: Dict):
+    """Write every result to `path` as JSON (with run metadata) or CSV (one row per result)"""
+    records = [result.to_dict() for result in results]
+    
+    if output_format == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"run": run_info, "results": records}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        return
+    
+    # CSV: flatten timings, server timings and scenario into prefixed columns
+    phases = list(TIMING_PHASES) + sorted({phase for r in results for phase in r.timings if phase not in TIMING_PHASES})
+    server_metrics = sorted({metric for r in results for metric in r.server_timing})
+    scenario_keys = sorted({key for r in results for key in r.scenario})
+    columns = ["name", "success", "skipped", "duration", "status_code", "response_bytes", "response_memory", "overhead", "coalesced", "attempts", "retries",
+               "retry_wait", "throttle_wait", "prompt_tokens", "output_tokens", "cost", "usage_estimated", "instance", "timestamp"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns + [f"timing_{phase}" for phase in phases] + [f"server_{metric}" for metric in server_metrics]
+                        + [f"scenario_{key}" for key in scenario_keys] + ["quality", "message"])
+        for record in records:
+            writer.writerow(
+                [record[column] for column in columns]
+                + [record["timings"].get(phase, "") for phase in phases]
+                + [record["server_timing"].get(metric, "") for metric in server_metrics]
+                + [record["scenario"].get(key, "") for key in scenario_keys]
+                + [";".join(record["quality"]) if record["quality"] is not None else ""]
+                + [record["message"].splitlines()[0] if record["message"] else ""]
+            )
+
+def load_baseline(path: str) -> List[Dict]:
+    """Read the result records from a file written with --output json"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("results"), list):
+        raise ValueError(f"{path} is not a results file written with --output json")
+    return data["results"]
+
+def compare_to_baseline(
+    results: List[TestResult],
+    baseline: List[Dict],
+    alpha: float = DEFAULT_REGRESSION_ALPHA,
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+) -> bool:
+    """Compare latency and error rate with a baseline run; returns True on a regression.
+    
+    Latency (successful requests only) is compared overall and per vibe with a
+    one-sided Mann-Whitney U test, and only counts as a regression when the
+    median is also at least `threshold` slower. The error rate is compared
+    with a one-sided two-proportion z-test.
+    """
+    print_header("Baseline Comparison")
+    current = [result.to_dict() for result in results]
+    regressed = False
+    side_by_side = len({record["scenario"].get("transport") for record in current}) > 1
+    
+    def latency_groups(records: List[Dict]) -> Dict[str, List[float]]:
+        groups: Dict[str, List[float]] = {"all requests": []}
+        for record in records:
+            if not record["success"]:
+                continue
+            groups["all requests"].append(record["duration"])
+            # Side-by-side runs are also compared transport by transport
+            transport = record["scenario"].get("transport")
+            if transport and side_by_side:
+                groups.setdefault(f"via {transport}", []).append(record["duration"])
+            vibe = record["scenario"].get("vibe")
+            if vibe:
+                groups.setdefault(vibe, []).append(record["duration"])
+        return groups
+    
+    baseline_groups = latency_groups(baseline)
+    current_groups = latency_groups(current)
+    
+    print(f"{Colors.BOLD}Latency (successful requests):{Colors.RESET}")
+    print(f"  {'':<16}{'n base/now':>12}{'p50 base':>10}{'p50 now':>10}{'p90 base':>10}{'p90 now':>10}{'change':>9}{'p-value':>10}")
+    via = [group for group in current_groups if group.startswith("via ")]
+    vibes = [vibe for vibe in current_groups if vibe != "all requests" and vibe not in via]
+    ordered = ["all requests"] + via + [vibe for vibe in PLANT_VIBES if vibe in vibes] + [vibe for vibe in vibes if vibe not in PLANT_VIBES]
+    for group in ordered:
+        before, after = baseline_groups.get(group, []), current_groups[group]
+        counts = f"{len(before)}/{len(after)}"
+        if len(before) < MIN_COMPARE_SAMPLES or len(after) < MIN_COMPARE_SAMPLES:
+            print(f"  {group:<16}{counts:>12}  (too few samples to compare)")
+            continue
+        before_histogram, after_histogram = LatencyHistogram(), LatencyHistogram()
+        for value in before:
+            before_histogram.record(value)
+        for value in after:
+            after_histogram.record(value)
+        before_p50, after_p50 = before_histogram.percentile(50), after_histogram.percentile(50)
+        change = (after_p50 - before_p50) / before_p50 if before_p50 > 0 else 0.0
+        p_value = mann_whitney_p(before, after)
+        line = (f"  {group:<16}{counts:>12}{before_p50:>9.3f}s{after_p50:>9.3f}s"
+                f"{before_histogram.percentile(90):>9.3f}s{after_histogram.percentile(90):>9.3f}s{change:>+8.1%}{p_value:>10.4f}")
+        if p_value < alpha and change >= threshold:
+            regressed = True
+            print(f"{Colors.RED}{line}  REGRESSION{Colors.RESET}")
+        else:
+            print(line)
+    print()
+    
+    baseline_failures = sum(1 for record in baseline if not record["success"])
+    current_failures = sum(1 for record in current if not record["success"])
+    baseline_rate = baseline_failures / len(baseline) if baseline else 0.0
+    current_rate = current_failures / len(current) if current else 0.0
+    p_value = error_rate_p(baseline_failures, len(baseline), current_failures, len(current))
+    line = (f"  Error rate: {baseline_rate:.1%} ({baseline_failures}/{len(baseline)}) -> "
+            f"{current_rate:.1%} ({current_failures}/{len(current)}), p = {p_value:.4f}")
+    print(f"{Colors.BOLD}Errors:{Colors.RESET}")
+    if p_value < alpha and current_rate > baseline_rate:
+        regressed = True
+        print(f"{Colors.RED}{line}  REGRESSION{Colors.RESET}")
+    else:
+        print(line)
+    print()
+    
+    if regressed:
+        print_error(f"Significant regression against the baseline (alpha {alpha:g})")
+    else:
+        print_success("No significant regression against the baseline")
+    print()
+    return regressed
+
+def run_message_tests(transport: Transport, args: argparse.Namespace, label: Optional[str] = None,
+                      replay: Optional[ReplaySchedule] = None) -> Tuple[List[TestResult], Optional[float], Optional[ResultSummary]]:
+    """Run the selected message mode (replay, load, matrix, one vibe, all suites or the default suite) through `transport`.
+    
+    `label` names the transport in summary titles when several run side by
+    side. Returns the results and, for replay, load and matrix runs, the
+    elapsed time and the summary. Replay and load runs only keep their
+    results when something needs them afterwards (--output, --compare or a
+    comparison of transports).
+    """
+    suffix = f" ({label})" if label else ""
+    keep_results = bool(args.output or args.compare or label)
+    if replay is not None:
+        summary, results, elapsed = run_replay(transport, replay, concurrency=args.concurrency, keep_results=keep_results)
+        print_load_summary(summary, elapsed, args.concurrency, title=f"Replay Summary{suffix}")
+        print_replay_comparison(replay, summary)
+        return results, elapsed, summary
+    if args.load:
+        summary, results, elapsed = run_load_test(
+            transport,
+            concurrency=args.concurrency,
+            rps=args.rps,
+            duration=args.duration,
+            total_requests=args.requests,
+            vibe=args.vibe,
+            keep_results=keep_results
+        )
+        print_load_summary(summary, elapsed, args.concurrency, args.rps, title=f"Load Test Summary{suffix}")
+        return results, elapsed, summary
+    if args.matrix:
+        results, elapsed = run_matrix_test(
+            transport,
+            args.matrix,
+            shard_spec=args.shard,
+            concurrency=args.concurrency,
+            workers=args.workers,
+            seed=args.seed,
+            vibe=args.vibe,
+            client_config={"pooling": not args.no_pool, "max_idle_per_host": max(args.concurrency, DEFAULT_MAX_IDLE_PER_HOST),
+                           "incremental_json": not args.full_json},
+            # Split the rate limit so all workers together stay under it
+            scheduler_config={"max_retries": args.max_retries, "rate_limit": args.rate_limit / args.workers if args.rate_limit else None, "burst": args.burst}
+        )
+        summary = ResultSummary.from_results(results)
+        print_load_summary(summary, elapsed, args.concurrency * args.workers, title=f"Scenario Matrix Summary{suffix}")
+        print_matrix_breakdown(results)
+        return results, elapsed, summary
+    if args.vibe:
+        print_header(f"Testing {args.vibe} Vibe")
+        result = test_message_generation(
+            transport=transport,
+            nickname="TestPlant",
+            species="Fiddle Leaf Fig",
+            vibe=args.vibe,
+            status="Thirsty",
+            health_streak=5,
+            last_watered_days_ago=3
+        )
+        return [result], None, None
+    if args.all:
+        return run_all_tests(transport), None, None
+    
+    # Default: run connectivity + all vibes
+    print_header("Default Test Suite")
+    results = [test_api_connectivity(transport.base_url)] if transport.has_backend else []
+    print_header("Testing All Plant Vibes")
+    results.extend(test_all_vibes(transport))
+    return results, None, None
+
+def print_transport_comparison(runs: Dict[str, List[TestResult]]):
+    """Print latency per transport side by side, and what the backend hop adds over calling Gemini directly"""
+    print_header("Transport Comparison")
+    
+    print(f"{Colors.BOLD}Requests:{Colors.RESET}")
+    totals: Dict[str, LatencyHistogram] = {}
+    server_times: Dict[str, LatencyHistogram] = {}
+    for name, results in runs.items():
+        passed = [r for r in results if r.success]
+        print(f"  {name:<16}{len(passed)}/{len(results)} succeeded")
+        totals[name], server_times[name] = LatencyHistogram(), LatencyHistogram()
+        for result in passed:
+            totals[name].record(result.duration)
+            server_times[name].record(server_time(result))
+    print()
+    
+    print_latency_table("Latency (successful requests)", totals)
+    # TTFB leaves out connection setup, which differs between hosts
+    print_latency_table("Server time (TTFB)", server_times)
+    
+    direct = totals.get("gemini")
+    if direct is None or direct.count < MIN_COMPARE_SAMPLES:
+        if direct is not None:
+            print_warning(f"Too few successful direct requests to size the backend hop (need {MIN_COMPARE_SAMPLES})")
+        print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+        return
+    
+    direct_durations = [r.duration for r in runs["gemini"] if r.success]
+    for name, results in runs.items():
+        if not TRANSPORTS[name].has_backend or totals[name].count < MIN_COMPARE_SAMPLES:
+            continue
+        hop_p50 = totals[name].percentile(50) - direct.percentile(50)
+        hop_p90 = totals[name].percentile(90) - direct.percentile(90)
+        p_value = mann_whitney_p(direct_durations, [r.duration for r in results if r.success])
+        print_info(f"The {name} hop adds {hop_p50 * 1000:+.0f}ms at p50 ({hop_p50 / direct.percentile(50):+.0%}) "
+                   f"and {hop_p90 * 1000:+.0f}ms at p90 over calling Gemini directly (p = {p_value:.4f})")
+        # Server-Timing splits the hop into time outside the function and time in the handler around the Gemini call
+        timed = [r for r in results if r.success and "handler" in r.server_timing and "gemini" in r.server_timing]
+        if timed:
+            outside = sum(max(0.0, r.duration - r.server_timing["handler"]) for r in timed) / len(timed)
+            handler = sum(max(0.0, r.server_timing["handler"] - r.server_timing["gemini"]) for r in timed) / len(timed)
+            print(f"  Per request: {outside * 1000:.0f}ms outside the function (network, routing, cold starts), "
+                  f"{handler * 1000:.0f}ms in the handler besides waiting on Gemini")
+    print()
+    print(f"{Colors.BOLD}{Colors.CYAN}{'=' * 70}{Colors.RESET}\n")
+
 def main():
     parser = argparse.ArgumentParser(description="Test harness for RootMate backend API")
     parser.add_argument("--url", default=DEFAULT_BACKEND_URL, help=f"Backend API URL (default: {DEFAULT_BACKEND_URL})")
+    parser.add_argument("--transport", default="backend", metavar="LIST", help=f"Where messages are sent, one or more of: {', '.join(TRANSPORTS)}; several run side by side (default: backend)")
     parser.add_argument("--vibe", choices=PLANT_VIBES, help="Test specific vibe")
     parser.add_argument("--all", action="store_true", help="Run all test suites")
     parser.add_argument("--quick", action="store_true", help="Run quick connectivity test only")
     parser.add_argument("--diagnose", action="store_true", help="Run diagnostic tests to identify issues")
+    parser.add_argument("--load", action="store_true", help="Run a concurrent load test against the message endpoint")
+    parser.add_argument("--concurrency", type=int, help=f"Maximum requests in flight during --load (default: {DEFAULT_LOAD_CONCURRENCY}), or sessions per worker for --simulate (default: {DEFAULT_SIMULATION_CONCURRENCY})")
+    parser.add_argument("--rps", type=float, help="Target request rate for --load (default: unthrottled)")
+    parser.add_argument("--duration", type=float, help="Stop --load after this many seconds")
+    parser.add_argument("--requests", type=int, help=f"Stop --load after this many requests (default: {DEFAULT_LOAD_REQUESTS})")
+    parser.add_argument("--soak", metavar="DURATION", help=f"Run at a steady --rps (default: {DEFAULT_SOAK_RPS:g}) for this long, e.g. 90m or 4h, and watch for drift")
+    parser.add_argument("--soak-window", type=float, default=DEFAULT_WINDOW, metavar="SECS", help=f"Time-series window for --soak in seconds (default: {DEFAULT_WINDOW:g})")
+    parser.add_argument("--cold-start", action="store_true", help="Profile cold-start against warm-start latency")
+    parser.add_argument("--idle-gaps", default=DEFAULT_IDLE_GAPS, metavar="LIST", help=f"Idle gaps before --cold-start probes (default: {DEFAULT_IDLE_GAPS})")
+    parser.add_argument("--cold-samples", type=int, default=DEFAULT_COLD_SAMPLES, metavar="N", help=f"Probes per idle gap (default: {DEFAULT_COLD_SAMPLES})")
+    parser.add_argument("--cold-rates", default=DEFAULT_COLD_RATES, metavar="LIST", help=f"Request rates for --cold-start frequency, in req/s (default: {DEFAULT_COLD_RATES}; --requests per rate, default {DEFAULT_COLD_RATE_REQUESTS})")
+    parser.add_argument("--find-capacity", nargs="?", const="rps", choices=["rps", "concurrency"], help="Search for the highest request rate (default) or concurrency that meets --slo")
+    parser.add_argument("--slo", default=DEFAULT_SLO, metavar="SPEC", help=f"SLO for --find-capacity: latency percentiles and error rate (default: {DEFAULT_SLO.replace('%', '%%')})")
+    parser.add_argument("--capacity-search", default=DEFAULT_STRATEGY, choices=SEARCH_STRATEGIES, help=f"How --find-capacity picks levels (default: {DEFAULT_STRATEGY})")
+    parser.add_argument("--capacity-start", type=float, default=1.0, metavar="N", help="First --find-capacity level (default: 1)")
+    parser.add_argument("--capacity-step", type=float, metavar="N", help="Increase per level for --capacity-search step (default: the start level)")
+    parser.add_argument("--capacity-max", type=float, metavar="N", help="Never hold a --find-capacity level above this")
+    parser.add_argument("--hold", default=f"{DEFAULT_HOLD:g}s", metavar="DURATION", help=f"How long each --find-capacity level is held (default: {DEFAULT_HOLD:g}s)")
+    parser.add_argument("--simulate", type=int, metavar="USERS", help="Simulate this many app users asking for their plants' daily messages")
+    parser.add_argument("--sim-window", default=DEFAULT_SIMULATION_WINDOW, metavar="DURATION", help=f"Time over which --simulate users arrive (default: {DEFAULT_SIMULATION_WINDOW})")
+    parser.add_argument("--arrivals", default=DEFAULT_ARRIVALS, metavar="SPEC", help=f"Arrival pattern for --simulate: uniform or burst[:FRACTION[:DECAY]] (default: {DEFAULT_ARRIVALS})")
+    parser.add_argument("--plants-per-user", type=float, default=DEFAULT_PLANTS_PER_USER, metavar="MEAN", help=f"Mean plants per --simulate user (default: {DEFAULT_PLANTS_PER_USER:g})")
+    parser.add_argument("--soak-error-limit", type=float, default=DEFAULT_ERROR_LIMIT * 100, metavar="PCT", help=f"Error rate (%%) above which a --soak window is flagged and the run fails (default: {DEFAULT_ERROR_LIMIT * 100:g})")
+    parser.add_argument("--soak-file", default=DEFAULT_SOAK_FILE, metavar="PATH", help=f"Rolling file the --soak windows are written to (default: {DEFAULT_SOAK_FILE})")
+    parser.add_argument("--no-pool", action="store_true", help="Disable keep-alive connection pooling (every request pays a full handshake)")
+    parser.add_argument("--full-json", action="store_true", help="Read and parse whole response bodies instead of extracting the message as they arrive")
+    parser.add_argument("--memory", action="store_true", help="Trace heap use and report peak memory per in-flight request")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILER, choices=PROFILERS, help=f"Profile the harness and report its own overhead per request (default: {DEFAULT_PROFILER})")
+    parser.add_argument("--profile-file", metavar="PATH", help="Where --profile writes its folded stacks or pstats")
+    parser.add_argument("--batch", type=int, metavar="N", help=f"Generate messages for N plants in batched requests (up to {MAX_BATCH_SIZE} per request)")
+    parser.add_argument("--matrix", metavar="STRATEGY", help=f"Sweep the scenario matrix: {', '.join(STRATEGIES)} (e.g. random-200)")
+    parser.add_argument("--no-validate", action="store_true", help="Don't check generated messages for length, vibe, emoji and fallback text")
+    parser.add_argument("--record", metavar="FILE", help="Append every message request and response to this capture file (gzipped if it ends in .gz)")
+    parser.add_argument("--replay", metavar="FILE", help="Re-send the message requests captured in FILE with their original spacing")
+    parser.add_argument("--replay-speed", type=float, default=DEFAULT_REPLAY_SPEED, metavar="X", help=f"Speed-up of --replay over the captured timeline (default: {DEFAULT_REPLAY_SPEED:g})")
+    parser.add_argument("--results-log", metavar="FILE", help="Append every --load, --replay and --soak result to this file as a JSON line (gzipped if it ends in .gz)")
+    parser.add_argument("--dedup", action="store_true", help="Share one upstream call between identical requests in flight at the same time")
+    parser.add_argument("--weather", nargs="?", const=DEFAULT_WEATHER_MODE, choices=WEATHER_MODES, help=f"Use real forecasts for weather tests and the --matrix weather axis (default mode: {DEFAULT_WEATHER_MODE})")
+    parser.add_argument("--weather-fixtures", default=DEFAULT_WEATHER_FIXTURES, metavar="PATH", help=f"Forecast fixture file for --weather fixtures and record (default: {DEFAULT_WEATHER_FIXTURES})")
+    parser.add_argument("--shard", metavar="I/N", help="Run only shard I of N of the --matrix scenarios")
+    parser.add_argument("--workers", type=int, help="Worker processes for --matrix (default: 1) and --simulate (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for pairwise and random --matrix sampling and the --simulate users (default: 0)")
+    parser.add_argument("--stream", action="store_true", help="Stream messages and report time-to-first-token")
+    parser.add_argument("--budget", metavar="LIMIT", help="Stop once the run would exceed this many tokens and/or dollars, e.g. 250k, $0.50 or 250k,$0.50")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help=f"Retries for 429/5xx responses and connection errors (default: {DEFAULT_MAX_RETRIES}, 0 to disable)")
+    parser.add_argument("--rate-limit", type=float, metavar="RPS", help="Client-side rate limit in requests per second, applied to every attempt")
+    parser.add_argument("--burst", type=float, help="Requests allowed in a burst under --rate-limit (default: one second's worth)")
+    parser.add_argument("--output", choices=["json", "csv"], help="Also write every result in this format")
+    parser.add_argument("--output-file", metavar="PATH", help="Where --output writes (default: test_results.json or .csv)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a results file from --output json; exit nonzero on a significant regression")
+    parser.add_argument("--alpha", type=float, default=DEFAULT_REGRESSION_ALPHA, help=f"Significance level for --compare (default: {DEFAULT_REGRESSION_ALPHA:g})")
+    parser.add_argument("--regression-threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD, help=f"Smallest median slowdown --compare reports, as a fraction (default: {DEFAULT_REGRESSION_THRESHOLD:g})")
+    parser.add_argument("--mock", action="store_true", help="Run against a local mock backend instead of --url")
+    parser.add_argument("--mock-latency", default=DEFAULT_LATENCY, help=f"Model latency spec for --mock in ms (default: {DEFAULT_LATENCY})")
+    parser.add_argument("--mock-error-429", type=float, default=0.0, help="Fraction of --mock requests answered with 429")
+    parser.add_argument("--mock-error-500", type=float, default=0.0, help="Fraction of --mock requests answered with 500")
+    parser.add_argument("--mock-cold-start", default=DEFAULT_COLD_START, help=f"Latency spec in ms added to each --mock instance's first request (default: {DEFAULT_COLD_START})")
+    parser.add_argument("--mock-idle-timeout", type=float, help="Seconds a --mock backend instance may sit idle before it is recycled (default: never)")
+    parser.add_argument("--mock-replay", metavar="FILE", help="Answer --mock requests with the responses captured in FILE (from --record)")
     
     args = parser.parse_args()
     
+    if args.concurrency is None:
+        if args.simulate:
+            args.concurrency = DEFAULT_SIMULATION_CONCURRENCY
+        elif args.find_capacity == "rps":
+            args.concurrency = DEFAULT_CAPACITY_CONCURRENCY
+        else:
+            args.concurrency = DEFAULT_LOAD_CONCURRENCY
+    if args.workers is None:
+        args.workers = (os.cpu_count() or 1) if args.simulate else 1
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.rps is not None and args.rps <= 0:
+        parser.error("--rps must be positive")
+    if args.max_retries < 0:
+        parser.error("--max-retries cannot be negative")
+    if args.rate_limit is not None and args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        transport_names = parse_transports(args.transport)
+    except ValueError as e:
+        parser.error(f"--transport: {e}")
+    # Everything but batching, streaming and the diagnostics sends plain message requests
+    message_tests = args.replay or args.load or args.matrix or not (args.batch or args.stream or args.diagnose or args.quick)
+    if (args.soak or args.cold_start or args.simulate or args.find_capacity) and len(transport_names) > 1:
+        parser.error("--soak, --cold-start, --simulate and --find-capacity run against a single --transport")
+    if not (message_tests or args.soak or args.cold_start or args.simulate or args.find_capacity) and (len(transport_names) > 1 or not TRANSPORTS[transport_names[0]].has_backend):
+        parser.error("--batch, --stream, --diagnose and --quick need a single backend --transport (backend or mock)")
+    soak_duration = None
+    if args.soak:
+        try:
+            soak_duration = parse_duration(args.soak)
+        except ValueError as e:
+            parser.error(f"--soak: {e}")
+        if args.soak_window <= 0:
+            parser.error("--soak-window must be positive")
+        if not 0 <= args.soak_error_limit < 100:
+            parser.error("--soak-error-limit must be from 0 up to 100")
+        if args.output or args.compare:
+            parser.error("--output and --compare don't apply to --soak (its windows are written to --soak-file)")
+    if args.cold_start:
+        try:
+            idle_gaps = parse_float_list(args.idle_gaps, parse_duration)
+            cold_rates = parse_float_list(args.cold_rates)
+        except ValueError as e:
+            parser.error(f"--cold-start: {e}")
+        if args.cold_samples < 1:
+            parser.error("--cold-samples must be at least 1")
+    if args.simulate is not None:
+        try:
+            simulation_window = parse_duration(args.sim_window)
+            arrivals = ArrivalProfile(args.arrivals)
+        except ValueError as e:
+            parser.error(f"--simulate: {e}")
+        if args.simulate < 1:
+            parser.error("--simulate needs at least 1 user")
+        if args.plants_per_user < 1:
+            parser.error("--plants-per-user must be at least 1")
+        if args.output or args.compare:
+            parser.error("--output and --compare don't apply to --simulate (results are aggregated in the workers)")
+    if args.find_capacity:
+        try:
+            slo = SLO.parse(args.slo)
+            hold = parse_duration(args.hold)
+            capacity_search = CapacitySearch(
+                args.capacity_search,
+                start=args.capacity_start,
+                step=args.capacity_step,
+                integer=args.find_capacity == "concurrency",
+                max_level=args.capacity_max
+            )
+        except ValueError as e:
+            parser.error(f"--find-capacity: {e}")
+        if args.capacity_start <= 0 or (args.capacity_step is not None and args.capacity_step <= 0):
+            parser.error("--capacity-start and --capacity-step must be positive")
+        if args.capacity_max is not None and args.capacity_max < args.capacity_start:
+            parser.error("--capacity-max must be at least --capacity-start")
+        if args.output or args.compare:
+            parser.error("--output and --compare don't apply to --find-capacity")
+    if args.memory and (args.simulate or args.workers > 1):
+        parser.error("--memory traces this process only; it can't be used with --simulate or --workers")
+    if args.profile and (args.simulate or args.workers > 1):
+        parser.error("--profile covers this process only; it can't be used with --simulate or --workers")
+    if args.dedup and (args.simulate or args.workers > 1):
+        parser.error("--dedup shares requests within this process; it can't be used with --simulate or --workers")
+    if args.results_log and not (args.load or args.replay or args.soak):
+        parser.error("--results-log applies to --load, --replay and --soak")
+    if args.record and (args.simulate or args.workers > 1):
+        parser.error("--record captures this process's requests; it can't be used with --simulate or --workers")
+    replay_schedule = None
+    if args.replay:
+        if args.load or args.matrix or args.soak or args.cold_start or args.simulate or args.find_capacity:
+            parser.error("--replay is a run mode of its own; it can't be combined with --load, --matrix, --soak, --cold-start, --simulate or --find-capacity")
+        try:
+            replay_schedule = ReplaySchedule(load_capture(args.replay), args.replay_speed)
+        except (OSError, ValueError) as e:
+            parser.error(f"--replay: {e}")
+    if args.weather == "record" and args.workers > 1:
+        parser.error("--weather record writes one fixture file; it can't be used with --workers")
+    if args.shard and not args.matrix:
+        parser.error("--shard requires --matrix")
+    if args.matrix:
+        try:
+            sample_scenarios({"check": [None]}, args.matrix)
+            if args.shard:
+                parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    budget = None
+    if args.budget:
+        try:
+            budget = parse_budget(args.budget)
+        except ValueError as e:
+            parser.error(str(e))
+    if not 0 < args.alpha < 1:
+        parser.error("--alpha must be between 0 and 1")
+    
+    # Fail before running anything if the baseline can't be used
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare)
+        except (OSError, ValueError) as e:
+            parser.error(f"--compare: {e}")
+    
     base_url = args.url.rstrip('/')
     
+    mock_url = None
+    if args.mock or "mock" in transport_names:
+        try:
+            mock_config = MockConfig(
+                latency=args.mock_latency,
+                error_429=args.mock_error_429,
+                error_500=args.mock_error_500,
+                cold_start=args.mock_cold_start,
+                idle_timeout=args.mock_idle_timeout,
+                replay=args.mock_replay
+            )
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        mock_url = start_mock_server(mock_config).url
+    if args.mock:
+        base_url = mock_url
+    
+    def transport_url(name: str) -> str:
+        # --mock points every transport at the local mock server, which speaks both protocols
+        if name == "gemini":
+            return f"{mock_url}{GEMINI_MODELS_PATH}" if args.mock else GEMINI_BASE_URL
+        return mock_url if name == "mock" else base_url
+    
+    transports = [create_transport(name, transport_url(name)) for name in transport_names]
+    # Batching, streaming and the diagnostics only exist on the backend
+    backend_url = transports[0].base_url
+    
+    # Keep enough idle connections around for every concurrent load worker
+    configure_client(pooling=not args.no_pool, max_idle_per_host=max(args.concurrency, DEFAULT_MAX_IDLE_PER_HOST),
+                     incremental_json=not args.full_json)
+    configure_scheduler(max_retries=args.max_retries, rate_limit=args.rate_limit, burst=args.burst)
+    configure_ledger(budget=budget)
+    configure_memory_profile(args.memory)
+    configure_single_flight(args.dedup)
+    try:
+        configure_capture(args.record)
+    except OSError as e:
+        parser.error(f"--record: {e}")
+    try:
+        configure_result_log(args.results_log)
+    except OSError as e:
+        parser.error(f"--results-log: {e}")
+    configure_quality_validator(not args.no_validate)
+    try:
+        configure_weather_provider(args.weather, args.weather_fixtures)
+    except ValueError as e:
+        parser.error(f"--weather: {e}")
+    
     print_header("RootMate API Test Harness")
-    print_info(f"Testing endpoint: {base_url}{API_ENDPOINT}")
+    if message_tests or args.soak or args.cold_start or args.simulate or args.find_capacity:
+        for transport in transports:
+            print_info(f"Testing through {transport.name}: {transport.description}, {transport.base_url}")
+    else:
+        print_info(f"Testing endpoint: {backend_url}{API_ENDPOINT}")
+    if args.no_pool:
+        print_info("Connection pooling disabled")
+    if args.full_json:
+        print_info("Reading whole response bodies (incremental JSON extraction disabled)")
+    if args.memory:
+        print_info("Tracing heap use (requests run slower while traced)")
+    if args.profile:
+        print_info(f"Profiling the harness ({args.profile})")
+    if args.dedup:
+        print_info("Identical requests in flight at the same time share one upstream call")
+    if args.weather:
+        print_info(f"Weather from {'the fixtures in ' + args.weather_fixtures if args.weather == 'fixtures' else 'Open-Meteo'} ({args.weather})")
+    if args.record:
+        print_info(f"Recording message requests to {args.record}")
+    if mock_url:
+        print_info(f"Using local mock backend ({'replaying ' + args.mock_replay if args.mock_replay else 'latency ' + args.mock_latency})")
+    if args.rate_limit:
+        print_info(f"Rate limited to {args.rate_limit:g} req/s")
+    if budget:
+        print_info(f"Token budget: {budget}")
     print()
     
-    if args.diagnose:
-        results = run_diagnostics(base_url)
-    elif args.quick:
-        results = run_quick_test(base_url)
-    elif args.vibe:
-        print_header(f"Testing {args.vibe} Vibe")
-        result = test_message_generation(
-            base_url=base_url,
-            nickname="TestPlant",
-            species="Fiddle Leaf Fig",
+    profiler = None
+    if args.profile:
+        profiler = create_profiler(args.profile)
+        profiler.start()
+    
+    soak_monitor = None
+    simulation = None
+    elapsed = None
+    # Summaries of runs whose results weren't all kept
+    summary = None
+    if soak_duration:
+        soak_monitor, elapsed = run_soak_test(
+            transports[0],
+            soak_duration,
+            rps=args.rps or DEFAULT_SOAK_RPS,
+            concurrency=args.concurrency,
+            window=args.soak_window,
+            path=args.soak_file,
             vibe=args.vibe,
-            status="Thirsty",
-            health_streak=5,
-            last_watered_days_ago=3
+            error_limit=args.soak_error_limit / 100
+        )
+        print_soak_summary(soak_monitor, elapsed)
+        # Individual results aren't kept; the flags and the overall error rate decide the exit status
+        results = []
+    elif args.cold_start:
+        profile, results = run_cold_start_profile(
+            transports[0],
+            idle_gaps,
+            samples=args.cold_samples,
+            rates=cold_rates,
+            rate_requests=args.requests or DEFAULT_COLD_RATE_REQUESTS,
+            concurrency=args.concurrency,
+            vibe=args.vibe
+        )
+        print_cold_start_report(profile)
+    elif args.find_capacity:
+        capacity_steps = run_capacity_search(
+            transports[0],
+            args.find_capacity,
+            capacity_search,
+            slo,
+            hold=hold,
+            concurrency=args.concurrency,
+            vibe=args.vibe
+        )
+        print_capacity_report(capacity_steps, capacity_search, slo, args.find_capacity)
+        # Finding where the SLO breaks is the point, so failed requests don't fail the run
+        results = []
+    elif args.simulate:
+        simulation, elapsed = run_user_simulation(
+            transports[0],
+            args.simulate,
+            simulation_window,
+            arrivals,
+            plants_per_user=args.plants_per_user,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            seed=args.seed,
+            client_config={"pooling": not args.no_pool, "max_idle_per_host": max(args.concurrency, DEFAULT_MAX_IDLE_PER_HOST),
+                           "incremental_json": not args.full_json},
+            # Split the rate limit so all workers together stay under it
+            scheduler_config={"max_retries": args.max_retries, "rate_limit": args.rate_limit / args.workers if args.rate_limit else None, "burst": args.burst}
         )
-        results = [result]
-    elif args.all:
-        results = run_all_tests(base_url)
+        print_simulation_report(simulation, elapsed)
+        results = []
+    elif message_tests:
+        results = []
+        runs: Dict[str, List[TestResult]] = {}
+        for transport in transports:
+            label = transport.name if len(transports) > 1 else None
+            if label:
+                print_header(f"Transport: {transport.name} ({transport.description})")
+            transport_results, elapsed, transport_summary = run_message_tests(transport, args, label, replay_schedule)
+            if transport_summary is not None:
+                summary = summary or ResultSummary()
+                summary.merge(transport_summary)
+            for result in transport_results:
+                result.scenario["transport"] = transport.name
+                if label:
+                    result.name = f"{result.name} via {transport.name}"
+            runs[transport.name] = transport_results
+            results.extend(transport_results)
+        if len(transports) > 1:
+            print_transport_comparison(runs)
+    elif args.batch:
+        results = run_batch_test(backend_url, args.batch, args.vibe)
+    elif args.stream:
+        results = run_streaming_tests(backend_url, args.vibe)
+    elif args.diagnose:
+        results = run_diagnostics(backend_url)
     else:
-        # Default: run connectivity + all vibes
-        print_header("Default Test Suite")
-        results = [test_api_connectivity(base_url)]
-        print_header("Testing All Plant Vibes")
-        results.extend(test_all_vibes(base_url))
+        results = run_quick_test(backend_url)
+    
+    if get_capture() is not None:
+        print_info(f"Recorded {get_capture().records} requests to {args.record}")
+        configure_capture(None)
+    if get_result_log() is not None:
+        print_info(f"Wrote {get_result_log().records} results to {args.results_log}")
+        configure_result_log(None)
+    
+    if not (args.replay or args.load or args.matrix or args.soak or args.cold_start or args.simulate or args.find_capacity):
+        print_results(results)
+    
+    if args.output:
+        output_file = args.output_file or f"test_results.{args.output}"
+        run_info = {
+            "url": base_url,
+            "transports": {transport.name: transport.base_url for transport in transports},
+            "mock": args.mock,
+            "mode": next((mode for mode in ["replay", "load", "matrix", "cold_start", "batch", "stream", "diagnose", "quick", "vibe", "all"] if getattr(args, mode)), "default"),
+            "pooling": not args.no_pool,
+            "incremental_json": not args.full_json,
+            "weather": args.weather,
+            "dedup": args.dedup,
+            "validated": not args.no_validate,
+            "finished_at": datetime.now().isoformat()
+        }
+        if args.load:
+            run_info.update(concurrency=args.concurrency, rps=args.rps, elapsed=elapsed)
+        if args.replay:
+            run_info.update(capture=args.replay, replay_speed=args.replay_speed, concurrency=args.concurrency, elapsed=elapsed)
+        if args.matrix:
+            run_info.update(strategy=args.matrix, shard=args.shard, workers=args.workers, seed=args.seed, elapsed=elapsed)
+        write_results(results, args.output, output_file, run_info)
+        print_info(f"Wrote {len(results)} results to {output_file}")
+    
+    if profiler is not None:
+        profiler.stop()
+        print_overhead_report(summary or ResultSummary.from_results(results), profiler, args.profile_file or DEFAULT_PROFILE_FILES[args.profile])
+    
+    regressed = baseline is not None and compare_to_baseline(results, baseline, args.alpha, args.regression_threshold)
     
-    print_results(results)
+    regressed = regressed or (soak_monitor is not None and (soak_monitor.regressed or soak_monitor.too_many_failures))
     
-    # Exit with error code if any tests failed
-    if any(not r.success for r in results):
+    # Exit with error code if any tests failed or performance regressed
+    # Simulated requests, and load and replay results that weren't kept, have their failures counted separately
+    if (regressed or any(not r.success for r in results) or (summary is not None and summary.failures)
+            or (simulation is not None and simulation.failures)):
         sys.exit(1)
 
 if __name__ == "__main__":
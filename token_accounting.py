@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Token and cost accounting for generated messages, with an optional budget.
+
+Every model call is booked in a TokenLedger: the prompt and output token
+counts Gemini reports (usageMetadata, or the backend's `usage` block),
+their cost at the model's list price, and per-vibe and per-species totals.
+
+With a Budget, each call first reserves its estimated usage and is refused
+with BudgetExceeded if that could take the run over its token or cost
+ceiling, so concurrent requests can't overshoot it together. The reservation
+is replaced by the real counts once the response arrives.
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# USD per million tokens: (input, output)
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00)
+}
+DEFAULT_MODEL = "gemini-2.5-flash-lite"
+
+# Output tokens assumed per message before any response has been seen
+DEFAULT_OUTPUT_ESTIMATE = 100
+
+class BudgetExceeded(Exception):
+    """Raised instead of sending a request that could take the run over budget"""
+
+class TokenUsage:
+    """Prompt and output tokens of one model call (or one plant's share of it)"""
+    def __init__(self, prompt_tokens: int = 0, output_tokens: int = 0, estimated: bool = False):
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        # True when counted locally because the API didn't report usage
+        self.estimated = estimated
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.output_tokens
+
+    @classmethod
+    def from_usage_metadata(cls, metadata: Optional[Dict]) -> Optional["TokenUsage"]:
+        """From a Gemini generateContent `usageMetadata` block"""
+        if not isinstance(metadata, dict):
+            return None
+        return cls(metadata.get("promptTokenCount", 0), metadata.get("candidatesTokenCount", 0))
+
+    @classmethod
+    def from_backend(cls, usage: Optional[Dict]) -> Optional["TokenUsage"]:
+        """From the `usage` block of an /api/generate-message response"""
+        if not isinstance(usage, dict):
+            return None
+        return cls(usage.get("promptTokens", 0), usage.get("outputTokens", 0))
+
+    def cost(self, model: str = DEFAULT_MODEL) -> float:
+        """List price in USD (0 for models without known pricing)"""
+        input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+        return (self.prompt_tokens * input_price + self.output_tokens * output_price) / 1_000_000
+
+    def split(self, weights: List[float]) -> List["TokenUsage"]:
+        """Share a batched call between its plants: prompt tokens evenly, output tokens by weight"""
+        if not weights:
+            return []
+        total_weight = sum(weights)
+        count = len(weights)
+        return [
+            TokenUsage(
+                round(self.prompt_tokens / count),
+                round(self.output_tokens * (weight / total_weight if total_weight else 1 / count)),
+                self.estimated
+            )
+            for weight in weights
+        ]
+
+class Budget:
+    """Ceilings for a run: total tokens and/or cost in USD"""
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+
+    def divide(self, parts: int) -> "Budget":
+        """An equal share of this budget, for one of `parts` worker processes"""
+        return Budget(
+            self.max_tokens // parts if self.max_tokens is not None else None,
+            self.max_cost / parts if self.max_cost is not None else None
+        )
+
+    def __str__(self) -> str:
+        limits = []
+        if self.max_tokens is not None:
+            limits.append(f"{self.max_tokens:,} tokens")
+        if self.max_cost is not None:
+            limits.append(f"${self.max_cost:.4f}")
+        return " / ".join(limits) or "unlimited"
+
+def parse_budget(spec: str) -> Budget:
+    """Parse limits like '200000', '250k', '1.5m', '$0.50' or '250k,$0.50'"""
+    budget = Budget()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        try:
+            if part.startswith("$"):
+                budget.max_cost = float(part[1:])
+            else:
+                multiplier = {"k": 1_000, "m": 1_000_000}.get(part[-1].lower(), 1)
+                number = part[:-1] if multiplier > 1 else part
+                budget.max_tokens = int(float(number) * multiplier)
+        except ValueError:
+            raise ValueError(f"Invalid budget '{part}' (expected tokens like 250k or a cost like $0.50)")
+    if budget.max_tokens is None and budget.max_cost is None:
+        raise ValueError(f"Invalid budget '{spec}'")
+    if (budget.max_tokens is not None and budget.max_tokens <= 0) or (budget.max_cost is not None and budget.max_cost <= 0):
+        raise ValueError("Budget limits must be positive")
+    return budget
+
+class UsageTotals:
+    """Running totals for one group of messages (e.g. one vibe)"""
+    def __init__(self):
+        self.messages = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.max_output_tokens = 0
+        self.cost = 0.0
+
+    def add(self, usage: TokenUsage, cost: float):
+        self.messages += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.output_tokens += usage.output_tokens
+        self.max_output_tokens = max(self.max_output_tokens, usage.output_tokens)
+        self.cost += cost
+
+class TokenLedger:
+    """Thread-safe record of token usage and spend for a run"""
+    def __init__(self, model: str = DEFAULT_MODEL, budget: Optional[Budget] = None):
+        self.model = model
+        self.budget = budget
+        self.totals = UsageTotals()
+        self.groups: Dict[str, Dict[str, UsageTotals]] = {}
+        self.estimated_messages = 0
+        # Set once a request has been refused for budget
+        self.exhausted = False
+        self._reserved_tokens = 0
+        self._reserved_cost = 0.0
+        self._lock = threading.Lock()
+
+    def _expected_output(self) -> float:
+        if self.totals.messages:
+            return self.totals.output_tokens / self.totals.messages
+        return DEFAULT_OUTPUT_ESTIMATE
+
+    def reserve(self, prompt_tokens: int, messages: int = 1) -> TokenUsage:
+        """Hold the expected usage of a call before sending it.
+
+        Raises BudgetExceeded if the call could take the run over budget.
+        Pass the result to settle() or release() once the call is done.
+        """
+        with self._lock:
+            reservation = TokenUsage(prompt_tokens, round(self._expected_output() * messages), estimated=True)
+            cost = reservation.cost(self.model)
+            if self.budget is not None:
+                tokens_after = self.totals.prompt_tokens + self.totals.output_tokens + self._reserved_tokens + reservation.total_tokens
+                cost_after = self.totals.cost + self._reserved_cost + cost
+                if (self.budget.max_tokens is not None and tokens_after > self.budget.max_tokens) or \
+                   (self.budget.max_cost is not None and cost_after > self.budget.max_cost):
+                    self.exhausted = True
+                    raise BudgetExceeded(f"Budget of {self.budget} reached ({self.spent_summary()})")
+            self._reserved_tokens += reservation.total_tokens
+            self._reserved_cost += cost
+            return reservation
+
+    def release(self, reservation: TokenUsage):
+        """Drop a reservation for a call that failed (failed calls aren't billed)"""
+        with self._lock:
+            self._reserved_tokens -= reservation.total_tokens
+            self._reserved_cost -= reservation.cost(self.model)
+
+    def settle(self, reservation: TokenUsage, usages: List[TokenUsage], groups: List[Dict[str, str]]):
+        """Replace a reservation with the real usage, one entry (and group labels) per message"""
+        with self._lock:
+            self._reserved_tokens -= reservation.total_tokens
+            self._reserved_cost -= reservation.cost(self.model)
+            for usage, labels in zip(usages, groups):
+                self._add(usage, labels)
+
+    def record(self, usage: TokenUsage, labels: Dict[str, str]):
+        """Book one message's usage directly (e.g. usage collected by another process)"""
+        with self._lock:
+            self._add(usage, labels)
+
+    def _add(self, usage: TokenUsage, labels: Dict[str, str]):
+        cost = usage.cost(self.model)
+        self.totals.add(usage, cost)
+        if usage.estimated:
+            self.estimated_messages += 1
+        for axis, value in labels.items():
+            self.groups.setdefault(axis, {}).setdefault(value, UsageTotals()).add(usage, cost)
+
+    def group_rows(self, axis: str) -> List[Tuple[str, UsageTotals]]:
+        """Totals per value of `axis`, most output tokens per message first"""
+        with self._lock:
+            rows = list(self.groups.get(axis, {}).items())
+        return sorted(rows, key=lambda row: -row[1].output_tokens / max(1, row[1].messages))
+
+    def spent_summary(self) -> str:
+        return f"{self.totals.prompt_tokens + self.totals.output_tokens:,} tokens, ${self.totals.cost:.4f} spent"
+
+# Shared ledger used by the test scripts (no budget)
+_default_ledger = TokenLedger()
+
+def get_ledger() -> TokenLedger:
+    return _default_ledger
+
+def configure_ledger(model: str = DEFAULT_MODEL, budget: Optional[Budget] = None) -> TokenLedger:
+    """Replace the shared ledger"""
+    global _default_ledger
+    _default_ledger = TokenLedger(model, budget)
+    return _default_ledger
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Capture and replay of message traffic, for benchmarks that see the same
+requests and responses every run.
+
+Live Gemini output varies from run to run (temperature 0.8), and so do
+response sizes and timings. A capture pins them down: one compact JSON line
+per message request, appended as results arrive (gzip-compressed when the
+path ends in .gz):
+
+    {"at":1760779200.512,"transport":"backend","request":{...},"status":200,"message":"...",
+     "usage":[118,52],"duration":0.8123,"server":0.7904,"size":318}
+
+`at` is when the request was sent, `duration` how long it took, and
+`server` the backend's own handler time (from Server-Timing) when it
+reported one. A capture can be replayed two ways:
+
+    requests    ReplaySchedule re-sends the captured requests at their
+                original spacing, or scaled by a speed factor, through any
+                transport (test_harness.py --replay)
+    responses   ReplaySource answers requests with captured responses after
+                the captured server time, so the local mock server stands in
+                for a recorded backend (mock_server.py --replay)
+
+Together they replay a recorded run against a recorded backend, which makes
+two harness versions comparable request for request.
+"""
+
+import gzip
+import json
+import copy
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, IO, Iterator, List, Optional, Tuple
+
+from single_flight import payload_key
+
+DEFAULT_REPLAY_SPEED = 1.0
+# Longer idle gaps between captured requests (e.g. between appended runs) are shortened to this
+MAX_REPLAY_GAP = 30.0  # seconds
+
+def open_text(path: str, mode: str) -> IO:
+    """Open a UTF-8 text file for reading or appending, through gzip if the path ends in .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class CaptureWriter:
+    """Appends one line per message request to a capture file"""
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        # Appending keeps earlier captures; each line stands alone
+        self._file = open_text(path, "a")
+
+    def record(self, transport: str, request: Dict, sent_at: float, status: Optional[int], duration: float,
+               message: Optional[str] = None, error: Optional[str] = None, usage: Optional[Tuple[int, int]] = None,
+               server: Optional[float] = None, size: Optional[int] = None):
+        """Append one request and its outcome (`sent_at` is a time.time() timestamp)"""
+        record = {"at": round(sent_at, 3), "transport": transport, "request": request, "status": status,
+                  "duration": round(duration, 4)}
+        # Absent fields are left out to keep lines short
+        for name, value in (("message", message), ("error", error), ("usage", list(usage) if usage else None),
+                            ("server", round(server, 4) if server is not None else None), ("size", size)):
+            if value is not None:
+                record[name] = value
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def iter_capture(path: str) -> Iterator[Dict]:
+    """Records of a capture file in file order (a truncated last line is skipped)"""
+    with open_text(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # An interrupted run can leave half a line at the end
+                continue
+
+def load_capture(path: str) -> List[Dict]:
+    """Every record of a capture file, in the order the requests were sent"""
+    records = [record for record in iter_capture(path) if isinstance(record.get("request"), dict)]
+    if not records:
+        raise ValueError(f"No captured requests in {path}")
+    return sorted(records, key=lambda record: record["at"])
+
+def request_key(request: Dict) -> str:
+    """Match key for a captured request: its payload without lastWatered, which moves with the clock"""
+    plant = request.get("plant")
+    if isinstance(plant, dict) and "lastWatered" in plant:
+        request = {**request, "plant": {key: value for key, value in plant.items() if key != "lastWatered"}}
+    return payload_key(request)
+
+def rebase_request(record: Dict, now: datetime) -> Dict:
+    """The captured request as it would be sent at `now`: lastWatered moved so the days since watering stay the same"""
+    request = copy.deepcopy(record["request"])
+    plant = request.get("plant")
+    if isinstance(plant, dict) and isinstance(plant.get("lastWatered"), str):
+        try:
+            last_watered = datetime.fromisoformat(plant["lastWatered"].rstrip("Z"))
+        except ValueError:
+            return request
+        shifted = last_watered + (now - datetime.fromtimestamp(record["at"]))
+        plant["lastWatered"] = shifted.replace(second=0, microsecond=0).isoformat() + "Z"
+    return request
+
+class ReplaySchedule:
+    """When to send each captured request during a replay, relative to its start"""
+    def __init__(self, records: List[Dict], speed: float = DEFAULT_REPLAY_SPEED, max_gap: float = MAX_REPLAY_GAP):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        self.speed = speed
+        self.entries: List[Tuple[float, Dict]] = []
+        # Captured time runs at `speed` times wall time; long gaps are cut to max_gap
+        offset = 0.0
+        previous = records[0]["at"] if records else 0.0
+        for record in records:
+            offset += min(record["at"] - previous, max_gap)
+            previous = record["at"]
+            self.entries.append((offset / speed, record))
+
+    @property
+    def duration(self) -> float:
+        return self.entries[-1][0] if self.entries else 0.0
+
+class ReplaySource:
+    """Captured responses for incoming requests: the next capture of the same request, else the next capture in order"""
+    def __init__(self, records: List[Dict]):
+        self.records = records
+        self._by_key: Dict[str, Deque[Dict]] = {}
+        for record in records:
+            self._by_key.setdefault(request_key(record["request"]), deque()).append(record)
+        self._next = 0
+        self._lock = threading.Lock()
+        self.matched = 0
+        self.unmatched = 0
+
+    def response_for(self, request: Dict) -> Dict:
+        """The captured record to answer `request` with; captures are reused in rotation once used up"""
+        candidates = self._by_key.get(request_key(request))
+        with self._lock:
+            if candidates:
+                record = candidates[0]
+                candidates.rotate(-1)
+                self.matched += 1
+                return record
+            record = self.records[self._next % len(self.records)]
+            self._next += 1
+            self.unmatched += 1
+            return record
+
+_capture: Optional[CaptureWriter] = None
+
+def get_capture() -> Optional[CaptureWriter]:
+    """Return the process's capture writer (None unless recording)"""
+    return _capture
+
+def configure_capture(path: Optional[str] = None) -> Optional[CaptureWriter]:
+    """Start recording to `path` (or stop, if None), closing any previous capture"""
+    global _capture
+    if _capture is not None:
+        _capture.close()
+    _capture = CaptureWriter(path) if path else None
+    return _capture
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Virtual users for simulating production traffic on the message endpoint.
+
+Production load isn't a steady request stream: every user asks for one
+message per plant, one plant after another (as PlantViewModel does), and most
+of them do it right after the daily notification. This module models that:
+
+    users        each with a geometric number of plants (Plant from
+                 test_ai_messages.py) and an optional weather preset
+    arrivals     when each user opens the app, from an ArrivalProfile:
+                   uniform              spread evenly over the run
+                   burst[:F[:DECAY]]    fraction F (default 0.6) opens the
+                                        app within an exponential DECAY
+                                        (default 30s) of a notification at the
+                                        start of the run; the rest uniform
+    statistics   SimulationStats, small mergeable counters and histograms that
+                 worker processes send back to the parent instead of results
+
+The harness (test_harness.py --simulate) runs the users across a process pool.
+"""
+
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+from harness_metrics import LatencyHistogram
+from prompt_templates import VIBE_PROMPTS
+from scenarios import WEATHER_PRESETS
+from soak_monitor import format_duration, parse_duration
+from test_ai_messages import Plant
+
+DEFAULT_ARRIVALS = "burst"
+DEFAULT_BURST_FRACTION = 0.6
+DEFAULT_BURST_DECAY = 30.0  # seconds
+DEFAULT_PLANTS_PER_USER = 2.5  # mean
+MAX_PLANTS_PER_USER = 25
+
+SPECIES = ["Fiddle Leaf Fig", "Snake Plant", "Pothos", "Monstera", "Peace Lily",
+           "Basil", "Sunflower", "ZZ Plant", "Spider Plant", "Aloe Vera"]
+# Share of plants in each status on a typical morning
+STATUS_WEIGHTS = {"Hydrated": 0.7, "Thirsty": 0.25, "Critical": 0.05}
+# Share of users whose app sends weather with each request
+WEATHER_SHARE = 0.5
+
+class ArrivalProfile:
+    """When virtual users open the app, relative to the start of the run"""
+    def __init__(self, spec: str = DEFAULT_ARRIVALS):
+        self.spec = spec
+        kind, *params = spec.strip().lower().split(":")
+        self.kind = kind
+        self.burst_fraction = 0.0
+        self.burst_decay = DEFAULT_BURST_DECAY
+        try:
+            if kind == "uniform" and not params:
+                return
+            if kind == "burst" and len(params) <= 2:
+                self.burst_fraction = float(params[0]) if params else DEFAULT_BURST_FRACTION
+                if len(params) > 1:
+                    self.burst_decay = parse_duration(params[1])
+                if 0 <= self.burst_fraction <= 1:
+                    return
+        except ValueError:
+            pass
+        raise ValueError(f"Invalid arrival profile '{spec}' (expected uniform, burst, burst:FRACTION or burst:FRACTION:DECAY, e.g. burst:0.7:20s)")
+
+    def sample(self, rng: random.Random, window: float) -> Tuple[float, str]:
+        """Seconds after the start at which one user arrives, and the phase it arrives in"""
+        if rng.random() < self.burst_fraction:
+            # Notification opens tail off exponentially; the tail is cut at the end of the run
+            return min(rng.expovariate(1 / self.burst_decay), window), "burst"
+        return rng.uniform(0, window), "background"
+
+    def __str__(self) -> str:
+        if self.kind == "uniform":
+            return "uniform"
+        return f"{self.burst_fraction:.0%} in a notification burst (mean delay {format_duration(self.burst_decay)}), the rest uniform"
+
+class VirtualUser:
+    """One app user: when they open the app and the plants they want messages for"""
+    def __init__(self, user_id: int, arrival: float, phase: str, plants: List[Plant], weather: Optional[str]):
+        self.user_id = user_id
+        self.arrival = arrival
+        self.phase = phase
+        self.plants = plants
+        self.weather = weather
+
+def plant_count(rng: random.Random, mean: float) -> int:
+    """Plants owned by one user: geometric with the given mean (at least 1, at most MAX_PLANTS_PER_USER)"""
+    if mean <= 1:
+        return 1
+    # Inverse CDF of a geometric distribution on 1, 2, ... with success probability 1/mean
+    count = 1 + int(math.log(1 - rng.random()) / math.log(1 - 1 / mean))
+    return min(count, MAX_PLANTS_PER_USER)
+
+def random_plant(rng: random.Random, nickname: str) -> Plant:
+    status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+    last_watered = {"Hydrated": rng.randint(0, 2), "Thirsty": rng.randint(3, 6), "Critical": rng.randint(7, 14)}[status]
+    return Plant(
+        nickname=nickname,
+        species=rng.choice(SPECIES),
+        vibe=rng.choice(list(VIBE_PROMPTS)),
+        status=status,
+        last_watered_days_ago=last_watered,
+        health_streak=rng.randint(0, 60)
+    )
+
+def generate_users(count: int, window: float, arrivals: ArrivalProfile,
+                   plants_per_user: float = DEFAULT_PLANTS_PER_USER, seed: int = 0) -> List[VirtualUser]:
+    """A reproducible population of `count` users arriving over `window` seconds, in arrival order"""
+    rng = random.Random(seed)
+    weather_presets = [name for name in WEATHER_PRESETS if WEATHER_PRESETS[name] is not None]
+    users = []
+    for user_id in range(count):
+        arrival, phase = arrivals.sample(rng, window)
+        plants = [random_plant(rng, f"User{user_id}Plant{i + 1}") for i in range(plant_count(rng, plants_per_user))]
+        weather = rng.choice(weather_presets) if rng.random() < WEATHER_SHARE else None
+        users.append(VirtualUser(user_id, arrival, phase, plants, weather))
+    users.sort(key=lambda user: user.arrival)
+    return users
+
+def plant_request(plant: Plant, weather: Optional[str]) -> Dict:
+    """Keyword arguments for the harness's test_message_generation"""
+    return {
+        "nickname": plant.nickname,
+        "species": plant.species,
+        "vibe": plant.vibe,
+        "status": plant.status,
+        "health_streak": plant.health_streak,
+        "last_watered_days_ago": plant.last_watered_days_ago,
+        "weather_data": WEATHER_PRESETS[weather] if weather else None
+    }
+
+class SimulationStats:
+    """Counters and histograms for part of a simulation (one worker's last interval, or the whole run).
+
+    Small and mergeable, so worker processes send these to the parent instead
+    of one result per request.
+    """
+    def __init__(self):
+        self.sessions_started = 0
+        self.sessions_finished = 0
+        self.requests = 0
+        self.failures = 0
+        self.skipped = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        # Per request, by the phase its user arrived in
+        self.latency: Dict[str, LatencyHistogram] = {}
+        # Scheduled arrival to the last plant's message: what the user waits for
+        self.session_latency = LatencyHistogram()
+        # Scheduled arrival to the session actually starting; grows if the simulator can't keep up
+        self.start_lag = LatencyHistogram()
+        self.errors: Dict[str, int] = {}
+
+    def record_request(self, phase: str, result):
+        """Book one TestResult from the harness"""
+        if result.skipped:
+            self.skipped += 1
+            return
+        self.requests += 1
+        self.latency.setdefault(phase, LatencyHistogram()).record(result.duration)
+        if result.success:
+            if result.usage is not None:
+                self.prompt_tokens += result.usage.prompt_tokens
+                self.output_tokens += result.usage.output_tokens
+        else:
+            self.failures += 1
+            reason = result.message.splitlines()[0][:80]
+            self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def merge(self, other: "SimulationStats"):
+        self.sessions_started += other.sessions_started
+        self.sessions_finished += other.sessions_finished
+        self.requests += other.requests
+        self.failures += other.failures
+        self.skipped += other.skipped
+        self.prompt_tokens += other.prompt_tokens
+        self.output_tokens += other.output_tokens
+        for phase, histogram in other.latency.items():
+            self.latency.setdefault(phase, LatencyHistogram()).merge(histogram)
+        self.session_latency.merge(other.session_latency)
+        self.start_lag.merge(other.start_lag)
+        for reason, count in other.errors.items():
+            self.errors[reason] = self.errors.get(reason, 0) + count
+
+    def request_latency(self) -> LatencyHistogram:
+        """Request latency across all phases"""
+        histogram = LatencyHistogram()
+        for phase_histogram in self.latency.values():
+            histogram.merge(phase_histogram)
+        return histogram
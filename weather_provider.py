@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Weather for weather-aware test scenarios, fetched the way the app does.
+
+The app asks Open-Meteo for the current conditions at a plant's location
+(Network/WeatherService.swift) and sends them to the backend as
+`weatherData`. WeatherProvider makes the same query for a location name or
+coordinates and returns the backend's shape:
+
+    {"current": {"temperature": 9.8, "humidity": 84, "precipitation": 0.4}}
+
+Sweeps ask for the same few places over and over, so forecasts are shared:
+
+    cache        keyed by coordinates rounded to 0.1 degrees (about 11km),
+                 so nearby plants share a forecast; entries expire at the end
+                 of the forecast hour they were fetched in
+    coalescing   concurrent lookups for the same place wait for one fetch
+                 instead of each sending their own
+    fixtures     forecasts saved in a JSON file (weather_fixtures.json) by
+                 rounded coordinates, for offline and reproducible runs
+
+Modes: live (fetch from Open-Meteo), fixtures (read the fixture file only)
+and record (fetch, and save every forecast to the fixture file).
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from http_client import timed_request
+from single_flight import SingleFlight
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+# The fields WeatherService.swift asks for
+CURRENT_FIELDS = "temperature_2m,relative_humidity_2m,precipitation,weather_code"
+DAILY_FIELDS = "temperature_2m_max,precipitation_sum"
+
+MODES = ["live", "fixtures", "record"]
+DEFAULT_WEATHER_MODE = "live"
+DEFAULT_FIXTURES_PATH = "weather_fixtures.json"
+BUCKET_DECIMALS = 1  # degrees rounded to 0.1, about 11km
+FORECAST_HOUR = 3600  # seconds
+FETCH_TIMEOUT = 10.0
+
+# Places with a forecast in the shipped fixture file, used by weather sweeps
+WEATHER_LOCATIONS = [
+    "Edinburgh, Scotland",
+    "New York, USA",
+    "California, USA",
+    "Portland, Oregon",
+    "Phoenix, Arizona",
+    "Oslo, Norway"
+]
+
+# Looked up by substring, like WeatherService.getCoordinates (which has no geocoding API either)
+KNOWN_LOCATIONS: Dict[str, Tuple[float, float]] = {
+    "edinburgh": (55.9533, -3.1883),
+    "scotland": (55.9533, -3.1883),
+    "london": (51.5074, -0.1278),
+    "new york": (40.7128, -74.0060),
+    "portland": (45.5152, -122.6784),
+    "oregon": (45.5152, -122.6784),
+    "seattle": (47.6062, -122.3321),
+    "san francisco": (37.7749, -122.4194),
+    "los angeles": (34.0522, -118.2437),
+    "california": (34.0522, -118.2437),
+    "phoenix": (33.4484, -112.0740),
+    "arizona": (33.4484, -112.0740),
+    "oslo": (59.9139, 10.7522),
+    "norway": (59.9139, 10.7522),
+    "sydney": (-33.8688, 151.2093)
+}
+# WeatherService's fallback for places it doesn't know
+DEFAULT_COORDINATES = (40.7128, -74.0060)
+
+class WeatherUnavailable(Exception):
+    """No forecast could be fetched (or found in the fixtures) for a location"""
+
+def geocode(location: str) -> Tuple[float, float]:
+    """Coordinates for a location name or a "latitude,longitude" string"""
+    try:
+        latitude, longitude = (float(part) for part in location.split(","))
+        return latitude, longitude
+    except ValueError:
+        pass
+    name = location.lower()
+    for known, coordinates in KNOWN_LOCATIONS.items():
+        if known in name:
+            return coordinates
+    return DEFAULT_COORDINATES
+
+def bucket(latitude: float, longitude: float) -> str:
+    """Cache and fixture key: the coordinates rounded to BUCKET_DECIMALS, e.g. '56.0,-3.2'"""
+    return f"{round(latitude, BUCKET_DECIMALS):.{BUCKET_DECIMALS}f},{round(longitude, BUCKET_DECIMALS):.{BUCKET_DECIMALS}f}"
+
+def forecast_url(latitude: float, longitude: float) -> str:
+    return (f"{OPEN_METEO_URL}?latitude={latitude}&longitude={longitude}"
+            f"&current={CURRENT_FIELDS}&daily={DAILY_FIELDS}&timezone=auto")
+
+def fetch_forecast(latitude: float, longitude: float, timeout: float = FETCH_TIMEOUT) -> Dict:
+    """Open-Meteo's forecast response for the coordinates"""
+    try:
+        response = timed_request("GET", forecast_url(latitude, longitude), timeout=timeout)
+    except Exception as e:
+        raise WeatherUnavailable(f"Weather request failed: {str(e)}")
+    if response.status != 200:
+        raise WeatherUnavailable(f"Weather request failed: HTTP {response.status} {response.reason}")
+    try:
+        forecast = response.json()
+        forecast["current"]["temperature_2m"]
+    except (ValueError, KeyError, TypeError):
+        raise WeatherUnavailable("Weather request failed: unexpected response")
+    return forecast
+
+def to_weather_data(forecast: Dict) -> Dict:
+    """The backend's weatherData for an Open-Meteo forecast"""
+    current = forecast["current"]
+    return {
+        "current": {
+            "temperature": current["temperature_2m"],
+            "humidity": current["relative_humidity_2m"],
+            "precipitation": current["precipitation"]
+        }
+    }
+
+def describe_weather(weather_data: Dict) -> str:
+    """The weather sentence the backend adds to the prompt (buildUserPrompt in api/generate-message.ts)"""
+    current = weather_data["current"]
+    return (f"Current weather: {current['temperature']:g}°C, {current['humidity']:g}% humidity, "
+            f"{current['precipitation']:g}mm precipitation.")
+
+def forecast_hour_end(now: float) -> float:
+    """When the forecast hour containing `now` ends"""
+    return (now // FORECAST_HOUR + 1) * FORECAST_HOUR
+
+class WeatherProvider:
+    """Weather by location, cached per rounded coordinates and forecast hour, with concurrent fetches coalesced"""
+    def __init__(self, mode: str = DEFAULT_WEATHER_MODE, fixtures_path: str = DEFAULT_FIXTURES_PATH,
+                 timeout: float = FETCH_TIMEOUT):
+        if mode not in MODES:
+            raise ValueError(f"Unknown weather mode '{mode}' (expected one of: {', '.join(MODES)})")
+        self.mode = mode
+        self.fixtures_path = fixtures_path
+        self.timeout = timeout
+        self.fixtures: Dict[str, Dict] = {}
+        if mode != "live" and os.path.exists(fixtures_path):
+            with open(fixtures_path, encoding="utf-8") as f:
+                self.fixtures = json.load(f)
+        elif mode == "fixtures":
+            raise ValueError(f"Weather fixture file {fixtures_path} not found (create it with --weather record)")
+        # Bucket -> (expiry, weatherData)
+        self._cache: Dict[str, Tuple[float, Dict]] = {}
+        # Concurrent lookups of one bucket share a fetch
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        # Forecasts fetched (or read from the fixtures)
+        self.fetches = 0
+        self.failures = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    def weather_for(self, location: str) -> Dict:
+        """weatherData for a location name (see geocode)"""
+        return self.weather_at(*geocode(location))
+
+    def weather_at(self, latitude: float, longitude: float) -> Dict:
+        """weatherData for the coordinates' bucket; raises WeatherUnavailable"""
+        key = bucket(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+        weather, _ = self._flight.do(key, lambda: self._fetch(key))
+        return weather
+
+    def _fetch(self, key: str) -> Dict:
+        with self._lock:
+            # Another lookup may have fetched this bucket since the cache was checked
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.time():
+                return cached[1]
+        try:
+            weather = self._load(key)
+        except WeatherUnavailable:
+            with self._lock:
+                self.failures += 1
+            raise
+        with self._lock:
+            self._cache[key] = (forecast_hour_end(time.time()), weather)
+        return weather
+
+    def _load(self, key: str) -> Dict:
+        """Forecast for a bucket from the fixtures or Open-Meteo (queried at the bucket's coordinates)"""
+        with self._lock:
+            self.fetches += 1
+        if self.mode == "fixtures":
+            forecast = self.fixtures.get(key)
+            if forecast is None:
+                raise WeatherUnavailable(f"No weather fixture for {key} in {self.fixtures_path} (record one with --weather record)")
+            return to_weather_data(forecast)
+        latitude, longitude = (float(part) for part in key.split(","))
+        forecast = fetch_forecast(latitude, longitude, self.timeout)
+        with self._lock:
+            if self.mode == "record":
+                self.fixtures[key] = forecast
+                self._save_fixtures()
+        return to_weather_data(forecast)
+
+    def _save_fixtures(self):
+        # Written whole and swapped in, so an interrupted run never leaves a truncated file
+        partial = f"{self.fixtures_path}.partial"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(self.fixtures, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(partial, self.fixtures_path)
+
+    def summary(self) -> str:
+        """One line for the run report"""
+        source = "fixture loads" if self.mode == "fixtures" else "forecast fetches"
+        line = f"{self.lookups} lookups, {self.fetches} {source}, {self.hits} cache hits, {self.coalesced} coalesced"
+        if self.failures:
+            line += f", {self.failures} failed"
+        return line
+
+_weather_provider: Optional[WeatherProvider] = None
+
+def get_weather_provider() -> Optional[WeatherProvider]:
+    """Return the process's weather provider (None unless configured)"""
+    return _weather_provider
+
+def configure_weather_provider(mode: Optional[str] = None, fixtures_path: str = DEFAULT_FIXTURES_PATH) -> Optional[WeatherProvider]:
+    """Replace the process's weather provider; `mode` None turns weather lookups off"""
+    global _weather_provider
+    _weather_provider = WeatherProvider(mode, fixtures_path) if mode else None
+    return _weather_provider